@@ -6,3 +6,9 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        """Compile the prompts of every document type once, before the first request."""
+        from src.llm.prompt_registry import get_prompt_registry
+
+        get_prompt_registry()
@@ -0,0 +1,148 @@
+import multiprocessing
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import CHROMA_HOST, CHROMA_PORT, EMBEDDING_DEFAULT_BACKEND
+from src.services.vector_db.chroma_impl import ChromaVectorDB, get_chroma_client
+from src.utils.benchmark import format_bytes
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def run_worker(
+    host: str | None, port: int, collection_name: str, query_embeddings: list[list[float]], n_results: int
+) -> tuple[float, int]:
+    """
+    Run similarity queries from a worker process, as one Gunicorn/Uvicorn worker would.
+
+    Queries use precomputed embeddings, so only the vector database is measured.
+
+    Returns
+    -------
+    tuple[float, int]
+        Seconds spent querying (after opening the collection), and peak resident memory of the worker in bytes
+    """
+    collection = get_chroma_client(host, port).get_collection(collection_name)
+    # The first query loads the index, which every worker pays once at startup
+    collection.query(query_embeddings=query_embeddings[:1], n_results=n_results)
+
+    start_time = time.perf_counter()
+    for embedding in query_embeddings:
+        collection.query(query_embeddings=[embedding], n_results=n_results)
+    elapsed = time.perf_counter() - start_time
+
+    # ru_maxrss is reported in KiB on Linux
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    """Django management command comparing the embedded Chroma store against a Chroma server."""
+
+    help = "Reports query throughput and worker memory of embedded and client/server Chroma at several worker counts"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="Embedded collection providing the documents and embeddings (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--host",
+            type=str,
+            default=CHROMA_HOST,
+            help="Chroma server to compare against, e.g. started with `chroma run --path chroma_server` "
+            "(default: CHROMA_HOST)",
+        )
+        parser.add_argument("--port", type=int, default=CHROMA_PORT, help="Chroma server port (default: CHROMA_PORT)")
+        parser.add_argument(
+            "--workers", type=int, nargs="+", default=[1, 4, 8], help="Worker process counts (default: 1 4 8)"
+        )
+        parser.add_argument(
+            "--num-queries",
+            type=int,
+            default=200,
+            help="Queries run by each worker (default: 200)",
+        )
+        parser.add_argument(
+            "--n-results",
+            type=int,
+            default=10,
+            help="Number of results per query (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        if not options["host"]:
+            raise CommandError("Set CHROMA_HOST or --host to the Chroma server to benchmark")
+
+        source_db = ChromaVectorDB(embedding_backend=options["embedding_backend"], host=None)
+        source_db.get_or_create_collection(name=options["collection_name"])
+        ids, documents, metadatas, embeddings = source_db.get_docs(include_embeddings=True)
+        if not ids:
+            raise CommandError(f"Collection {options['collection_name']} is empty, run populate_vectordb first")
+
+        random.seed(42)
+        rows = random.choices(range(len(ids)), k=options["num_queries"])
+        query_embeddings = np.asarray(embeddings)[rows].tolist()
+
+        # The server gets a copy of the embedded collection with the same HNSW settings
+        name = f"{options['collection_name']}_server_benchmark"
+        server_db = ChromaVectorDB(
+            embedding_backend=options["embedding_backend"], host=options["host"], port=options["port"]
+        )
+        server_db.get_or_create_collection(name=name)
+        try:
+            server_db.upsert_docs(documents, metadatas, ids, embeddings=embeddings)
+            self.stdout.write(
+                f"{len(ids)} documents, {options['num_queries']} queries per worker, top-{options['n_results']}"
+            )
+            self.stdout.write(f"{'mode':>8} {'workers':>7} {'queries/s':>10} {'worker_rss':>11}")
+            for workers in options["workers"]:
+                for mode, host, collection_name in (
+                    ("embedded", None, options["collection_name"]),
+                    ("server", options["host"], name),
+                ):
+                    throughput, rss = self.run_workers(
+                        workers, host, options["port"], collection_name, query_embeddings, options["n_results"]
+                    )
+                    self.stdout.write(f"{mode:>8} {workers:>7} {throughput:>10.1f} {format_bytes(rss):>11}")
+        finally:
+            server_db.client.delete_collection(name)
+
+    def run_workers(
+        self,
+        workers: int,
+        host: str | None,
+        port: int,
+        collection_name: str,
+        query_embeddings: list[list[float]],
+        n_results: int,
+    ) -> tuple[float, int]:
+        """Run the queries in parallel worker processes, returning the total queries/s and mean worker memory."""
+        # Fresh processes, so no worker inherits a client or a loaded index from the command
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(run_worker, host, port, collection_name, query_embeddings, n_results)
+                for _ in range(workers)
+            ]
+            results = [future.result() for future in futures]
+
+        elapsed = max(result[0] for result in results)
+        rss = sum(result[1] for result in results) // workers
+        return workers * len(query_embeddings) / elapsed, rss
@@ -0,0 +1,106 @@
+import itertools
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import CHROMA_HNSW_SPACE, EMBEDDING_DEFAULT_BACKEND
+from src.schemas.vector_db import HNSWSettings
+from src.services.vector_db.base import l2_normalize
+from src.services.vector_db.chroma_impl import ChromaVectorDB
+from src.utils.benchmark import recall_at_k, summarize_latencies
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command sweeping the HNSW parameters of a ChromaDB collection."""
+
+    help = "Rebuilds a collection with several HNSW settings and reports recall@k against p50/p99 query latency"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="ChromaDB collection providing the documents and embeddings (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32], help="Values of M to sweep")
+        parser.add_argument(
+            "--ef-construction", type=int, nargs="+", default=[100, 200], help="Values of ef_construction to sweep"
+        )
+        parser.add_argument(
+            "--ef-search", type=int, nargs="+", default=[10, 50, 100, 200], help="Values of ef_search to sweep"
+        )
+        parser.add_argument(
+            "--num-queries",
+            type=int,
+            default=100,
+            help="Number of stored documents used as queries (default: 100)",
+        )
+        parser.add_argument(
+            "--n-results",
+            type=int,
+            default=10,
+            help="Number of results per query (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        source_db = ChromaVectorDB(embedding_backend=options["embedding_backend"])
+        source_db.get_or_create_collection(name=options["collection_name"])
+        ids, documents, metadatas, embeddings = source_db.get_docs(include_embeddings=True)
+        if not ids:
+            raise CommandError(f"Collection {options['collection_name']} is empty, run populate_vectordb first")
+
+        random.seed(42)
+        queries = random.sample(documents, min(options["num_queries"], len(documents)))
+        n_results = min(options["n_results"], len(ids))
+
+        # Exact cosine neighbours are the reference every HNSW setting is measured against
+        similarities = l2_normalize(source_db.embed_texts(queries)) @ l2_normalize(embeddings).T  # type: ignore[arg-type]
+        exact_ids = [[ids[i] for i in row[:n_results]] for row in np.argsort(-similarities, axis=1)]
+
+        self.stdout.write(f"{len(queries)} queries, top-{n_results}, {len(ids)} documents, {CHROMA_HNSW_SPACE} space")
+        self.stdout.write(
+            f"{'M':>4} {'ef_constr':>9} {'ef_search':>9} {'build_s':>8} {'recall':>7} {'p50_ms':>8} {'p99_ms':>8}"
+        )
+
+        # ef_search is read when an index is loaded, so every setting is measured on its own collection
+        for m, ef_construction, ef_search in itertools.product(
+            options["m"], options["ef_construction"], options["ef_search"]
+        ):
+            name = f"{options['collection_name']}_hnsw_m{m}_efc{ef_construction}_efs{ef_search}"
+            hnsw = HNSWSettings(m=m, ef_construction=ef_construction, ef_search=ef_search)
+            vector_db = ChromaVectorDB(embedding_backend=options["embedding_backend"], hnsw=hnsw)
+            try:
+                vector_db.get_or_create_collection(name=name)
+                start_time = time.perf_counter()
+                vector_db.upsert_docs(documents, metadatas, ids, embeddings=embeddings)
+                build_time = time.perf_counter() - start_time
+
+                found, latencies = [], []
+                for query in queries:
+                    start_time = time.perf_counter()
+                    result_ids, _, _, _, _ = vector_db.find_similar_docs(query, n_results)
+                    latencies.append(time.perf_counter() - start_time)
+                    found.append(result_ids)
+            finally:
+                vector_db.client.delete_collection(name)
+
+            summary = summarize_latencies(latencies)
+            self.stdout.write(
+                f"{m:>4} {ef_construction:>9} {ef_search:>9} {build_time:>8.2f} "
+                f"{recall_at_k(found, exact_ids, n_results):>7.3f} "
+                f"{summary['p50_ms']:>8.3f} {summary['p99_ms']:>8.3f}"
+            )
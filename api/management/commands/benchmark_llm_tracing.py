@@ -0,0 +1,122 @@
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from src.llm.tracing import Invocation, LLMTracer
+from src.schemas.llm import LLMResponse, LLMUsage, SystemPrompt
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def make_invocation(text_chars: int) -> tuple[SystemPrompt, str, LLMResponse]:
+    """Build the prompt, document text and response of a typical extraction call."""
+    system_prompt = SystemPrompt(prefix="<document_extraction_task>" + "x" * 4000 + "</document_extraction_task>")
+    user_content = f"<document_text>{'Invoice No. 42, ACME Corp. ' * (text_chars // 26)}</document_text>"
+    response = LLMResponse(
+        text="",
+        model="claude-4-sonnet-20250514",
+        usage=LLMUsage(input_tokens=1200, output_tokens=80, cache_read_input_tokens=1100),
+        tool_input={
+            "invoice_number": "42",
+            "invoice_date": "2024-01-15",
+            "due_date": None,
+            "vendor_details": "ACME Corp.",
+            "total_amount": 1200.5,
+        },
+        stop_reason="tool_use",
+    )
+    return system_prompt, user_content, response
+
+
+class Command(BaseCommand):
+    """Django management command measuring the request-path cost of tracing LLM calls."""
+
+    help = (
+        "Reports the per-call overhead of LLM tracing when off, sampled and fully on, "
+        "against writing every trace synchronously"
+    )
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--num-calls",
+            type=int,
+            default=5000,
+            help="Traced calls per mode (default: 5000)",
+        )
+        parser.add_argument(
+            "--sample-rate",
+            type=float,
+            default=0.1,
+            help="Sample rate of the sampled mode (default: 0.1)",
+        )
+        parser.add_argument(
+            "--text-chars",
+            type=int,
+            default=8000,
+            help="Characters of document text per call (default: 8000)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        system_prompt, user_content, response = make_invocation(options["text_chars"])
+        num_calls = options["num_calls"]
+        self.stdout.write(f"{num_calls} calls per mode, {len(user_content)} characters of document text")
+        self.stdout.write(
+            f"{'mode':>12} {'rate':>5} {'mean_us':>8} {'p99_us':>8} {'flush_ms':>9} {'written':>8} {'dropped':>8}"
+        )
+
+        with tempfile.TemporaryDirectory() as store_path:
+            for mode, path, sample_rate in (
+                ("off", None, 0.0),
+                ("sampled", store_path, options["sample_rate"]),
+                ("full", store_path, 1.0),
+            ):
+                tracer = LLMTracer(path, sample_rate, max_queue=num_calls)
+                latencies = np.empty(num_calls)
+                for i in range(num_calls):
+                    start_time = time.perf_counter()
+                    tracer.record("extraction", system_prompt, user_content, response, 1.5)
+                    latencies[i] = time.perf_counter() - start_time
+
+                # The writer thread drains the queue while requests go on, so flushing is not on the request path
+                start_time = time.perf_counter()
+                tracer.close()
+                flush_time = time.perf_counter() - start_time
+                self.write_row(mode, sample_rate, latencies, flush_time, tracer.written, tracer.dropped)
+
+            self.write_row(
+                "synchronous",
+                1.0,
+                *self.run_synchronous(Path(store_path), num_calls, system_prompt, user_content, response),
+            )
+
+    def run_synchronous(
+        self, store_path: Path, num_calls: int, system_prompt: SystemPrompt, user_content: str, response: LLMResponse
+    ) -> tuple[np.ndarray, float, int, int]:
+        """Write every trace in its own transaction on the calling thread, as a synchronous store would."""
+        tracer = LLMTracer(store_path)
+        connection = tracer.connect(store_path / "synchronous.sqlite3")
+        latencies = np.empty(num_calls)
+        try:
+            for i in range(num_calls):
+                start_time = time.perf_counter()
+                invocation = Invocation(time.time(), "extraction", system_prompt, user_content, response, 1.5)
+                tracer.write(connection, [invocation])
+                latencies[i] = time.perf_counter() - start_time
+        finally:
+            connection.close()
+        return latencies, 0.0, tracer.written, 0
+
+    def write_row(
+        self, mode: str, sample_rate: float, latencies: np.ndarray, flush_time: float, written: int, dropped: int
+    ) -> None:
+        """Write the results of one mode, with per-call latencies in microseconds."""
+        self.stdout.write(
+            f"{mode:>12} {sample_rate:>5.2f} {latencies.mean() * 1e6:>8.1f} "
+            f"{np.percentile(latencies, 99) * 1e6:>8.1f} {flush_time * 1000:>9.1f} {written:>8} {dropped:>8}"
+        )
@@ -0,0 +1,101 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import EMBEDDING_DEFAULT_BACKEND, QUANTIZATION_RERANK_FACTOR
+from src.services.vector_db.numpy_impl import NumpyVectorDB
+from src.services.vector_db.vector_db import VectorDBFactory
+from src.utils.benchmark import format_bytes, format_latencies, recall_at_k
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command comparing quantized NumPy indexes against the exact float32 index."""
+
+    help = "Reports recall@k, latency and scanned memory of float16 and int8 vector storage against exact search"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="ChromaDB collection providing the documents and embeddings (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--num-queries",
+            type=int,
+            default=100,
+            help="Number of stored documents used as queries (default: 100)",
+        )
+        parser.add_argument(
+            "--n-results",
+            type=int,
+            default=10,
+            help="Number of results per query (default: 10)",
+        )
+        parser.add_argument(
+            "--rerank-factor",
+            type=int,
+            default=QUANTIZATION_RERANK_FACTOR,
+            help=f"Candidates re-ranked per result (default: {QUANTIZATION_RERANK_FACTOR})",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        chroma_db = VectorDBFactory.create("chromadb", embedding_backend=options["embedding_backend"])
+        chroma_db.get_or_create_collection(name=options["collection_name"])
+        ids, documents, metadatas, embeddings = chroma_db.get_docs(include_embeddings=True)
+        if not ids:
+            raise CommandError(f"Collection {options['collection_name']} is empty, run populate_vectordb first")
+
+        random.seed(42)
+        queries = random.sample(documents, min(options["num_queries"], len(documents)))
+        n_results = options["n_results"]
+        self.stdout.write(
+            f"{len(queries)} queries, top-{n_results}, {len(ids)} documents, "
+            f"re-ranking {n_results * options['rerank_factor']} candidates"
+        )
+
+        exact_ids: list[list[str]] = []
+        exact_bytes = 0
+        for quantization in ("none", "float16", "int8"):
+            numpy_db = NumpyVectorDB(
+                embedding_backend=options["embedding_backend"],
+                quantization=quantization,
+                rerank_factor=options["rerank_factor"],
+            )
+            suffix = "" if quantization == "none" else f"_{quantization}"
+            collection = numpy_db.get_or_create_collection(name=f"{options['collection_name']}{suffix}")
+            numpy_db.upsert_docs(documents, metadatas, ids, embeddings=embeddings)
+            # Warm the embedding cache so every index is timed on the search, not the embedding request
+            numpy_db.embed_texts(queries)
+
+            found, latencies = [], []
+            for query in queries:
+                start_time = time.perf_counter()
+                result_ids, _, _, _, _ = numpy_db.find_similar_docs(query, n_results)
+                latencies.append(time.perf_counter() - start_time)
+                found.append(result_ids)
+
+            footprint = collection.memory_footprint()
+            scanned_bytes = footprint["vectors"] if quantization == "none" else footprint["codes"]
+            scanned_bytes += footprint.get("scales", 0)
+            if quantization == "none":
+                exact_ids, exact_bytes = found, scanned_bytes
+
+            self.stdout.write(
+                f"{quantization:>7}: recall@{n_results} {recall_at_k(found, exact_ids, n_results):.3f} | "
+                f"scanned {format_bytes(scanned_bytes)} ({scanned_bytes / exact_bytes:.0%} of exact) | "
+                f"{format_latencies(latencies)}"
+            )
@@ -0,0 +1,125 @@
+import random
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import EMBEDDING_DEFAULT_BACKEND, NUMPY_VECTOR_DB_PATH
+from src.services.vector_db.base import VectorDBBase
+from src.services.vector_db.vector_db import VectorDBFactory
+from src.utils.benchmark import (
+    directory_size,
+    format_bytes,
+    format_latencies,
+    mapped_rss,
+    process_rss,
+    recall_at_k,
+)
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+# Default location of chromadb.PersistentClient()
+CHROMA_PERSIST_PATH = Path("chroma")
+
+
+class Command(BaseCommand):
+    """Django management command comparing the NumPy flat index against ChromaDB."""
+
+    help = (
+        "Copies a ChromaDB collection into the NumPy backend and compares query latency, recall, "
+        "disk footprint and memory"
+    )
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="ChromaDB collection to benchmark (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--num-queries",
+            type=int,
+            default=100,
+            help="Number of stored documents used as queries (default: 100)",
+        )
+        parser.add_argument(
+            "--n-results",
+            type=int,
+            default=10,
+            help="Number of results per query (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        chroma_db = VectorDBFactory.create("chromadb", embedding_backend=options["embedding_backend"])
+        chroma_db.get_or_create_collection(name=options["collection_name"])
+        ids, documents, metadatas, embeddings = chroma_db.get_docs(include_embeddings=True)
+        if not ids:
+            raise CommandError(f"Collection {options['collection_name']} is empty, run populate_vectordb first")
+
+        numpy_db = VectorDBFactory.create("numpy", embedding_backend=options["embedding_backend"])
+        numpy_db.get_or_create_collection(name=options["collection_name"])
+        start_time = time.perf_counter()
+        numpy_db.upsert_docs(documents, metadatas, ids, embeddings=embeddings)
+        self.stdout.write(
+            f"Copied {len(ids)} documents to the NumPy backend in {time.perf_counter() - start_time:.2f}s"
+        )
+
+        random.seed(42)
+        queries = random.sample(documents, min(options["num_queries"], len(documents)))
+        # Warm the embedding cache so both backends are timed on the lookup, not the embedding request
+        chroma_db.embed_texts(queries)
+
+        n_results = options["n_results"]
+        numpy_path = NUMPY_VECTOR_DB_PATH / options["collection_name"]
+        rss_before = process_rss()
+        chroma_ids, chroma_latencies = self.run_queries(chroma_db, queries, n_results)
+        rss_after_chroma = process_rss()
+        numpy_ids, numpy_latencies = self.run_queries(numpy_db, queries, n_results)
+        rss_after_numpy = process_rss()
+        numpy_resident = mapped_rss(numpy_path)
+
+        vectors_size = (numpy_path / "vectors.f32").stat().st_size
+        dimensions = embeddings.shape[1]  # type: ignore[union-attr]
+        self.stdout.write(f"{len(queries)} queries, top-{n_results}, {len(ids)} documents of {dimensions} dims")
+        self.stdout.write(f"ChromaDB: {format_latencies(chroma_latencies)}")
+        self.stdout.write(f"NumPy:    {format_latencies(numpy_latencies)}")
+        self.stdout.write(
+            f"Recall@{n_results} of ChromaDB against the exact NumPy search: "
+            f"{recall_at_k(chroma_ids, numpy_ids, n_results):.3f}"
+        )
+        self.stdout.write(
+            f"On disk: ChromaDB {format_bytes(directory_size(CHROMA_PERSIST_PATH))} (all collections), "
+            f"NumPy {format_bytes(directory_size(numpy_path))} of which {format_bytes(vectors_size)} "
+            "memory-mapped vectors"
+        )
+        if rss_before is None or rss_after_chroma is None or rss_after_numpy is None or numpy_resident is None:
+            self.stdout.write("Memory: not measured, /proc is unavailable on this platform")
+        else:
+            self.stdout.write(
+                f"Memory: process RSS grew by {format_bytes(rss_after_chroma - rss_before)} during the ChromaDB "
+                f"queries and {format_bytes(rss_after_numpy - rss_after_chroma)} during the NumPy queries, "
+                f"with {format_bytes(numpy_resident)} of the NumPy memory maps resident"
+            )
+
+    def run_queries(
+        self, vector_db: VectorDBBase, queries: list[str], n_results: int
+    ) -> tuple[list[list[str]], list[float]]:
+        """Run one similarity query per text, returning the IDs found and the latency of each query."""
+        found, latencies = [], []
+        for query in queries:
+            start_time = time.perf_counter()
+            ids, _, _, _, _ = vector_db.find_similar_docs(query, n_results)
+            latencies.append(time.perf_counter() - start_time)
+            found.append(ids)
+        return found, latencies
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import EMBEDDING_DEFAULT_BACKEND, EMBEDDING_DIMENSIONS, ROOT_DIR
+from src.services.ocr.ocr import OCREngineFactory
+from src.services.vector_db.chroma_impl import ChromaVectorDB
+from src.utils.benchmark import accuracy, extract_texts, format_bytes, format_latencies, read_labeled_files
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command evaluating shortened OpenAI embeddings."""
+
+    help = "Rebuilds the collection at several embedding sizes and reports accuracy, index size and query latency"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--dataset-path",
+            type=str,
+            default=(ROOT_DIR.parent / "data" / "test").as_posix(),
+            help="Labeled dataset with one folder per document type (default: data/test)",
+        )
+        parser.add_argument(
+            "--limit-per-type",
+            type=int,
+            default=None,
+            help="Maximum number of documents evaluated per type (default: all)",
+        )
+        parser.add_argument(
+            "--ocr-engine",
+            type=str,
+            default="tesseract",
+            choices=["tesseract", "olmo_ocr"],
+            help="OCR engine to use (default: tesseract)",
+        )
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="Populated collection providing the training documents (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the source collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--dimensions",
+            type=int,
+            nargs="+",
+            default=[256, 512, 1536],
+            help="Embedding sizes to evaluate (default: 256 512 1536)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        # The stored texts are re-embedded with OpenAI at every size, so the source collection may use any embedder.
+        # Only OpenAI embeddings are shortened to EMBEDDING_DIMENSIONS, the local backend has a fixed size
+        source_db = ChromaVectorDB(
+            embedding_backend=options["embedding_backend"],
+            embedding_dimensions=EMBEDDING_DIMENSIONS if options["embedding_backend"] == "openai" else None,
+        )
+        source_db.get_or_create_collection(name=options["collection_name"])
+        ids, documents, metadatas, _ = source_db.get_docs()
+        if not ids:
+            raise CommandError(f"Collection {options['collection_name']} is empty, run populate_vectordb first")
+
+        file_paths, labels = read_labeled_files(options["dataset_path"], options["limit_per_type"])
+        if not file_paths:
+            raise CommandError(f"No files found in {options['dataset_path']}")
+
+        self.stdout.write(f"Extracting text from {len(file_paths)} documents...")
+        ocr_engine = OCREngineFactory.create(options["ocr_engine"])
+        texts = asyncio.run(extract_texts(ocr_engine, file_paths))
+        samples = [(text, label) for text, label in zip(texts, labels, strict=True) if text]
+        if not samples:
+            raise CommandError("No text could be extracted from the dataset")
+        texts, labels = [s[0] for s in samples], [s[1] for s in samples]  # type: ignore[misc]
+
+        self.stdout.write(f"{len(ids)} training documents, {len(texts)} test documents")
+        for dimensions in options["dimensions"]:
+            name = f"{options['collection_name']}_dim{dimensions}"
+            vector_db = ChromaVectorDB(embedding_backend="openai", embedding_dimensions=dimensions)
+            try:
+                vector_db.get_or_create_collection(name=name)
+                vector_db.upsert_docs(documents, metadatas, ids)
+                # Warm the embedding cache so queries are timed on the search, not the embedding request
+                vector_db.embed_texts(texts)  # type: ignore[arg-type]
+
+                predictions, latencies = [], []
+                for text in texts:
+                    start_time = time.perf_counter()
+                    _, _, result_metadatas, _, _ = vector_db.find_similar_docs(text)  # type: ignore[arg-type]
+                    latencies.append(time.perf_counter() - start_time)
+                    predictions.append(result_metadatas[0]["document_type"])
+            finally:
+                vector_db.client.delete_collection(name)
+
+            index_bytes = len(ids) * dimensions * 4
+            self.stdout.write(
+                f"{dimensions:>5} dims: accuracy {accuracy(predictions, labels):.3f} | "
+                f"float32 vectors {format_bytes(index_bytes)} | {format_latencies(latencies)}"
+            )
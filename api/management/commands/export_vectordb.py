@@ -0,0 +1,84 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import (
+    EMBEDDING_DEFAULT_BACKEND,
+    EMBEDDING_DIMENSIONS,
+    VECTOR_DB_DEFAULT_TYPE,
+    VECTOR_DB_SNAPSHOT_DIR,
+)
+from src.services.vector_db.snapshot import export_snapshot
+from src.services.vector_db.vector_db import VectorDBFactory
+from src.utils.benchmark import format_bytes
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command exporting a collection to a vector snapshot."""
+
+    help = "Exports the IDs, vectors, documents and metadata of a collection to a checksummed .npz snapshot"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="Collection to export (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--vector-db",
+            type=str,
+            default=VECTOR_DB_DEFAULT_TYPE,
+            choices=["chromadb", "numpy"],
+            help=f"Vector database backend holding the collection (default: {VECTOR_DB_DEFAULT_TYPE})",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--embedding-dimensions",
+            type=int,
+            default=EMBEDDING_DIMENSIONS,
+            help="Output dimensions of the OpenAI embeddings of the collection (default: EMBEDDING_DIMENSIONS)",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="Snapshot file to write (default: snapshots/<collection-name>.npz)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        output = (
+            Path(options["output"])
+            if options["output"]
+            else VECTOR_DB_SNAPSHOT_DIR / f"{options['collection_name']}.npz"
+        )
+        vector_db = VectorDBFactory.create(
+            options["vector_db"],
+            embedding_backend=options["embedding_backend"],
+            embedding_dimensions=options["embedding_dimensions"],
+        )
+        vector_db.get_or_create_collection(name=options["collection_name"])
+        if not vector_db.count():
+            raise CommandError(f"Collection {options['collection_name']} is empty, run populate_vectordb first")
+
+        start_time = time.perf_counter()
+        manifest = export_snapshot(vector_db, output)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {manifest['count']} documents of {manifest['dimensions']} dims to {output} "
+                f"({format_bytes(output.stat().st_size)}) "
+                f"in {time.perf_counter() - start_time:.2f}s"
+            )
+        )
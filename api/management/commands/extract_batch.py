@@ -0,0 +1,128 @@
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import DOCUMENT_FIELDS, EMBEDDING_DEFAULT_BACKEND, LLM_BATCH_POLL_INTERVAL_S, ROOT_DIR
+from src.llm.batches import BatchExtractor
+from src.services.ocr.ocr import OCREngineFactory
+from src.services.vector_db.vector_db import VectorDBFactory
+from src.utils.benchmark import extract_texts
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command extracting the entities of many documents through the Message Batches API."""
+
+    help = (
+        "OCRs and classifies a folder of documents, extracts their entities as Anthropic Message Batches "
+        "and writes one JSON line per document"
+    )
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--input-dir", type=str, required=True, help="Folder of documents to extract, searched recursively"
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="JSON Lines file to write (default: batch_results/extraction_<timestamp>.jsonl)",
+        )
+        parser.add_argument(
+            "--document-type",
+            type=str,
+            default=None,
+            choices=list(DOCUMENT_FIELDS),
+            help="Document type of every file (default: classified with the vector database)",
+        )
+        parser.add_argument(
+            "--ocr-engine",
+            type=str,
+            default="olmo_ocr",
+            choices=["tesseract", "olmo_ocr"],
+            help="OCR engine to use (default: olmo_ocr)",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend of the collection used for classification (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="Collection used for classification (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=LLM_BATCH_POLL_INTERVAL_S,
+            help=f"Seconds between batch status checks (default: {LLM_BATCH_POLL_INTERVAL_S})",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=None, help="Seconds to wait for the batches to end (default: no limit)"
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        file_paths = sorted(path.as_posix() for path in Path(options["input_dir"]).rglob("*") if path.is_file())
+        if not file_paths:
+            raise CommandError(f"No files found in {options['input_dir']}")
+        output = (
+            Path(options["output"])
+            if options["output"]
+            else ROOT_DIR.parent / "batch_results" / f"extraction_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+        )
+
+        self.stdout.write(f"Extracting text from {len(file_paths)} documents...")
+        ocr_engine = OCREngineFactory.create(options["ocr_engine"])
+        texts = asyncio.run(extract_texts(ocr_engine, file_paths))
+        samples = [(path, text) for path, text in zip(file_paths, texts, strict=True) if text]
+        if not samples:
+            raise CommandError("No text could be extracted from the documents")
+
+        if options["document_type"]:
+            document_types = [options["document_type"]] * len(samples)
+        else:
+            vector_db = VectorDBFactory.create("chromadb", embedding_backend=options["embedding_backend"])
+            vector_db.get_or_create_collection(name=options["collection_name"])
+            document_types = [vector_db.find_similar_docs(text)[2][0]["document_type"] for _, text in samples]
+
+        # Custom IDs are limited to 64 characters, so documents are numbered and mapped back to their file
+        documents = {
+            f"doc-{i}": (document_type, text)
+            for i, ((_, text), document_type) in enumerate(zip(samples, document_types, strict=True))
+        }
+        file_by_id = {f"doc-{i}": path for i, (path, _) in enumerate(samples)}
+
+        extractor = BatchExtractor(poll_interval_s=options["poll_interval"])
+        batch_ids = extractor.submit(documents)
+        self.stdout.write(f"Submitted {len(documents)} requests in batches {', '.join(batch_ids)}, waiting...")
+        extractor.wait(batch_ids, options["timeout"])
+        results = extractor.collect(batch_ids, documents)
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            f.writelines(
+                json.dumps({"file": file_by_id[custom_id], **result.model_dump()}) + "\n"
+                for custom_id, result in results.items()
+            )
+
+        failed = sum(1 for result in results.values() if result.error)
+        output_tokens = sum(result.usage.output_tokens for result in results.values() if result.usage)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Extracted {len(results) - failed}/{len(results)} documents ({output_tokens} output tokens) "
+                f"into {output}"
+            )
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} documents failed, see the 'error' field in {output}"))
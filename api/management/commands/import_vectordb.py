@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.constants import (
+    EMBEDDING_DEFAULT_BACKEND,
+    EMBEDDING_DIMENSIONS,
+    VECTOR_DB_DEFAULT_TYPE,
+    VECTOR_DB_SNAPSHOT_DIR,
+)
+from src.schemas.vector_db import HNSWSettings
+from src.services.vector_db.base import VectorDBBase
+from src.services.vector_db.chroma_impl import ChromaVectorDB
+from src.services.vector_db.numpy_impl import NumpyVectorDB
+from src.services.vector_db.snapshot import import_snapshot, read_manifest
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command bulk-loading a vector snapshot into a collection."""
+
+    help = "Loads a snapshot written by export_vectordb into any vector database backend without re-embedding"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--snapshot",
+            type=str,
+            default=(VECTOR_DB_SNAPSHOT_DIR / "idu_collection.npz").as_posix(),
+            help="Snapshot file to load (default: snapshots/idu_collection.npz)",
+        )
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default=None,
+            help="Collection to load the snapshot into (default: the exported collection name)",
+        )
+        parser.add_argument(
+            "--vector-db",
+            type=str,
+            default=VECTOR_DB_DEFAULT_TYPE,
+            choices=["chromadb", "numpy"],
+            help=f"Vector database backend to load the snapshot into (default: {VECTOR_DB_DEFAULT_TYPE})",
+        )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend that produced the snapshot (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--embedding-dimensions",
+            type=int,
+            default=EMBEDDING_DIMENSIONS,
+            help="Output dimensions of the OpenAI embeddings of the snapshot (default: EMBEDDING_DIMENSIONS)",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        try:
+            manifest = read_manifest(options["snapshot"])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read snapshot {options['snapshot']}: {e}") from e
+
+        vector_db = self.create_vector_db(options, manifest["metadata"])
+        start_time = time.perf_counter()
+        try:
+            manifest = import_snapshot(vector_db, options["snapshot"], options["collection_name"])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {manifest['count']} documents into {options['vector_db']} collection "
+                f"'{vector_db.collection.name}' in {time.perf_counter() - start_time:.2f}s"
+            )
+        )
+
+    def create_vector_db(self, options, metadata: dict) -> VectorDBBase:
+        """Create the target vector database, rebuilding the index with the parameters recorded in the snapshot."""
+        if options["vector_db"] == "chromadb":
+            return ChromaVectorDB(
+                embedding_backend=options["embedding_backend"],
+                embedding_dimensions=options["embedding_dimensions"],
+                hnsw=HNSWSettings.from_metadata(metadata),
+            )
+        return NumpyVectorDB(
+            embedding_backend=options["embedding_backend"],
+            embedding_dimensions=options["embedding_dimensions"],
+            quantization=metadata.get("quantization", "none"),
+        )
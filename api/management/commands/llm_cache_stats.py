@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from src.llm.cache import STAGES, get_llm_cache
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command reporting the LLM response cache."""
+
+    help = "Reports the hit rate and size of the LLM response cache per stage, summed over every worker process"
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Remove every cached response and reset the counters after reporting them",
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        cache = get_llm_cache()
+        self.stdout.write(f"{'stage':>10} {'hits':>8} {'misses':>8} {'hit_rate':>8} {'entries':>8}")
+        for stage, stats in cache.stats().items():
+            self.stdout.write(
+                f"{stage:>10} {stats.hits:>8} {stats.misses:>8} {stats.hit_rate:>8.1%} {stats.entries:>8}"
+            )
+
+        if options["clear"]:
+            cache.clear(STAGES)
+            self.stdout.write(self.style.SUCCESS(f"Cleared the LLM response cache in {cache.cache_path}"))
@@ -2,15 +2,26 @@ import asyncio
 import os
 import random
 import shutil
+import time
 from pathlib import Path
 
 import kagglehub
 from django.core.management.base import BaseCommand, CommandError
 
-from src.constants import ROOT_DIR
+from src.constants import (
+    EMBEDDING_DEFAULT_BACKEND,
+    EMBEDDING_DIMENSIONS,
+    NEAR_DUPLICATE_THRESHOLD,
+    ROOT_DIR,
+    VECTOR_DB_DEFAULT_TYPE,
+    VECTOR_DB_INGEST_WRITE_SIZE,
+)
 from src.services.ocr.ocr import OCREngineFactory
+from src.services.vector_db.base import VectorDBBase
 from src.services.vector_db.vector_db import VectorDBFactory
+from src.utils.hashing import hash_file, hash_text
 from src.utils.logging_helper import get_custom_logger
+from src.utils.near_duplicates import NearDuplicateIndex, PrunedPageLog
 
 logger = get_custom_logger(__name__)
 
@@ -34,6 +45,13 @@ class Command(BaseCommand):
             default=10,
             help="Batch size for processing files (default: 10)",
         )
+        parser.add_argument(
+            "--write-size",
+            type=int,
+            default=VECTOR_DB_INGEST_WRITE_SIZE,
+            help="Documents buffered before each write to the vector database, which embeds them in concurrent "
+            f"chunks (default: {VECTOR_DB_INGEST_WRITE_SIZE})",
+        )
         parser.add_argument(
             "--ocr-engine",
             type=str,
@@ -41,6 +59,44 @@ class Command(BaseCommand):
             choices=["tesseract", "olmo_ocr"],
             help="OCR engine to use (default: olmo_ocr)",
         )
+        parser.add_argument(
+            "--embedding-backend",
+            type=str,
+            default=EMBEDDING_DEFAULT_BACKEND,
+            choices=["openai", "local"],
+            help=f"Embedding backend used to build the collection (default: {EMBEDDING_DEFAULT_BACKEND})",
+        )
+        parser.add_argument(
+            "--embedding-dimensions",
+            type=int,
+            default=EMBEDDING_DIMENSIONS,
+            help="Output dimensions of the OpenAI embeddings (default: EMBEDDING_DIMENSIONS, or the full model size)",
+        )
+        parser.add_argument(
+            "--vector-db",
+            type=str,
+            default=VECTOR_DB_DEFAULT_TYPE,
+            choices=["chromadb", "numpy"],
+            help=f"Vector database backend to populate (default: {VECTOR_DB_DEFAULT_TYPE})",
+        )
+        parser.add_argument(
+            "--collection-name",
+            type=str,
+            default="idu_collection",
+            help="Name of the collection to populate (default: idu_collection)",
+        )
+        parser.add_argument(
+            "--dedup",
+            action="store_true",
+            help="Skip documents that are near-duplicates of an indexed document of the same type",
+        )
+        parser.add_argument(
+            "--dedup-threshold",
+            type=float,
+            default=NEAR_DUPLICATE_THRESHOLD,
+            help=f"Estimated Jaccard similarity from which a document is a near-duplicate "
+            f"(default: {NEAR_DUPLICATE_THRESHOLD})",
+        )
         parser.add_argument(
             "--train-ratio",
             type=float,
@@ -175,18 +231,103 @@ class Command(BaseCommand):
 
             for filename in subfolder.iterdir():
                 file_paths.append(filename.as_posix())
-                metadata_list.append({"document_type": subfolder.name})
+                metadata_list.append({"document_type": subfolder.name, "source": f"{subfolder.name}/{filename.name}"})
 
         return file_paths, metadata_list
 
+    def skip_unchanged_files(
+        self,
+        vector_db: VectorDBBase,
+        file_paths: list[str],
+        metadata: list[dict[str, str]],
+        pruned_pages: PrunedPageLog | None = None,
+    ) -> tuple[list[str], list[dict[str, str]]]:
+        """
+        Drop files whose content is already stored in the vector database, or was pruned as a near-duplicate.
+
+        Documents are identified by the hash of their source path and carry the hash of the file content,
+        so unchanged files are skipped before OCR and modified files replace their previous vectors. The hash
+        recorded in ``pruned_pages`` only applies to documents that are not stored, since stored documents are
+        never pruned (see ``_process_files_with_ocr``).
+        """
+        for file_path, file_metadata in zip(file_paths, metadata, strict=True):
+            file_metadata["content_hash"] = hash_file(file_path)
+
+        ids = [hash_text(file_metadata["source"]) for file_metadata in metadata]
+        stored_ids, _, stored_metadatas, _ = vector_db.get_docs(ids=ids)
+        known_hashes = pruned_pages.content_hashes(ids) if pruned_pages else {}
+        known_hashes.update(
+            (doc_id, stored_metadata.get("content_hash"))
+            for doc_id, stored_metadata in zip(stored_ids, stored_metadatas, strict=True)
+        )
+
+        changed = [
+            (file_path, file_metadata)
+            for doc_id, file_path, file_metadata in zip(ids, file_paths, metadata, strict=True)
+            if known_hashes.get(doc_id) != file_metadata["content_hash"]
+        ]
+        logger.info(f"Skipping {len(file_paths) - len(changed)} files already in the vector database or pruned")
+
+        return [file_path for file_path, _ in changed], [file_metadata for _, file_metadata in changed]
+
+    def build_near_duplicate_index(
+        self, vector_db: VectorDBBase, threshold: float, pending_ids: list[str]
+    ) -> tuple[NearDuplicateIndex, set[str]]:
+        """
+        Build a near-duplicate index seeded with the documents already stored in the vector database.
+
+        Documents about to be replaced are left out, so a modified file is not pruned against its previous version.
+
+        Returns
+        -------
+        tuple[NearDuplicateIndex, set[str]]
+            The index, and the IDs of the pending documents that replace stored documents
+        """
+        near_duplicates = NearDuplicateIndex(threshold)
+        pending = set(pending_ids)
+        replaced_ids = set()
+        stored_ids, stored_documents, stored_metadatas, _ = vector_db.get_docs()
+        for doc_id, document, doc_metadata in zip(stored_ids, stored_documents, stored_metadatas, strict=True):
+            if doc_id in pending:
+                replaced_ids.add(doc_id)
+            else:
+                near_duplicates.seed(document, doc_metadata["document_type"])
+
+        logger.info(f"Seeded the near-duplicate index with {near_duplicates.seeded} stored documents")
+        return near_duplicates, replaced_ids
+
     async def _process_files_with_ocr(
-        self, file_paths: list[str], metadata: list[dict], ocr_engine, batch_size: int
-    ) -> tuple[list[str], list[dict], list[str], list[dict]]:
-        """Helper function to process files with OCR and return successful/unsuccessful results."""
-        unsuccessful_file_paths = []
-        unsuccessful_metadata = []
-        docs = []
-        successful_metadata = []
+        self,
+        file_paths: list[str],
+        metadata: list[dict],
+        ocr_engine,
+        batch_size: int,
+        vector_db: VectorDBBase,
+        near_duplicates: NearDuplicateIndex | None = None,
+        pruned_pages: PrunedPageLog | None = None,
+        replaced_ids: set[str] | None = None,
+        write_size: int = VECTOR_DB_INGEST_WRITE_SIZE,
+    ) -> tuple[int, list[str], list[dict]]:
+        """
+        Process files with OCR and write the documents to the vector database every ``write_size`` documents.
+
+        OCR batches are small to bound concurrent OCR requests, so their documents are buffered until a write
+        spans several insert chunks, which the vector database embeds concurrently. A failure only affects the
+        OCR batch or write it happens in. When a near-duplicate index is given, documents it prunes are not
+        written, but recorded in ``pruned_pages`` so that later runs skip them. Documents in ``replaced_ids`` are
+        never pruned, so their new version always overwrites the stored one.
+
+        Returns
+        -------
+        tuple[int, list[str], list[dict]]
+            Number of documents written, and paths and metadata of the files that failed
+        """
+        unsuccessful_file_paths: list[str] = []
+        unsuccessful_metadata: list[dict] = []
+        written = 0
+        docs: list[str] = []
+        successful_metadata: list[dict] = []
+        successful_paths: list[str] = []
 
         for i in range(0, len(file_paths), batch_size):
             batch_paths = file_paths[i : i + batch_size]
@@ -199,22 +340,54 @@ class Command(BaseCommand):
                 task = ocr_engine.extract_text_from_image_async(image_path=file_path)
                 batch_tasks.append(task)
 
+            pruned_hashes = {}
             try:
                 batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
 
                 for j, result in enumerate(batch_results):
+                    doc_id = hash_text(batch_metadata[j]["source"])
                     if isinstance(result, Exception):
                         logger.warning(f"Failed to process file {batch_paths[j]}: {str(result)}")
                         unsuccessful_file_paths.append(batch_paths[j])
                         unsuccessful_metadata.append(batch_metadata[j])
+                    elif near_duplicates and not near_duplicates.add(
+                        result,
+                        batch_metadata[j]["document_type"],
+                        prune=doc_id not in (replaced_ids or set()),
+                    ):
+                        logger.debug(f"Skipping near-duplicate {batch_paths[j]}")
+                        pruned_hashes[doc_id] = batch_metadata[j]["content_hash"]
                     else:
                         docs.append(result)
                         successful_metadata.append(batch_metadata[j])
+                        successful_paths.append(batch_paths[j])
 
             except Exception as e:
                 logger.error(f"Error processing batch: {str(e)}")
 
-        return docs, successful_metadata, unsuccessful_file_paths, unsuccessful_metadata
+            if pruned_pages and pruned_hashes:
+                await asyncio.to_thread(pruned_pages.record, pruned_hashes)
+
+            is_last_batch = i + batch_size >= len(file_paths)
+            if docs and (len(docs) >= write_size or is_last_batch):
+                if await self._write_documents(vector_db, docs, successful_metadata):
+                    written += len(docs)
+                else:
+                    unsuccessful_file_paths.extend(successful_paths)
+                    unsuccessful_metadata.extend(successful_metadata)
+                docs, successful_metadata, successful_paths = [], [], []
+
+        return written, unsuccessful_file_paths, unsuccessful_metadata
+
+    async def _write_documents(self, vector_db: VectorDBBase, docs: list[str], metadata: list[dict]) -> bool:
+        """Upsert documents under the hash of their source path, returning whether the write succeeded."""
+        try:
+            ids = [hash_text(doc_metadata["source"]) for doc_metadata in metadata]
+            await asyncio.to_thread(vector_db.upsert_docs, docs, metadata, ids)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing {len(docs)} documents to the vector database: {str(e)}")
+            return False
 
     async def populate_vector_db(self, options) -> bool:
         """Populates the vector database with document embeddings asynchronously."""
@@ -230,45 +403,89 @@ class Command(BaseCommand):
                 logger.error("No files found to process")
                 return False
 
-            vector_db = VectorDBFactory.create("chromadb")
-            vector_db.get_or_create_collection()
+            vector_db = VectorDBFactory.create(
+                options["vector_db"],
+                embedding_backend=options["embedding_backend"],
+                embedding_dimensions=options["embedding_dimensions"],
+            )
+            vector_db.get_or_create_collection(name=options["collection_name"])
+
+            pruned_pages = None
+            if options["dedup"]:
+                pruned_pages = PrunedPageLog(
+                    f"{options['vector_db']}/{options['collection_name']}/{options['dedup_threshold']}"
+                )
+
+            file_paths, metadata = self.skip_unchanged_files(vector_db, file_paths, metadata, pruned_pages)
+            if not file_paths:
+                logger.info("Vector database is already up to date")
+                return True
+
+            near_duplicates, replaced_ids = None, None
+            if options["dedup"]:
+                near_duplicates, replaced_ids = self.build_near_duplicate_index(
+                    vector_db,
+                    options["dedup_threshold"],
+                    [hash_text(file_metadata["source"]) for file_metadata in metadata],
+                )
 
             ocr_engine = OCREngineFactory.create(options["ocr_engine"])
             batch_size = options["batch_size"]
+            start_time = time.perf_counter()
 
             # First pass: process all files
-            (
-                docs,
-                successful_metadata,
-                unsuccessful_file_paths,
-                unsuccessful_metadata,
-            ) = await self._process_files_with_ocr(file_paths, metadata, ocr_engine, batch_size)
+            written, unsuccessful_file_paths, unsuccessful_metadata = await self._process_files_with_ocr(
+                file_paths,
+                metadata,
+                ocr_engine,
+                batch_size,
+                vector_db,
+                near_duplicates,
+                pruned_pages,
+                replaced_ids,
+                options["write_size"],
+            )
 
             # Second pass: retry unsuccessful files
             if unsuccessful_file_paths:
                 logger.info(f"Retrying {len(unsuccessful_file_paths)} unsuccessful files...")
 
-                retry_docs, retry_successful_metadata, still_unsuccessful, _ = await self._process_files_with_ocr(
-                    unsuccessful_file_paths, unsuccessful_metadata, ocr_engine, batch_size
+                retry_written, still_unsuccessful, _ = await self._process_files_with_ocr(
+                    unsuccessful_file_paths,
+                    unsuccessful_metadata,
+                    ocr_engine,
+                    batch_size,
+                    vector_db,
+                    near_duplicates,
+                    pruned_pages,
+                    replaced_ids,
+                    options["write_size"],
                 )
-
-                # Add successful retry results
-                docs.extend(retry_docs)
-                successful_metadata.extend(retry_successful_metadata)
+                written += retry_written
 
                 if still_unsuccessful:
                     logger.warning(f"Still unable to process {len(still_unsuccessful)} files after retry")
 
-            if not docs:
-                logger.error("No documents were successfully processed")
-                return False
+            if near_duplicates and near_duplicates.pruned:
+                indexed = near_duplicates.seeded + near_duplicates.kept
+                total = indexed + near_duplicates.pruned
+                logger.info(
+                    f"Pruned {near_duplicates.pruned} near-duplicates: the collection holds {indexed} "
+                    f"documents instead of {total} ({near_duplicates.pruned / total:.1%} smaller index)"
+                )
 
-            if len(docs) != len(successful_metadata):
-                logger.error(f"Mismatch between number of docs ({len(docs)}) and metadata ({len(successful_metadata)})")
+            if not written:
+                if near_duplicates and near_duplicates.pruned:
+                    logger.info("Every new document was a near-duplicate of an indexed document")
+                    return True
+                logger.error("No documents were successfully processed")
                 return False
 
-            vector_db.add_docs(docs, successful_metadata)
-            logger.info(f"Successfully added {len(docs)} documents to vector database")
+            elapsed = time.perf_counter() - start_time
+            logger.info(
+                f"Successfully upserted {written} documents to vector database in {elapsed:.1f}s "
+                f"({written / elapsed:.2f} docs/s)"
+            )
             return True
 
         except Exception as e:
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+
+from src.llm.stub_server import StubServer
+from src.schemas.llm import LLMStubSettings
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class Command(BaseCommand):
+    """Django management command serving a local stand-in for the Anthropic Messages API."""
+
+    help = (
+        "Serves rule-based Messages API responses with a latency model and injectable 429/529 errors, "
+        "for benchmarks and tests that must not call Anthropic"
+    )
+
+    def add_arguments(self, parser):
+        """Add custom arguments for the command."""
+        defaults = LLMStubSettings()
+        parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+        parser.add_argument("--port", type=int, default=8787, help="Port to listen on (default: 8787)")
+        parser.add_argument(
+            "--first-token-latency-ms",
+            type=float,
+            default=defaults.first_token_latency_ms,
+            help=f"Latency before the first output token (default: {defaults.first_token_latency_ms})",
+        )
+        parser.add_argument(
+            "--input-tokens-per-s",
+            type=float,
+            default=defaults.input_tokens_per_s,
+            help=f"Rate at which uncached input tokens delay the first token (default: {defaults.input_tokens_per_s})",
+        )
+        parser.add_argument(
+            "--output-tokens-per-s",
+            type=float,
+            default=defaults.output_tokens_per_s,
+            help=f"Rate of the output tokens (default: {defaults.output_tokens_per_s})",
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=defaults.jitter,
+            help="Random relative variation of each latency, e.g. 0.2 for +/-20%% (default: 0)",
+        )
+        parser.add_argument(
+            "--error-rate-429",
+            type=float,
+            default=defaults.error_rate_429,
+            help="Fraction of requests answered with a 429 rate limit error (default: 0)",
+        )
+        parser.add_argument(
+            "--error-rate-529",
+            type=float,
+            default=defaults.error_rate_529,
+            help="Fraction of requests answered with a 529 overloaded error (default: 0)",
+        )
+        parser.add_argument(
+            "--retry-after-s",
+            type=int,
+            default=defaults.retry_after_s,
+            help=f"Retry-After of the injected errors (default: {defaults.retry_after_s})",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=defaults.seed, help="Seed of the jitter and error draws (default: 0)"
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        settings = LLMStubSettings.model_validate(
+            {field: options[field] for field in LLMStubSettings.model_fields if field in options}
+        )
+        server = StubServer(options["host"], options["port"], settings)
+        self.stdout.write(self.style.SUCCESS(f"LLM stub listening on {server.base_url}"))
+        self.stdout.write(f"Point the application at it with ANTHROPIC_BASE_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping the LLM stub")
+        finally:
+            server.server_close()
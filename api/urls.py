@@ -5,5 +5,6 @@ from . import views
 urlpatterns = [
     path("", views.extract_entities_ui, name="extract_entities_ui"),
     path("extract-entities/", views.extract_entities, name="extract_entities"),
+    path("extract-entities/stream/", views.extract_entities_stream, name="extract_entities_stream"),
     path("healthcheck/", views.health_check, name="health_check"),
 ]
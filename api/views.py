@@ -1,15 +1,21 @@
 import asyncio
+import json
+from collections.abc import AsyncIterator, Iterator
 
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from pydantic import TypeAdapter, ValidationError
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from src.core.orchestrator import extract_entities_impl
+from src.constants import DOCUMENT_FIELDS, LLM_STAGE_SETTINGS
+from src.core.orchestrator import extract_entities_impl, stream_entities_impl
+from src.llm.llm import resolve_llm_settings
 from src.schemas.api import DocumentModelResponse
+from src.schemas.llm import FieldDefinition, LLMStageSettings
 from src.utils.file_processing import get_supported_content_types, get_supported_extensions, validate_and_convert_image
 from src.utils.logging_helper import get_custom_logger
 
@@ -34,13 +40,158 @@ def handle_error(exception: Exception) -> JsonResponse:
     return JsonResponse({"error": str(exception)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def parse_llm_overrides(data) -> dict[str, dict[str, str]]:
+    """
+    Collect the LLM stage settings overridden by form fields named ``<stage>_<setting>``.
+
+    Parameters
+    ----------
+    data : QueryDict
+        Form data of the request
+
+    Returns
+    -------
+    dict[str, dict[str, str]]
+        Mapping of stage names to the overridden settings, validated by ``resolve_llm_settings``
+    """
+    overrides: dict[str, dict[str, str]] = {}
+    for stage in LLM_STAGE_SETTINGS:
+        for setting in LLMStageSettings.model_fields:
+            value = data.get(f"{stage}_{setting}")
+            if value not in (None, ""):
+                overrides.setdefault(stage, {})[setting] = value
+    return overrides
+
+
+def parse_field_selection(data) -> tuple[list[str] | None, list[dict[str, str]] | None]:
+    """
+    Read the fields selected by the ``fields`` and ``custom_fields`` form fields.
+
+    ``fields`` holds names of predefined fields, repeated or comma-separated. ``custom_fields`` holds a JSON list
+    of objects with a ``name`` and a ``description``.
+
+    Parameters
+    ----------
+    data : QueryDict
+        Form data of the request
+
+    Returns
+    -------
+    tuple[list[str] | None, list[dict[str, str]] | None]
+        The selected field names and the custom field definitions, None when not sent
+
+    Raises
+    ------
+    ValueError
+        If a field name is not defined for any document type, or the custom fields are invalid
+    """
+    fields = [name.strip() for value in data.getlist("fields") for name in value.split(",") if name.strip()] or None
+    if fields:
+        known_fields = {field["name"] for type_fields in DOCUMENT_FIELDS.values() for field in type_fields}
+        unknown = sorted(set(fields) - known_fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Send them as custom_fields with a description")
+
+    custom_fields = None
+    if data.get("custom_fields"):
+        try:
+            definitions = TypeAdapter(list[FieldDefinition]).validate_json(data["custom_fields"])
+        except ValidationError as e:
+            raise ValueError(f"Invalid custom_fields: {e}") from e
+        custom_fields = [definition.model_dump() for definition in definitions] or None
+    return fields, custom_fields
+
+
+def read_uploaded_file(file) -> bytes:
+    """
+    Read an uploaded file, checking its name, extension and content type, and convert it for OCR.
+
+    Parameters
+    ----------
+    file : UploadedFile
+        File uploaded with the request
+
+    Returns
+    -------
+    bytes
+        The validated and converted file content
+
+    Raises
+    ------
+    ValueError
+        If the file is not a supported document
+    """
+    supported_extensions = get_supported_extensions()
+    supported_content_types = get_supported_content_types()
+
+    if not file.name:
+        raise ValueError("File must have a name")
+
+    if not file.name.lower().endswith(supported_extensions):
+        raise ValueError(
+            f"Unsupported file extension for {file.name}. Supported formats: {', '.join(supported_extensions)}"
+        )
+
+    if file.content_type not in supported_content_types:
+        raise ValueError(
+            f"Invalid content type for {file.name}: {file.content_type}. "
+            f"Supported types: {', '.join(supported_content_types)}"
+        )
+
+    try:
+        return validate_and_convert_image(file.read(), file.content_type or "", file.name)
+    except Exception as e:
+        file_error = f"File processing error for {file.name}: {str(e)}"
+        logger.error(file_error)
+        raise ValueError(file_error) from e
+
+
+def encode_events(events: AsyncIterator[dict]) -> Iterator[bytes]:
+    """
+    Run the events of a streamed extraction on a private event loop, encoding each one as a line of NDJSON.
+
+    The final ``result`` event is validated like the response of the extraction endpoint. An exception ends the
+    stream with an ``error`` event, since the status code was already sent.
+
+    Parameters
+    ----------
+    events : AsyncIterator[dict]
+        Events yielded by ``stream_entities_impl``
+
+    Returns
+    -------
+    Iterator[bytes]
+        One JSON line per event
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                event = loop.run_until_complete(anext(events))
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                logger.error(f"Error streaming entities: {e}", exc_info=True)
+                yield (json.dumps({"event": "error", "error": str(e)}) + "\n").encode()
+                break
+            if event["event"] == "result":
+                event = {"event": "result", **DocumentModelResponse.model_validate(event).model_dump()}
+            yield (json.dumps(event, default=str) + "\n").encode()
+    finally:
+        loop.run_until_complete(events.aclose())
+        loop.close()
+
+
 @api_view(["POST"])
 @parser_classes([MultiPartParser])
 def extract_entities(request: Request) -> Response:
     """
     Extract entities from uploaded documents (JPG, PNG, or PDF).
 
-    Supports both single file and multiple file uploads.
+    Supports both single file and multiple file uploads. The settings of each LLM stage can be overridden per
+    request with form fields named ``<stage>_<setting>``, e.g. ``validation_model`` or ``extraction_max_tokens``.
+    Only some fields can be extracted with ``fields`` (names of predefined fields) and ``custom_fields`` (a JSON
+    list of ``name`` and ``description`` objects), which also shortens the LLM output.
 
     Parameters
     ----------
@@ -57,44 +208,19 @@ def extract_entities(request: Request) -> Response:
         if not files:
             return Response({"error": "No files provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        supported_extensions = get_supported_extensions()
-        supported_content_types = get_supported_content_types()
-        
+        try:
+            llm_settings = resolve_llm_settings(parse_llm_overrides(request.data))
+            fields, custom_fields = parse_field_selection(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         file_data = []
         
         for file in files:
-            if not file.name:
-                return Response({"error": "File must have a name"}, status=status.HTTP_400_BAD_REQUEST)
-
-            if not file.name.lower().endswith(supported_extensions):
-                return Response(
-                    {
-                        "error": f"Unsupported file extension for {file.name}. "
-                        f"Supported formats: {', '.join(supported_extensions)}"
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if file.content_type not in supported_content_types:
-                supported_types_str = ", ".join(supported_content_types)
-                return Response(
-                    {
-                        "error": f"Invalid content type for {file.name}: {file.content_type}. "
-                        f"Supported types: {supported_types_str}"
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            original_content = file.read()
-
             try:
-                content = validate_and_convert_image(
-                    original_content, file.content_type or "", file.name
-                )
-            except Exception as e:
-                file_error = f"File processing error for {file.name}: {str(e)}"
-                logger.error(file_error)
-                return Response({"error": file_error}, status=status.HTTP_400_BAD_REQUEST)
+                content = read_uploaded_file(file)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
             file_data.append({"content": content, "filename": file.name})
             logger.info(f"Queued for processing: {file.name}")
@@ -102,7 +228,10 @@ def extract_entities(request: Request) -> Response:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            tasks = [extract_entities_impl(file_info["content"]) for file_info in file_data]
+            tasks = [
+                extract_entities_impl(file_info["content"], llm_settings, fields, custom_fields)
+                for file_info in file_data
+            ]
             response_data_list = loop.run_until_complete(asyncio.gather(*tasks))
             
             results = []
@@ -125,6 +254,41 @@ def extract_entities(request: Request) -> Response:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["POST"])
+@parser_classes([MultiPartParser])
+def extract_entities_stream(request: Request) -> Response | StreamingHttpResponse:
+    """
+    Extract entities from one uploaded document, streaming the fields as the LLM produces them.
+
+    Accepts the same form fields as ``extract_entities``. The response is NDJSON: a ``document_type`` event, a
+    ``field`` event per extracted field with the seconds elapsed since OCR, and a final ``result`` event with the
+    validated response and ``time_to_first_field`` (or an ``error`` event).
+
+    Parameters
+    ----------
+    request : Request
+        Django REST framework request object
+
+    Returns
+    -------
+    Response | StreamingHttpResponse
+        The stream of extraction events, or an error response if the request is invalid
+    """
+    files = request.FILES.getlist("file") or request.FILES.getlist("files")  # type: ignore
+    if len(files) != 1:
+        return Response({"error": "Exactly one file must be provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        llm_settings = resolve_llm_settings(parse_llm_overrides(request.data))
+        fields, custom_fields = parse_field_selection(request.data)
+        content = read_uploaded_file(files[0])
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    events = stream_entities_impl(content, llm_settings, fields, custom_fields)
+    return StreamingHttpResponse(encode_events(events), content_type="application/x-ndjson")
+
+
 def extract_entities_ui(request):
     """
     Render the UI for document entity extraction.
@@ -1,5 +1,6 @@
 from pathlib import Path
 
+from src.schemas.llm import LLMStageSettings
 from src.utils.env_helper import EnvHelper
 
 env = EnvHelper.load_env_variables()
@@ -8,9 +9,116 @@ DJANGO_SECRET_KEY = env.django_secrets.secret_key
 OPENAI_API_KEY = env.api_keys.openai
 ELL_STORE_PATH = env.ell.store_path if env.ell.store_path else None
 ANTHROPIC_API_KEY = env.api_keys.anthropic
+# None for the Anthropic API, or the URL of a compatible server such as the local stub (see run_llm_stub)
+ANTHROPIC_BASE_URL = env.llm.anthropic_base_url
 HF_SECRETS = env.api_keys.hf
 EMBEDDING_DEFAULT_MODEL = "text-embedding-3-small"
-EXTRACTION_DEFAULT_MODEL = "claude-4-sonnet-20250514"
+# "openai" embeds through the OpenAI API, "local" runs all-MiniLM-L6-v2 in-process on the CPU
+EMBEDDING_DEFAULT_BACKEND = env.embedding.backend
+# Output dimensions of the OpenAI embeddings, None for the full size of the model
+EMBEDDING_DIMENSIONS = env.embedding.dimensions
+LOCAL_EMBEDDING_BATCH_SIZE = 32
+# None lets ONNX Runtime use one thread per CPU core
+LOCAL_EMBEDDING_NUM_THREADS = None
+EMBEDDING_CACHE_PATH = ROOT_DIR.parent / ".cache" / "embeddings.sqlite3"
+EMBEDDING_CACHE_MAX_ENTRIES = 50_000
+# Concurrent similarity queries arriving within this window (or until the batch is full) share one lookup
+VECTOR_DB_BATCH_WINDOW_MS = 10
+VECTOR_DB_MAX_BATCH_SIZE = 32
+# Bulk inserts are split into chunks embedded concurrently, under a cap on embedding requests per second
+VECTOR_DB_INSERT_CHUNK_SIZE = 100
+VECTOR_DB_INSERT_MAX_WORKERS = 4
+VECTOR_DB_INSERT_REQUESTS_PER_SECOND = 5.0
+# populate_vectordb buffers OCR output up to this many documents per write, so every worker gets a chunk
+VECTOR_DB_INGEST_WRITE_SIZE = VECTOR_DB_INSERT_CHUNK_SIZE * VECTOR_DB_INSERT_MAX_WORKERS
+# Chroma server shared by every worker process when set, embedded store in ./chroma otherwise
+CHROMA_HOST = env.chroma.host
+CHROMA_PORT = env.chroma.port
+# Pooled keep-alive HTTP connections from each process to the Chroma server
+CHROMA_HTTP_MAX_CONNECTIONS = 32
+# HNSW index of new Chroma collections. Confidence scores assume cosine distances; larger M and ef_construction
+# improve recall at the cost of build time and memory, larger ef_search improves recall at the cost of latency
+CHROMA_HNSW_SPACE = "cosine"
+CHROMA_HNSW_M = 16
+CHROMA_HNSW_EF_CONSTRUCTION = 100
+CHROMA_HNSW_EF_SEARCH = 100
+# "chromadb" uses Chroma's persistent HNSW index, "numpy" a brute-force memory-mapped flat index
+VECTOR_DB_DEFAULT_TYPE = "chromadb"
+NUMPY_VECTOR_DB_PATH = ROOT_DIR.parent / "numpy_db"
+# Default folder of the vector snapshots written by export_vectordb
+VECTOR_DB_SNAPSHOT_DIR = ROOT_DIR.parent / "snapshots"
+# New NumPy collections can store "float16" or "int8" codes next to the float32 vectors, scanning the codes
+# and re-ranking the best n_results * QUANTIZATION_RERANK_FACTOR candidates with full precision
+VECTOR_DB_QUANTIZATION = "none"
+QUANTIZATION_RERANK_FACTOR = 4
+QUANTIZATION_BLOCK_ROWS = 16_384
+# "knn" takes the type of the nearest stored document (top-1), "centroid" picks the nearest per-type centroid held
+# in memory
+DOCUMENT_CLASSIFIER = "knn"
+# How often the centroid classifier checks whether the collection changed
+CENTROID_REFRESH_INTERVAL_S = 60.0
+# Near-duplicate pruning at ingest: documents whose MinHash-estimated Jaccard similarity of word shingles
+# with a stored document of the same type reaches the threshold are not indexed
+NEAR_DUPLICATE_THRESHOLD = 0.9
+NEAR_DUPLICATE_NUM_PERM = 128
+NEAR_DUPLICATE_SHINGLE_SIZE = 3
+# Sources and content hashes of the pruned pages, so re-runs skip them before OCR like stored documents
+NEAR_DUPLICATE_PRUNED_PATH = ROOT_DIR.parent / ".cache" / "pruned_pages.sqlite3"
+NEAR_DUPLICATE_PRUNED_MAX_ENTRIES = 1_000_000
+EXTRACTION_DEFAULT_MODEL = env.llm.extraction_model or "claude-4-sonnet-20250514"
+# First tier of the extraction cascade, which escalates to EXTRACTION_DEFAULT_MODEL when its entities fail the checks
+EXTRACTION_FAST_MODEL = env.llm.extraction_fast_model or "claude-3-5-haiku-20241022"
+EXTRACTION_CASCADE_ENABLED = True
+# Validation answers with a single document type name, which a small fast model handles in a few output tokens
+VALIDATION_DEFAULT_MODEL = env.llm.validation_model or "claude-3-5-haiku-20241022"
+# Model and generation settings of each LLM stage, with max_tokens sized to the expected output. Requests can
+# override them (see resolve_llm_settings), e.g. to compare the latency of two models.
+LLM_STAGE_SETTINGS = {
+    "validation": LLMStageSettings(model=VALIDATION_DEFAULT_MODEL, max_tokens=16, temperature=0.0),
+    "extraction_fast": LLMStageSettings(model=EXTRACTION_FAST_MODEL, max_tokens=2000, temperature=0.1),
+    "extraction": LLMStageSettings(model=EXTRACTION_DEFAULT_MODEL, max_tokens=2000, temperature=0.1),
+}
+# Requests may only override a stage's model with one of these, and its max_tokens up to the stage's limit, so
+# clients cannot route calls to other (e.g. more expensive) models or unbounded outputs
+LLM_ALLOWED_MODELS = frozenset(
+    {
+        VALIDATION_DEFAULT_MODEL,
+        EXTRACTION_FAST_MODEL,
+        EXTRACTION_DEFAULT_MODEL,
+        "claude-3-5-haiku-20241022",
+        "claude-4-sonnet-20250514",
+    }
+)
+LLM_MAX_TOKENS_LIMITS = {"validation": 64, "extraction_fast": 8192, "extraction": 8192}
+# Estimated input tokens of document text sent to each LLM call, after compaction. Validation only needs enough
+# text to recognize the type; longer documents keep their beginning and end. Estimates use ~3.5 characters per token.
+LLM_INPUT_TOKEN_BUDGETS = {"validation": 1500, "extraction": 8000}
+LLM_CHARS_PER_TOKEN = 3.5
+# Output tokens budgeted per field when a request extracts a subset of fields, so max_tokens of the extraction
+# call follows the selection; the overhead covers the tool call around the fields
+EXTRACTION_OUTPUT_TOKENS_PER_FIELD = {"list": 300, "dictionary": 300, "value": 100}
+EXTRACTION_OUTPUT_TOKENS_OVERHEAD = 100
+# How often the prompt registry checks whether DOCUMENT_FIELDS changed since its prompts were compiled
+PROMPT_REGISTRY_CHECK_INTERVAL_S = 60.0
+# Extraction prompts compiled for request-scoped field selections, least recently used evicted beyond this many
+PROMPT_REGISTRY_MAX_VARIANTS = 256
+# Responses of the validation and extraction calls, keyed by model, temperature, prompt and normalized document text
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = ROOT_DIR.parent / ".cache" / "llm.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 20_000
+LLM_CACHE_TTL_S = 7 * 24 * 3600
+# LLM calls are traced to ELL_STORE_PATH by a background writer, in transactions of up to LLM_TRACE_BATCH_SIZE rows
+# at least every LLM_TRACE_FLUSH_INTERVAL_S. Calls are sampled at LLM_TRACE_SAMPLE_RATE, and dropped when the
+# queue is full rather than slowing requests down.
+LLM_TRACE_SAMPLE_RATE = env.ell.sample_rate
+LLM_TRACE_BATCH_SIZE = 100
+LLM_TRACE_FLUSH_INTERVAL_S = 1.0
+LLM_TRACE_MAX_QUEUE = 10_000
+# Bulk extraction through the Message Batches API, split into batches of at most this many requests and bytes of
+# serialized requests (the API rejects batches over 256 MB)
+LLM_BATCH_MAX_REQUESTS = 10_000
+LLM_BATCH_MAX_BYTES = 200 * 1024 * 1024
+LLM_BATCH_POLL_INTERVAL_S = 30.0
 
 DOCUMENT_FIELDS = {
     "letter": [
@@ -126,3 +234,22 @@ DOCUMENT_FIELDS = {
         {"name": "article_summary", "description": "Brief summary of the article's main points"},
     ],
 }
+# Fields the fast extraction tier must fill (not null or empty) for its entities to be kept
+EXTRACTION_REQUIRED_FIELDS = {
+    "letter": ["sender_name", "recipient_name"],
+    "specification": ["document_title", "requirements"],
+    "handwritten": ["main_content"],
+    "presentation": ["presentation_title", "key_topics"],
+    "resume": ["candidate_name", "work_experience"],
+    "budget": ["total_budget", "line_items"],
+    "email": ["sender_email", "subject_line"],
+    "scientific_publication": ["title", "authors"],
+    "invoice": ["invoice_number", "vendor_details", "total_amount"],
+    "file_folder": ["folder_title"],
+    "memo": ["to", "from", "subject"],
+    "scientific_report": ["report_title", "key_findings"],
+    "form": ["form_title", "filled_fields"],
+    "advertisement": ["product_name", "company_name"],
+    "questionnaire": ["questions_and_answers"],
+    "news_article": ["headline", "article_summary"],
+}
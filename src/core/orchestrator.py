@@ -1,5 +1,10 @@
+import asyncio
 import time
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from typing import NamedTuple
 
+from pydantic import ValidationError
 from tenacity import (
     retry,
     retry_if_not_exception_type,
@@ -8,16 +13,278 @@ from tenacity import (
     wait_random,
 )
 
-from src.constants import DOCUMENT_FIELDS
-from src.llm.llm import extract_entities_from_doc, extract_valid_json, validate_document_type
-from src.llm.prompts import create_document_type_validation_prompt, create_extraction_prompt
+from src.constants import (
+    DOCUMENT_CLASSIFIER,
+    DOCUMENT_FIELDS,
+    EXTRACTION_CASCADE_ENABLED,
+    EXTRACTION_REQUIRED_FIELDS,
+    LLM_INPUT_TOKEN_BUDGETS,
+    LLM_STAGE_SETTINGS,
+    VECTOR_DB_BATCH_WINDOW_MS,
+    VECTOR_DB_DEFAULT_TYPE,
+    VECTOR_DB_MAX_BATCH_SIZE,
+)
+from src.llm.llm import (
+    extract_entities_from_doc,
+    get_cached_message,
+    stream_entities_from_doc,
+    validate_document_type,
+)
+from src.llm.prompt_registry import get_prompt_registry
+from src.llm.structured_output import validate_entities
+from src.schemas.llm import InputCompaction, LLMResponse, LLMStageSettings
 from src.services.ocr.ocr import OCREngineFactory
+from src.services.vector_db.base import VectorDBBase
+from src.services.vector_db.batching import QueryBatcher
+from src.services.vector_db.centroid_classifier import CentroidClassifier
 from src.services.vector_db.vector_db import VectorDBFactory
 from src.utils.logging_helper import get_custom_logger, log_attempt_retry
+from src.utils.text_compaction import compact_text, estimate_tokens, truncate_to_budget
 
 logger = get_custom_logger(__name__)
 
 
+class ValidatedDocument(NamedTuple):
+    """Text of a document prepared for the LLM calls, with its document type validated by the LLM."""
+
+    user_content: str
+    compacted_content: str
+    llm_texts: dict[str, str]
+    document_type: str
+    confidence: float | None
+    validation_response: LLMResponse
+
+
+@lru_cache(maxsize=1)
+def get_vector_db() -> VectorDBBase:
+    """Return the process-wide vector database, with its default collection opened."""
+    vector_db = VectorDBFactory.create(VECTOR_DB_DEFAULT_TYPE)  # type: ignore[arg-type]
+    vector_db.get_or_create_collection()
+    return vector_db
+
+
+@lru_cache(maxsize=1)
+def get_query_batcher() -> QueryBatcher:
+    """
+    Return the process-wide query batcher in front of the vector database.
+
+    Sharing one batcher (and its collection handle) lets concurrent requests coalesce their
+    similarity queries into a single embedding request and collection query.
+    """
+    return QueryBatcher(get_vector_db(), window_ms=VECTOR_DB_BATCH_WINDOW_MS, max_batch_size=VECTOR_DB_MAX_BATCH_SIZE)
+
+
+@lru_cache(maxsize=1)
+def get_centroid_classifier() -> CentroidClassifier:
+    """Return the process-wide centroid classifier, built lazily from the vector database."""
+    return CentroidClassifier(get_vector_db())
+
+
+async def classify_document(text: str) -> tuple[str, float]:
+    """
+    Predict the document type of a text with the configured classifier.
+
+    Args
+    ----
+        text (str): The text extracted from the document.
+
+    Returns
+    -------
+        tuple[str, float]: The predicted document type and its confidence.
+    """
+    if DOCUMENT_CLASSIFIER == "centroid":
+        return await asyncio.to_thread(get_centroid_classifier().classify, text)
+
+    _, _, metadatas, _, confidence_scores = await get_query_batcher().find_similar_docs_async(text)
+    return metadatas[0]["document_type"], confidence_scores[0]
+
+
+def measure_compaction(
+    raw_text: str, compacted_text: str, llm_texts: dict[str, str], stages_called: list[str]
+) -> InputCompaction:
+    """
+    Estimate the input tokens saved by compacting and truncating the document text of the LLM calls made.
+
+    Args
+    ----
+        raw_text (str): The text extracted by OCR.
+        compacted_text (str): The text after compaction.
+        llm_texts (dict[str, str]): The text sent to each stage budget, after truncation.
+        stages_called (list[str]): The LLM stages called; extraction tiers share the extraction budget.
+
+    Returns
+    -------
+        InputCompaction: The estimated raw, compacted and sent tokens, and the tokens saved over all calls.
+    """
+    raw_tokens = estimate_tokens(raw_text)
+    sent_tokens = {stage: estimate_tokens(text) for stage, text in llm_texts.items()}
+    tokens_saved = sum(
+        raw_tokens - sent_tokens["validation" if stage == "validation" else "extraction"] for stage in stages_called
+    )
+    logger.info(
+        f"Document text compacted from ~{raw_tokens} to ~{estimate_tokens(compacted_text)} tokens, "
+        f"~{tokens_saved} input tokens saved over {len(stages_called)} LLM calls"
+    )
+    return InputCompaction(
+        raw_tokens=raw_tokens,
+        compacted_tokens=estimate_tokens(compacted_text),
+        sent_tokens=sent_tokens,
+        tokens_saved=tokens_saved,
+    )
+
+
+def limit_max_tokens(settings: LLMStageSettings, max_tokens: int | None) -> LLMStageSettings:
+    """Return the settings with ``max_tokens`` capped to an output budget, if any."""
+    if max_tokens is None or max_tokens >= settings.max_tokens:
+        return settings
+    return settings.model_copy(update={"max_tokens": max_tokens})
+
+
+def missing_fields(entities: dict, required_fields: list[str]) -> list[str]:
+    """Return the required fields whose value is null or empty."""
+    return [field for field in required_fields if entities.get(field) in (None, "", [], {})]
+
+
+def extract_entities_with_cascade(
+    document_type: str,
+    user_content: str,
+    tiers: list[tuple[str, LLMStageSettings]],
+    fields: list[str] | None = None,
+    custom_fields: list[dict[str, str]] | None = None,
+) -> tuple[dict, str, dict[str, LLMResponse]]:
+    """
+    Extract the entities of a document, escalating from fast to large models until they pass the checks.
+
+    Every tier but the last keeps its entities only if they match the schema of the document type and fill its
+    ``EXTRACTION_REQUIRED_FIELDS``, so easy documents never reach the large model. The last tier is only held to
+    the schema. When the request selects fields, only those are extracted, and ``max_tokens`` of every tier is
+    capped to the output budget of the selection. Entities of the last tier already in the LLM response cache,
+    such as results of the batch extractor, are returned before calling the faster tiers.
+
+    Args
+    ----
+        document_type (str): The validated document type.
+        user_content (str): The text extracted from the document.
+        tiers (list[tuple[str, LLMStageSettings]]): Stage names and settings of the tiers, fastest first.
+        fields (list[str] | None): Names of the fields of the type to extract (default: all).
+        custom_fields (list[dict[str, str]] | None): Additional field definitions sent by the client.
+
+    Returns
+    -------
+        tuple[dict, str, dict[str, LLMResponse]]: The entities, the stage that produced them, and the response
+            of every tier called.
+    """
+    variant = get_prompt_registry().extraction_variant(document_type, fields, custom_fields)
+    required_fields = [
+        field for field in EXTRACTION_REQUIRED_FIELDS.get(document_type, []) if field in variant.field_names
+    ]
+    user_message = f"<document_text>{user_content}</document_text>"
+    if len(tiers) > 1:
+        stage, settings = tiers[-1]
+        settings = limit_max_tokens(settings, variant.max_tokens)
+        cached_response = get_cached_message(
+            stage,
+            variant.prompt,
+            user_message,
+            settings.model,
+            settings.temperature,
+            settings.max_tokens,
+            variant.tool,
+        )
+        if cached_response is not None:
+            return validate_entities(variant.entities_model, cached_response), stage, {stage: cached_response}
+
+    responses: dict[str, LLMResponse] = {}
+    for i, (stage, settings) in enumerate(tiers):
+        settings = limit_max_tokens(settings, variant.max_tokens)
+        response = extract_entities_from_doc(variant.prompt, user_message, variant.tool, settings, stage)
+        responses[stage] = response
+        if i == len(tiers) - 1:
+            return validate_entities(variant.entities_model, response), stage, responses
+
+        try:
+            entities = validate_entities(variant.entities_model, response)
+        except (AssertionError, ValidationError) as e:
+            logger.info(f"Escalating extraction from '{settings.model}': invalid entities ({e})")
+            continue
+        missing = missing_fields(entities, required_fields)
+        if missing:
+            logger.info(f"Escalating extraction from '{settings.model}': missing {', '.join(missing)}")
+            continue
+        return entities, stage, responses
+
+    raise ValueError("At least one extraction tier is required")
+
+
+async def validate_document(user_content: str, settings: LLMStageSettings) -> ValidatedDocument:
+    """
+    Classify the text of a document, compact it for the LLM calls and validate its type with the LLM.
+
+    Args
+    ----
+        user_content (str): The text extracted from the document.
+        settings (LLMStageSettings): Model and generation settings of the validation stage.
+
+    Returns
+    -------
+        ValidatedDocument: The texts sent to each LLM stage, and the validated document type and confidence.
+
+    Raises
+    ------
+        AssertionError: If the LLM answers with an unknown document type.
+    """
+    document_type, confidence = await classify_document(user_content)
+
+    logger.info(f"Document type: {document_type}, Confidence: {confidence}")
+
+    # The stored embeddings were computed from raw OCR text, so only the LLM calls get the compacted text
+    compacted_content = compact_text(user_content)
+    llm_texts = {
+        stage: truncate_to_budget(compacted_content, budget) for stage, budget in LLM_INPUT_TOKEN_BUDGETS.items()
+    }
+
+    document_type_validation_prompt = get_prompt_registry().validation_prompt(document_type)
+    validation_response = validate_document_type(
+        document_type_validation_prompt,
+        f"<document_text>{llm_texts['validation']}</document_text>",
+        settings,
+    )
+    validated_document_type = validation_response.text.lower().strip()
+    if validated_document_type not in DOCUMENT_FIELDS.keys():
+        raise AssertionError("Document type validation failed")
+    if validated_document_type != document_type:
+        logger.warning(f"Document type validation mismatch: {document_type} != {validated_document_type}")
+        logger.warning(f"Setting confidence to None and document_type to '{validated_document_type}'")
+        confidence = None
+        document_type = validated_document_type
+
+    return ValidatedDocument(user_content, compacted_content, llm_texts, document_type, confidence, validation_response)
+
+
+def build_result(
+    document: ValidatedDocument,
+    entities: dict,
+    extraction_tier: str,
+    extraction_responses: dict[str, LLMResponse],
+    start_time: float,
+) -> dict:
+    """Assemble the response of the extraction endpoints from the validated document and its entities."""
+    responses = {"validation": document.validation_response, **extraction_responses}
+    compaction = measure_compaction(
+        document.user_content, document.compacted_content, document.llm_texts, list(responses)
+    )
+    return {
+        "document_type": document.document_type,
+        "confidence": document.confidence,
+        "entities": entities,
+        "processing_time": round(time.perf_counter() - start_time, 2),
+        "extraction_tier": extraction_tier,
+        "models": {stage: response.model for stage, response in responses.items()},
+        "usage": {stage: response.usage.model_dump() for stage, response in responses.items()},
+        "compaction": compaction.model_dump(),
+    }
+
+
 @retry(
     wait=wait_fixed(3) + wait_random(0, 2),
     reraise=True,
@@ -25,57 +292,107 @@ logger = get_custom_logger(__name__)
     retry=retry_if_not_exception_type(Exception),
     after=log_attempt_retry,
 )
-async def extract_entities_impl(image_input: bytes | str) -> dict:
+async def extract_entities_impl(
+    image_input: bytes | str,
+    llm_settings: dict[str, LLMStageSettings] | None = None,
+    fields: list[str] | None = None,
+    custom_fields: list[dict[str, str]] | None = None,
+) -> dict:
     """
     Implement the endpoint for extraction of entities from the document.
 
     Args
     ----
         image_input (bytes | str): The image input as bytes or base64 strings.
+        llm_settings (dict[str, LLMStageSettings] | None): Model and generation settings of each LLM stage
+            (default: LLM_STAGE_SETTINGS, see resolve_llm_settings for per-request overrides).
+        fields (list[str] | None): Names of the fields to extract, ignoring those the document type does not define
+            (default: all fields of the type).
+        custom_fields (list[dict[str, str]] | None): Additional fields to extract, as ``name`` and ``description``.
 
     Returns
     -------
         dict: The response containing the extracted entities.
     """
+    llm_settings = llm_settings or LLM_STAGE_SETTINGS
     try:
         ocr_engine = OCREngineFactory.create()
         user_content = await ocr_engine.extract_text_from_image_async(image_input=image_input)
         logger.info(f"Extracted text: {user_content[:100]}...")
         start_time = time.perf_counter()
 
-        vector_db = VectorDBFactory.create("chromadb")
-        vector_db.get_or_create_collection()
-
-        _, _, metadatas, _, confidence_scores = vector_db.find_similar_docs(user_content)
-
-        document_type = metadatas[0]["document_type"]
-        confidence = confidence_scores[0]
-
-        logger.info(f"Document type: {document_type}, Confidence: {confidence}")
-
-        document_type_validation_prompt = create_document_type_validation_prompt(document_type)
-        validated_document_type = validate_document_type(
-            document_type_validation_prompt, f"<document_text>{user_content}</document_text>"
-        ).text  # type: ignore
-        validated_document_type = validated_document_type.lower().strip()
-        if validated_document_type not in DOCUMENT_FIELDS.keys():
-            raise AssertionError("Document type validation failed")
-        if validated_document_type != document_type:
-            logger.warning(f"Document type validation mismatch: {document_type} != {validated_document_type}")
-            logger.warning(f"Setting confidence to None and document_type to '{validated_document_type}'")
-            confidence = None
-            document_type = validated_document_type
-
-        system_prompt = create_extraction_prompt(document_type)
-        response = extract_entities_from_doc(system_prompt, f"<document_text>{user_content}</document_text>").text  # type: ignore
-        response_json = extract_valid_json(response)
-        result = {
-            "document_type": document_type,
-            "confidence": confidence,
-            "entities": response_json,
-            "processing_time": round(time.perf_counter() - start_time, 2),
-        }
-        return result
+        document = await validate_document(user_content, llm_settings["validation"])
+
+        tiers = [("extraction", llm_settings["extraction"])]
+        if EXTRACTION_CASCADE_ENABLED:
+            tiers.insert(0, ("extraction_fast", llm_settings["extraction_fast"]))
+        entities, extraction_tier, extraction_responses = extract_entities_with_cascade(
+            document.document_type, document.llm_texts["extraction"], tiers, fields, custom_fields
+        )
+        return build_result(document, entities, extraction_tier, extraction_responses, start_time)
     except Exception as e:
         logger.error(f"Error extracting entities: {e}", exc_info=True)
         raise e
+
+
+async def stream_entities_impl(
+    image_input: bytes | str,
+    llm_settings: dict[str, LLMStageSettings] | None = None,
+    fields: list[str] | None = None,
+    custom_fields: list[dict[str, str]] | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Implement the streaming endpoint, yielding events as the extraction of the document progresses.
+
+    A ``document_type`` event follows the validation of the type, then a ``field`` event is yielded for every
+    field as soon as its value is complete in the LLM output, with the seconds elapsed since OCR. The final
+    ``result`` event holds the validated entities and the rest of the response of ``extract_entities_impl``,
+    plus ``time_to_first_field``. Fields are streamed from one call of the ``extraction`` stage, since the
+    cascade can only keep the entities of the fast tier after checking all of them.
+
+    Args
+    ----
+        image_input (bytes | str): The image input as bytes or base64 strings.
+        llm_settings (dict[str, LLMStageSettings] | None): Model and generation settings of each LLM stage
+            (default: LLM_STAGE_SETTINGS).
+        fields (list[str] | None): Names of the fields to extract (default: all fields of the type).
+        custom_fields (list[dict[str, str]] | None): Additional fields to extract, as ``name`` and ``description``.
+
+    Yields
+    ------
+        dict: The events of the extraction, named by their ``event`` key.
+    """
+    llm_settings = llm_settings or LLM_STAGE_SETTINGS
+    ocr_engine = OCREngineFactory.create()
+    user_content = await ocr_engine.extract_text_from_image_async(image_input=image_input)
+    start_time = time.perf_counter()
+
+    document = await validate_document(user_content, llm_settings["validation"])
+    yield {"event": "document_type", "document_type": document.document_type, "confidence": document.confidence}
+
+    variant = get_prompt_registry().extraction_variant(document.document_type, fields, custom_fields)
+    items = stream_entities_from_doc(
+        variant.prompt,
+        f"<document_text>{document.llm_texts['extraction']}</document_text>",
+        variant.tool,
+        limit_max_tokens(llm_settings["extraction"], variant.max_tokens),
+        "extraction",
+    )
+    response = None
+    time_to_first_field = None
+    # The Anthropic stream is blocking, so each item is awaited from a worker thread
+    while (item := await asyncio.to_thread(next, items, None)) is not None:
+        if isinstance(item, LLMResponse):
+            response = item
+            continue
+        elapsed = round(time.perf_counter() - start_time, 3)
+        if time_to_first_field is None:
+            time_to_first_field = elapsed
+            logger.info(f"First field streamed {elapsed}s after OCR")
+        yield {"event": "field", "name": item[0], "value": item[1], "elapsed": elapsed}
+
+    if response is None:
+        raise AssertionError("Extraction stream ended without a response")
+    entities = validate_entities(variant.entities_model, response)
+    result = build_result(document, entities, "extraction", {"extraction": response}, start_time)
+    yield {"event": "result", **result, "time_to_first_field": time_to_first_field}
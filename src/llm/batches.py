@@ -0,0 +1,211 @@
+import json
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from pydantic import ValidationError
+
+from src.constants import (
+    LLM_BATCH_MAX_BYTES,
+    LLM_BATCH_MAX_REQUESTS,
+    LLM_BATCH_POLL_INTERVAL_S,
+    LLM_CACHE_ENABLED,
+    LLM_INPUT_TOKEN_BUDGETS,
+    LLM_STAGE_SETTINGS,
+)
+from src.llm.cache import get_llm_cache
+from src.llm.llm import client, message_params, parse_message
+from src.llm.prompt_registry import PromptRegistry, get_prompt_registry
+from src.llm.structured_output import validate_entities
+from src.schemas.llm import BatchExtractionResult, LLMStageSettings
+from src.utils.logging_helper import get_custom_logger
+from src.utils.text_compaction import compact_text, truncate_to_budget
+
+logger = get_custom_logger(__name__)
+
+
+class BatchExtractor:
+    """
+    Bulk entity extraction through the Anthropic Message Batches API.
+
+    Each document becomes one request with the same prompt and extraction tool as ``extract_entities_from_doc``,
+    so results are validated by the same entities models. Batches are processed asynchronously by Anthropic
+    (usually within an hour, at half the price of interactive calls), which suits backfills that do not need
+    interactive latency. Valid results are also written to the LLM response cache, so documents submitted later
+    through the API are answered without a new call.
+    """
+
+    def __init__(
+        self,
+        batches: Any = None,
+        prompt_registry: PromptRegistry | None = None,
+        settings: LLMStageSettings | None = None,
+        poll_interval_s: float = LLM_BATCH_POLL_INTERVAL_S,
+        max_requests: int = LLM_BATCH_MAX_REQUESTS,
+        max_bytes: int = LLM_BATCH_MAX_BYTES,
+    ):
+        self.batches = batches if batches is not None else client.messages.batches
+        self.prompt_registry = prompt_registry or get_prompt_registry()
+        self.settings = settings or LLM_STAGE_SETTINGS["extraction"]
+        self.poll_interval_s = poll_interval_s
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+
+    def build_request(self, custom_id: str, document_type: str, text: str) -> dict[str, Any]:
+        """
+        Build the batch request extracting the entities of one document.
+
+        The text is compacted and truncated to the extraction budget as in the interactive path, so valid results
+        answer later interactive calls from the LLM response cache.
+
+        Args:
+            custom_id: Identifier mapping the result back to the document (letters, digits, "-" and "_")
+            document_type: The type of the document
+            text: Text extracted from the document
+
+        Returns
+        -------
+            Request with the ``custom_id`` and the Messages API ``params``
+        """
+        text = truncate_to_budget(compact_text(text), LLM_INPUT_TOKEN_BUDGETS["extraction"])
+        return {
+            "custom_id": custom_id,
+            "params": message_params(
+                self.prompt_registry.extraction_prompt(document_type),
+                f"<document_text>{text}</document_text>",
+                self.settings.model,
+                self.settings.temperature,
+                self.settings.max_tokens,
+                self.prompt_registry.extraction_tool(document_type),
+            ),
+        }
+
+    def submit(self, documents: dict[str, tuple[str, str]]) -> list[str]:
+        """
+        Submit the extraction requests of many documents, split into batches (see ``split_batches``).
+
+        Args:
+            documents: Mapping of custom IDs to the document type and text of each document
+
+        Returns
+        -------
+            IDs of the submitted batches
+        """
+        requests = [
+            self.build_request(custom_id, document_type, text) for custom_id, (document_type, text) in documents.items()
+        ]
+        batch_ids = []
+        for requests_batch in self.split_batches(requests):
+            batch = self.batches.create(requests=requests_batch)
+            logger.info(f"Submitted batch {batch.id} with {len(requests_batch)} requests")
+            batch_ids.append(batch.id)
+        return batch_ids
+
+    def split_batches(self, requests: list[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+        """
+        Split requests into consecutive batches of at most ``max_requests`` requests and ``max_bytes`` bytes.
+
+        Sizes are those of the requests serialized as JSON. A request larger than ``max_bytes`` on its own is sent
+        in a batch of its own, which the API rejects if it exceeds its limit.
+        """
+        batch: list[dict[str, Any]] = []
+        batch_bytes = 0
+        for request in requests:
+            request_bytes = len(json.dumps(request).encode())
+            if batch and (len(batch) >= self.max_requests or batch_bytes + request_bytes > self.max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(request)
+            batch_bytes += request_bytes
+        if batch:
+            yield batch
+
+    def wait(self, batch_ids: list[str], timeout_s: float | None = None) -> None:
+        """
+        Poll the batches until every one of them has ended.
+
+        Raises
+        ------
+            TimeoutError: If the batches have not ended after ``timeout_s`` seconds
+        """
+        start_time = time.monotonic()
+        pending = list(batch_ids)
+        while pending:
+            for batch_id in list(pending):
+                batch = self.batches.retrieve(batch_id)
+                if batch.processing_status == "ended":
+                    logger.info(f"Batch {batch_id} ended: {batch.request_counts}")
+                    pending.remove(batch_id)
+            if not pending:
+                return
+            if timeout_s is not None and time.monotonic() - start_time > timeout_s:
+                raise TimeoutError(f"Batches {', '.join(pending)} did not end within {timeout_s}s")
+            time.sleep(self.poll_interval_s)
+
+    def collect(self, batch_ids: list[str], documents: dict[str, tuple[str, str]]) -> dict[str, BatchExtractionResult]:
+        """
+        Map the results of ended batches back to their documents, validating the extracted entities.
+
+        Args:
+            batch_ids: IDs of the ended batches
+            documents: Mapping of custom IDs to the document type and text submitted for each document
+
+        Returns
+        -------
+            Mapping of custom IDs to their entities or error, in the order of ``documents``
+        """
+        results: dict[str, BatchExtractionResult] = {}
+        for batch_id in batch_ids:
+            for item in self.batches.results(batch_id):
+                document_type, text = documents[item.custom_id]
+                results[item.custom_id] = self._collect_result(item, document_type, text)
+
+        for custom_id, (document_type, _) in documents.items():
+            if custom_id not in results:
+                results[custom_id] = BatchExtractionResult(
+                    custom_id=custom_id, document_type=document_type, error="No result returned"
+                )
+        return {custom_id: results[custom_id] for custom_id in documents}
+
+    def _collect_result(self, item: Any, document_type: str, text: str) -> BatchExtractionResult:
+        """Validate the result of one request, caching it for interactive calls when it is valid."""
+        if item.result.type != "succeeded":
+            error = getattr(item.result, "error", None)
+            return BatchExtractionResult(
+                custom_id=item.custom_id,
+                document_type=document_type,
+                error=f"{item.result.type}: {error}" if error else item.result.type,
+            )
+
+        response = parse_message(item.result.message)
+        try:
+            entities = validate_entities(self.prompt_registry.entities_model(document_type), response)
+        except (AssertionError, ValidationError) as e:
+            return BatchExtractionResult(
+                custom_id=item.custom_id, document_type=document_type, usage=response.usage, error=str(e)
+            )
+
+        if LLM_CACHE_ENABLED and response.stop_reason != "max_tokens":
+            params = self.build_request(item.custom_id, document_type, text)["params"]
+            cache = get_llm_cache()
+            key = cache.key(
+                params["model"],
+                params["temperature"],
+                params["max_tokens"],
+                self.prompt_registry.extraction_prompt(document_type),
+                params["messages"][0]["content"],
+                params["tools"][0],
+            )
+            cache.set("extraction", key, response)
+
+        return BatchExtractionResult(
+            custom_id=item.custom_id, document_type=document_type, entities=entities, usage=response.usage
+        )
+
+    def run(
+        self, documents: dict[str, tuple[str, str]], timeout_s: float | None = None
+    ) -> dict[str, BatchExtractionResult]:
+        """Submit the documents, wait for the batches to end and return the result of every document."""
+        batch_ids = self.submit(documents)
+        self.wait(batch_ids, timeout_s)
+        return self.collect(batch_ids, documents)
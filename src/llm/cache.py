@@ -0,0 +1,111 @@
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from src.constants import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_TTL_S
+from src.schemas.llm import LLMResponse, LLMUsage, SystemPrompt
+from src.utils.hashing import hash_text
+from src.utils.sqlite_cache import CacheStats, SQLiteCache
+
+# LLM calls of the pipeline, each with its own cache table and hit rate
+STAGES = ("validation", "extraction_fast", "extraction")
+
+
+def normalize_user_content(text: str) -> str:
+    """Collapse whitespace, so OCR output differing only in line breaks or spacing shares a cache entry."""
+    return " ".join(text.split())
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses, with one SQLite table per pipeline stage.
+
+    Responses are keyed by model, temperature, a hash of everything that shapes the answer besides the document
+    (system prompt, tool and output limit) and the hash of the normalized user content, so the same text arriving
+    through a re-scan or another file format is answered without calling the model. Entries expire after
+    ``ttl_s`` seconds and the least recently used ones are evicted beyond ``max_entries`` per stage. The tables
+    live in one WAL-mode database shared by every worker process, which also aggregates their hit rates.
+    """
+
+    def __init__(
+        self,
+        cache_path: str | Path = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_s: float | None = LLM_CACHE_TTL_S,
+    ):
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._caches: dict[str, SQLiteCache] = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, stage: str) -> SQLiteCache:
+        """Return the cache table of a stage, created on first use."""
+        with self._lock:
+            if stage not in self._caches:
+                self._caches[stage] = SQLiteCache(
+                    self.cache_path, table=f"llm_{stage}", max_entries=self.max_entries, ttl_s=self.ttl_s
+                )
+            return self._caches[stage]
+
+    @staticmethod
+    def key(
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: SystemPrompt,
+        user_content: str,
+        tool: dict[str, Any] | None = None,
+    ) -> str:
+        """
+        Build the cache key of a call.
+
+        Args:
+            model: Anthropic model name
+            temperature: Sampling temperature
+            max_tokens: Maximum number of output tokens
+            system_prompt: System prompt of the call
+            user_content: Content of the user message
+            tool: Tool definition Claude must call, if any
+
+        Returns
+        -------
+            Key combining the model, temperature, prompt hash and normalized content hash
+        """
+        prompt_hash = hash_text(
+            json.dumps([system_prompt.prefix, system_prompt.suffix, tool, max_tokens], sort_keys=True)
+        )
+        return f"{model}:{temperature}:{prompt_hash}:{hash_text(normalize_user_content(user_content))}"
+
+    def get(self, stage: str, key: str) -> LLMResponse | None:
+        """
+        Return the cached response of a call, or None.
+
+        A cached response reports zero token usage, since answering it did not call the model.
+        """
+        value = self._cache(stage).get(key)
+        if value is None:
+            return None
+        response = LLMResponse.model_validate_json(value)
+        return response.model_copy(update={"usage": LLMUsage(), "cached": True})
+
+    def set(self, stage: str, key: str, response: LLMResponse) -> None:
+        """Store the response of a call."""
+        self._cache(stage).set(key, response.model_dump_json().encode("utf-8"))
+
+    def stats(self, stages: tuple[str, ...] = STAGES) -> dict[str, CacheStats]:
+        """Return the hit/miss counters of each stage, summed over every process, and its number of entries."""
+        return {stage: self._cache(stage).shared_stats() for stage in stages}
+
+    def clear(self, stages: tuple[str, ...] = STAGES) -> None:
+        """Remove the entries and counters of the given stages."""
+        for stage in stages:
+            self._cache(stage).clear()
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide LLM response cache."""
+    return LLMResponseCache()
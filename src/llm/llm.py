@@ -1,82 +1,328 @@
-import ast
-import json
+import time
+from collections.abc import Iterator
+from typing import Any
 
-import ell
 from anthropic import Anthropic
-from ell.lmp.complex import complex
-from ell.types.message import system, user
 
-from src.constants import ANTHROPIC_API_KEY, ELL_STORE_PATH, EXTRACTION_DEFAULT_MODEL
+from src.constants import (
+    ANTHROPIC_API_KEY,
+    ANTHROPIC_BASE_URL,
+    EXTRACTION_DEFAULT_MODEL,
+    LLM_ALLOWED_MODELS,
+    LLM_CACHE_ENABLED,
+    LLM_MAX_TOKENS_LIMITS,
+    LLM_STAGE_SETTINGS,
+)
+from src.llm.cache import get_llm_cache
+from src.llm.tracing import get_llm_tracer
+from src.schemas.llm import LLMResponse, LLMStageSettings, LLMUsage, SystemPrompt
+from src.utils.incremental_json import IncrementalJSONObjectParser
 from src.utils.logging_helper import get_custom_logger
 
 logger = get_custom_logger(__name__)
 
-ell.init(store=ELL_STORE_PATH, verbose=False)
+client = Anthropic(api_key=ANTHROPIC_API_KEY, base_url=ANTHROPIC_BASE_URL)
 
 
-@complex(
-    model=EXTRACTION_DEFAULT_MODEL,
-    temperature=0.1,
-    max_tokens=2000,
-    client=Anthropic(api_key=ANTHROPIC_API_KEY),
-)
-def extract_entities_from_doc(system_prompt: str, user_content: str):
-    """Extract entities from the document."""
-    logger.info(f"Extracting entities from the document using '{EXTRACTION_DEFAULT_MODEL}'")
-    return [
-        system(system_prompt),
-        user(user_content),
-    ]
-
-
-@complex(
-    model=EXTRACTION_DEFAULT_MODEL,
-    temperature=0.1,
-    max_tokens=2000,
-    client=Anthropic(api_key=ANTHROPIC_API_KEY),
-)
-def validate_document_type(system_prompt: str, user_content: str):
-    """Validate document type."""
-    logger.info(f"Validating document type using '{EXTRACTION_DEFAULT_MODEL}'")
-    return [
-        system(system_prompt),
-        user(user_content),
-    ]
+def system_blocks(system_prompt: SystemPrompt) -> list[dict]:
+    """
+    Convert a system prompt into Anthropic system content blocks.
+
+    The prefix is marked with ``cache_control``, so calls sharing it read it from the prompt cache instead of
+    processing it again. Prefixes shorter than the model's minimum cacheable length are processed as usual.
 
+    Args:
+        system_prompt: System prompt split into a cacheable prefix and a variable suffix
+
+    Returns
+    -------
+        List of text blocks for the ``system`` parameter of the Messages API
+    """
+    blocks: list[dict] = [{"type": "text", "text": system_prompt.prefix, "cache_control": {"type": "ephemeral"}}]
+    if system_prompt.suffix:
+        blocks.append({"type": "text", "text": system_prompt.suffix})
+    return blocks
 
-def extract_valid_json(response: str) -> dict:
-    """Extract and return a valid JSON object from a given response string.
+
+def message_params(
+    system_prompt: SystemPrompt,
+    user_content: str,
+    model: str = EXTRACTION_DEFAULT_MODEL,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    tool: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Build the Messages API parameters of a single-turn message with a cached system prompt prefix.
+
+    When a tool is given, Claude is forced to call it, so the response carries the tool input validated against
+    its JSON Schema by the API instead of free text. Tool definitions precede the system prompt in the prompt
+    cache, so they are cached along with the prefix.
 
     Args:
-        response (str): The JSON string to be validated and parsed.
+        system_prompt: System prompt split into a cacheable prefix and a variable suffix
+        user_content: Content of the user message
+        model: Anthropic model name (default: EXTRACTION_DEFAULT_MODEL)
+        temperature: Sampling temperature (default: 0.1)
+        max_tokens: Maximum number of output tokens (default: 2000)
+        tool: Tool definition Claude must call (default: None, for a text response)
 
     Returns
     -------
-        dict[str, str]: The parsed JSON object.
+        Keyword arguments of ``messages.create``, also used as the ``params`` of a Message Batches request
+    """
+    params: dict[str, Any] = {
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "system": system_blocks(system_prompt),
+        "messages": [{"role": "user", "content": user_content}],
+    }
+    if tool:
+        params["tools"] = [tool]
+        params["tool_choice"] = {"type": "tool", "name": tool["name"]}
+    return params
+
+
+def parse_message(message: Any) -> LLMResponse:
+    """
+    Convert a Messages API response into an ``LLMResponse``, logging its token usage.
+
+    Args:
+        message: Message returned by ``messages.create`` or by a succeeded Message Batches request
+
+    Returns
+    -------
+        The response text or tool input, model and token usage, including prompt cache reads and writes
+    """
+    usage = LLMUsage(
+        input_tokens=message.usage.input_tokens,
+        output_tokens=message.usage.output_tokens,
+        cache_creation_input_tokens=message.usage.cache_creation_input_tokens or 0,
+        cache_read_input_tokens=message.usage.cache_read_input_tokens or 0,
+    )
+    logger.info(
+        f"'{message.model}' used {usage.input_tokens} input tokens (cache read {usage.cache_read_input_tokens}, "
+        f"cache write {usage.cache_creation_input_tokens}) and {usage.output_tokens} output tokens"
+    )
+    text = "".join(block.text for block in message.content if block.type == "text")
+    tool_input = next((block.input for block in message.content if block.type == "tool_use"), None)
+    return LLMResponse(
+        text=text, model=message.model, usage=usage, tool_input=tool_input, stop_reason=message.stop_reason
+    )
+
+
+def create_message(
+    system_prompt: SystemPrompt,
+    user_content: str,
+    model: str = EXTRACTION_DEFAULT_MODEL,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    tool: dict[str, Any] | None = None,
+) -> LLMResponse:
+    """
+    Send a single-turn message to Claude with a cached system prompt prefix (see ``message_params``).
+
+    Returns
+    -------
+        The response text or tool input, model and token usage, including prompt cache reads and writes
+    """
+    response = client.messages.create(
+        **message_params(system_prompt, user_content, model, temperature, max_tokens, tool)
+    )
+    return parse_message(response)
+
+
+def get_cached_message(
+    stage: str,
+    system_prompt: SystemPrompt,
+    user_content: str,
+    model: str = EXTRACTION_DEFAULT_MODEL,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    tool: dict[str, Any] | None = None,
+) -> LLMResponse | None:
+    """
+    Look up a message in the persistent LLM response cache without calling Claude (see ``create_cached_message``).
+
+    Cache hits are handed to the LLM tracer like the hits of ``create_cached_message``.
+
+    Returns
+    -------
+        The cached response, with zero token usage, or None if the message is not cached or the cache is disabled
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+    start_time = time.perf_counter()
+    cache = get_llm_cache()
+    cached_response = cache.get(stage, cache.key(model, temperature, max_tokens, system_prompt, user_content, tool))
+    if cached_response is not None:
+        logger.info(f"LLM cache hit for the {stage} stage")
+        get_llm_tracer().record(stage, system_prompt, user_content, cached_response, time.perf_counter() - start_time)
+    return cached_response
+
+
+def create_cached_message(
+    stage: str,
+    system_prompt: SystemPrompt,
+    user_content: str,
+    model: str = EXTRACTION_DEFAULT_MODEL,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    tool: dict[str, Any] | None = None,
+) -> LLMResponse:
+    """
+    Send a message through the persistent LLM response cache (see ``create_message`` for the arguments).
+
+    Responses cut off by ``max_tokens`` are not cached, so they are retried on the next call. Every call,
+    including cache hits, is handed to the LLM tracer.
+
+    Args:
+        stage: Pipeline stage of the call, which has its own cache table and hit rate
+
+    Returns
+    -------
+        The cached response, with zero token usage, or the response of a new call
+    """
+    start_time = time.perf_counter()
+    cached_response = get_cached_message(stage, system_prompt, user_content, model, temperature, max_tokens, tool)
+    if cached_response is not None:
+        return cached_response
+
+    response = create_message(system_prompt, user_content, model, temperature, max_tokens, tool)
+    if LLM_CACHE_ENABLED and response.stop_reason != "max_tokens":
+        cache = get_llm_cache()
+        cache.set(stage, cache.key(model, temperature, max_tokens, system_prompt, user_content, tool), response)
+    get_llm_tracer().record(stage, system_prompt, user_content, response, time.perf_counter() - start_time)
+    return response
+
+
+def stream_message_fields(
+    system_prompt: SystemPrompt,
+    user_content: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    tool: dict[str, Any],
+) -> Iterator[tuple[str, Any] | LLMResponse]:
+    """
+    Stream a message forcing a call of ``tool``, yielding each field of the tool input as soon as it is complete.
+
+    The tool input arrives as partial JSON deltas, which are fed to an incremental parser, so a field is yielded
+    once its value is closed instead of when the whole response is done.
+
+    Returns
+    -------
+        Iterator over the ``(name, value)`` pairs of the tool input, followed by the complete response
+    """
+    parser = IncrementalJSONObjectParser()
+    with client.messages.stream(
+        **message_params(system_prompt, user_content, model, temperature, max_tokens, tool)
+    ) as stream:
+        for event in stream:
+            if event.type == "content_block_delta" and event.delta.type == "input_json_delta":
+                yield from parser.feed(event.delta.partial_json)
+        message = stream.get_final_message()
+    yield parse_message(message)
+
+
+def resolve_llm_settings(overrides: dict[str, dict[str, Any]] | None = None) -> dict[str, LLMStageSettings]:
+    """
+    Merge per-request overrides into the configured settings of each LLM stage.
+
+    Args:
+        overrides: Mapping of stage names to the settings to override, e.g. ``{"validation": {"model": "..."}}``
+
+    Returns
+    -------
+        The settings of every stage
 
     Raises
     ------
-        json.JSONDecodeError: If no valid JSON object can be parsed.
-
-    """
-    # Try JSON first
-    try:
-        return json.loads(response)
-    except json.JSONDecodeError:
-        pass
-
-    # Try finding the brackets
-    try:
-        start = response.find("{")
-        end = response.rfind("}") + 1
-        return json.loads(response[start:end])
-    except json.JSONDecodeError:
-        pass
-
-    # Try ast.literal_eval
-    try:
-        return ast.literal_eval(response)
-    except (ValueError, SyntaxError):
-        pass
-
-    raise AssertionError("String is not a valid dictionary format")
+        ValueError: If a stage or setting is unknown, a value is invalid, the model is not in LLM_ALLOWED_MODELS
+            or max_tokens exceeds the stage's limit in LLM_MAX_TOKENS_LIMITS
+    """
+    settings = dict(LLM_STAGE_SETTINGS)
+    for stage, stage_overrides in (overrides or {}).items():
+        if stage not in settings:
+            raise ValueError(f"Unknown LLM stage: {stage}. Known stages: {', '.join(settings)}")
+        unknown = set(stage_overrides) - set(LLMStageSettings.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown settings for the {stage} stage: {', '.join(sorted(unknown))}")
+        stage_settings = LLMStageSettings.model_validate({**settings[stage].model_dump(), **stage_overrides})
+        if stage_settings.model not in LLM_ALLOWED_MODELS:
+            allowed = ", ".join(sorted(LLM_ALLOWED_MODELS))
+            raise ValueError(f"Model '{stage_settings.model}' is not allowed. Allowed models: {allowed}")
+        if stage_settings.max_tokens > LLM_MAX_TOKENS_LIMITS[stage]:
+            raise ValueError(f"max_tokens of the {stage} stage must be at most {LLM_MAX_TOKENS_LIMITS[stage]}")
+        settings[stage] = stage_settings
+    return settings
+
+
+def extract_entities_from_doc(
+    system_prompt: SystemPrompt,
+    user_content: str,
+    tool: dict[str, Any],
+    settings: LLMStageSettings | None = None,
+    stage: str = "extraction",
+) -> LLMResponse:
+    """Extract entities from the document by forcing a call of the extraction tool."""
+    settings = settings or LLM_STAGE_SETTINGS[stage]
+    logger.info(f"Extracting entities from the document using '{settings.model}'")
+    return create_cached_message(
+        stage, system_prompt, user_content, settings.model, settings.temperature, settings.max_tokens, tool
+    )
+
+
+def stream_entities_from_doc(
+    system_prompt: SystemPrompt,
+    user_content: str,
+    tool: dict[str, Any],
+    settings: LLMStageSettings | None = None,
+    stage: str = "extraction",
+) -> Iterator[tuple[str, Any] | LLMResponse]:
+    """
+    Extract entities from the document like ``extract_entities_from_doc``, yielding each field as it completes.
+
+    Cached responses yield all their fields at once. New responses are cached before the complete response is
+    yielded, so consumers may stop at the last item.
+
+    Returns
+    -------
+        Iterator over the ``(name, value)`` pairs of the extracted entities, followed by the complete response
+    """
+    settings = settings or LLM_STAGE_SETTINGS[stage]
+    logger.info(f"Streaming entities from the document using '{settings.model}'")
+    start_time = time.perf_counter()
+    cache = get_llm_cache() if LLM_CACHE_ENABLED else None
+    if cache is not None:
+        key = cache.key(settings.model, settings.temperature, settings.max_tokens, system_prompt, user_content, tool)
+        cached_response = cache.get(stage, key)
+        if cached_response is not None:
+            logger.info(f"LLM cache hit for the {stage} stage")
+            yield from (cached_response.tool_input or {}).items()
+            get_llm_tracer().record(
+                stage, system_prompt, user_content, cached_response, time.perf_counter() - start_time
+            )
+            yield cached_response
+            return
+
+    for item in stream_message_fields(
+        system_prompt, user_content, settings.model, settings.temperature, settings.max_tokens, tool
+    ):
+        if isinstance(item, LLMResponse):
+            if cache is not None and item.stop_reason != "max_tokens":
+                cache.set(stage, key, item)
+            get_llm_tracer().record(stage, system_prompt, user_content, item, time.perf_counter() - start_time)
+        yield item
+
+
+def validate_document_type(
+    system_prompt: SystemPrompt, user_content: str, settings: LLMStageSettings | None = None
+) -> LLMResponse:
+    """Validate document type."""
+    settings = settings or LLM_STAGE_SETTINGS["validation"]
+    logger.info(f"Validating document type using '{settings.model}'")
+    return create_cached_message(
+        "validation", system_prompt, user_content, settings.model, settings.temperature, settings.max_tokens
+    )
@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+
+from src.constants import DOCUMENT_FIELDS, PROMPT_REGISTRY_CHECK_INTERVAL_S, PROMPT_REGISTRY_MAX_VARIANTS
+from src.llm.prompts import VALIDATION_SUFFIX_TEMPLATE, create_document_type_validation_prompt, create_extraction_prompt
+from src.llm.structured_output import create_entities_model, create_extraction_tool, estimate_output_tokens
+from src.schemas.llm import FieldDefinition, SystemPrompt
+from src.utils.hashing import hash_text
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def fingerprint_fields(document_fields: dict[str, list[dict[str, str]]]) -> str:
+    """Return a stable hash of field definitions, which changes whenever a type or field is edited."""
+    return hash_text(json.dumps(document_fields, sort_keys=True))
+
+
+def select_fields(
+    type_fields: list[dict[str, str]],
+    fields: list[str] | None = None,
+    custom_fields: list[dict[str, str]] | None = None,
+) -> list[dict[str, str]]:
+    """
+    Select the fields of a document type to extract for one request.
+
+    Requested names that the type does not define are ignored, and custom fields are appended unless they
+    redefine a selected field. Custom fields alone replace the fields of the type, as in
+    ``create_extraction_prompt``. A selection matching nothing falls back to every field of the type.
+
+    Args:
+        type_fields: Field definitions of the document type
+        fields: Names of the fields of the type to extract (default: all, or none when custom fields are given)
+        custom_fields: Additional field definitions sent by the client
+
+    Returns
+    -------
+        Definitions of the fields to extract
+    """
+    if fields is None and not custom_fields:
+        return type_fields
+
+    names = set(fields or ())
+    selected = [field for field in type_fields if field["name"] in names]
+    selected_names = {field["name"] for field in selected}
+    selected += [field for field in custom_fields or () if field["name"] not in selected_names]
+    return selected or type_fields
+
+
+class ExtractionVariant(NamedTuple):
+    """Extraction prompt, entities model and tool compiled for one document type and selection of fields."""
+
+    prompt: SystemPrompt
+    entities_model: type[BaseModel]
+    tool: dict[str, Any]
+    field_names: tuple[str, ...]
+    # Output token budget of the selected fields, None when every field of the type is extracted
+    max_tokens: int | None = None
+
+
+class CompiledPrompts(NamedTuple):
+    """Prompts and extraction schemas compiled from one version of the field definitions."""
+
+    validation_prefix: str
+    extraction_prompts: dict[str, SystemPrompt]
+    entities_models: dict[str, type[BaseModel]]
+    extraction_tools: dict[str, dict[str, Any]]
+    variants: OrderedDict[tuple, ExtractionVariant]
+
+
+class PromptRegistry:
+    """
+    Prompts of every document type, compiled once from the field definitions.
+
+    The validation prefix (task and type catalog), and the extraction prompt, entities model and extraction tool
+    of every type are built when the registry is created, so assembling a prompt per request is a dictionary
+    lookup plus, for validation, one substitution of the current selection. They are recompiled when the
+    fingerprint of the field definitions changes, which is checked at most once every ``check_interval_s``
+    seconds.
+
+    Requests extracting a subset of the fields, or custom fields, get variants compiled on first use and kept
+    (least recently used evicted beyond ``max_variants``) until the next recompilation.
+    """
+
+    def __init__(
+        self,
+        document_fields: dict[str, list[dict[str, str]]] = DOCUMENT_FIELDS,
+        check_interval_s: float = PROMPT_REGISTRY_CHECK_INTERVAL_S,
+        max_variants: int = PROMPT_REGISTRY_MAX_VARIANTS,
+    ):
+        self.document_fields = document_fields
+        self.check_interval_s = check_interval_s
+        self.max_variants = max_variants
+        # Everything compiled is swapped in together, so readers never mix two versions
+        self._prompts = CompiledPrompts("", {}, {}, {}, OrderedDict())
+        self._fingerprint = ""
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._variants_lock = threading.Lock()
+        self.compile()
+
+    @property
+    def fingerprint(self) -> str:
+        """Fingerprint of the field definitions the current prompts were compiled from."""
+        return self._fingerprint
+
+    def compile(self) -> None:
+        """Build the validation prefix, and the extraction prompt, entities model and tool of every document type."""
+        start_time = time.perf_counter()
+        fingerprint = fingerprint_fields(self.document_fields)
+        validation_prefix = create_document_type_validation_prompt("", self.document_fields).prefix
+        extraction_prompts = {
+            document_type: create_extraction_prompt(document_type, document_fields=self.document_fields)
+            for document_type in self.document_fields
+        }
+        entities_models = {
+            document_type: create_entities_model(document_type, fields)
+            for document_type, fields in self.document_fields.items()
+        }
+        extraction_tools = {
+            document_type: create_extraction_tool(document_type, entities_model)
+            for document_type, entities_model in entities_models.items()
+        }
+
+        self._prompts = CompiledPrompts(
+            validation_prefix, extraction_prompts, entities_models, extraction_tools, OrderedDict()
+        )
+        self._fingerprint = fingerprint
+        self._last_check = time.monotonic()
+        logger.info(
+            f"Compiled prompts of {len(extraction_prompts)} document types in "
+            f"{(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
+
+    def _recompile_if_changed(self) -> None:
+        """Recompile the prompts when the field definitions changed since the last compilation."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval_s:
+            return
+
+        with self._lock:
+            if now - self._last_check < self.check_interval_s:
+                return
+            if fingerprint_fields(self.document_fields) != self._fingerprint:
+                logger.info("Document field definitions changed, recompiling prompts")
+                self.compile()
+            self._last_check = now
+
+    def validation_prompt(self, current_document_type: str) -> SystemPrompt:
+        """
+        Return the document type validation prompt for the current selection.
+
+        Args:
+            current_document_type: The currently selected document type
+
+        Returns
+        -------
+            The system prompt for document type validation
+        """
+        self._recompile_if_changed()
+        return SystemPrompt(
+            prefix=self._prompts.validation_prefix,
+            suffix=VALIDATION_SUFFIX_TEMPLATE.format(current_document_type=current_document_type),
+        )
+
+    def extraction_prompt(self, document_type: str) -> SystemPrompt:
+        """
+        Return the entity extraction prompt of a document type.
+
+        Args:
+            document_type: The type of document being processed
+
+        Returns
+        -------
+            The system prompt for entity extraction
+
+        Raises
+        ------
+            ValueError: If the document type is not recognized
+        """
+        return self._compiled_for(document_type).extraction_prompts[document_type]
+
+    def entities_model(self, document_type: str) -> type[BaseModel]:
+        """
+        Return the pydantic model validating the extracted entities of a document type.
+
+        Raises
+        ------
+            ValueError: If the document type is not recognized
+        """
+        return self._compiled_for(document_type).entities_models[document_type]
+
+    def extraction_tool(self, document_type: str) -> dict[str, Any]:
+        """
+        Return the tool definition whose input schema is the JSON Schema of a document type's entities.
+
+        Raises
+        ------
+            ValueError: If the document type is not recognized
+        """
+        return self._compiled_for(document_type).extraction_tools[document_type]
+
+    def extraction_variant(
+        self,
+        document_type: str,
+        fields: list[str] | None = None,
+        custom_fields: list[dict[str, str]] | None = None,
+    ) -> ExtractionVariant:
+        """
+        Return the extraction prompt, entities model and tool for a selection of fields of a document type.
+
+        Without a selection, this is the precompiled extraction of every field. Otherwise the variant is compiled
+        from the selected fields (see ``select_fields``) on first use, with an output token budget sized to them.
+
+        Args:
+            document_type: The type of document being processed
+            fields: Names of the fields of the type to extract
+            custom_fields: Additional field definitions sent by the client
+
+        Returns
+        -------
+            The extraction variant of the selection
+
+        Raises
+        ------
+            ValueError: If the document type is not recognized, or a custom field name is invalid or reserved
+        """
+        prompts = self._compiled_for(document_type)
+        for field in custom_fields or ():
+            FieldDefinition.model_validate(field)
+        type_fields = self.document_fields[document_type]
+        selected = select_fields(type_fields, fields, custom_fields)
+        if selected is type_fields:
+            return ExtractionVariant(
+                prompts.extraction_prompts[document_type],
+                prompts.entities_models[document_type],
+                prompts.extraction_tools[document_type],
+                tuple(field["name"] for field in type_fields),
+            )
+
+        key = (document_type, json.dumps(selected, sort_keys=True))
+        with self._variants_lock:
+            variant = prompts.variants.get(key)
+            if variant is not None:
+                prompts.variants.move_to_end(key)
+                return variant
+
+        entities_model = create_entities_model(document_type, selected)
+        variant = ExtractionVariant(
+            create_extraction_prompt(document_type, custom_fields=selected),
+            entities_model,
+            create_extraction_tool(document_type, entities_model),
+            tuple(field["name"] for field in selected),
+            estimate_output_tokens(selected),
+        )
+        with self._variants_lock:
+            prompts.variants[key] = variant
+            while len(prompts.variants) > self.max_variants:
+                prompts.variants.popitem(last=False)
+        logger.info(f"Compiled extraction of {len(selected)} fields of '{document_type}'")
+        return variant
+
+    def _compiled_for(self, document_type: str) -> CompiledPrompts:
+        """Return the current compiled prompts, after checking that they cover a document type."""
+        self._recompile_if_changed()
+        prompts = self._prompts
+        if document_type not in prompts.extraction_prompts:
+            raise ValueError(
+                f"Unknown document type: {document_type}. Known types: {', '.join(prompts.extraction_prompts.keys())}"
+            )
+        return prompts
+
+
+@lru_cache(maxsize=1)
+def get_prompt_registry() -> PromptRegistry:
+    """Return the process-wide prompt registry, compiled on first use."""
+    return PromptRegistry()
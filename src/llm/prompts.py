@@ -1,6 +1,8 @@
 import json
 
 from src.constants import DOCUMENT_FIELDS
+from src.llm.structured_output import EXTRACTION_TOOL_NAME, example_value
+from src.schemas.llm import SystemPrompt
 
 
 # Prompt from https://github.com/allenai/olmocr/blob/main/olmocr/prompts/prompts.py
@@ -27,36 +29,48 @@ def format_field_list(fields: list[dict[str, str]]) -> str:
     return "\n".join(formatted_fields)
 
 
-def create_document_type_validation_prompt(current_document_type: str) -> str:
+VALIDATION_SUFFIX_TEMPLATE = """
+    <context>
+        <current_selection>{current_document_type}</current_selection>
+    </context>"""
+
+
+def format_document_type_catalog(document_fields: dict[str, list[dict[str, str]]] = DOCUMENT_FIELDS) -> str:
+    """Format the document types and their field names for inclusion in the prompt."""
+    type_descriptions = []
+    for doc_type, fields in document_fields.items():
+        fields_summary = ", ".join([f["name"] for f in fields])
+        if len(fields) > 5:
+            fields_summary += f", ... ({len(fields)} fields total)"
+        type_descriptions.append(f"- {doc_type} \n  Fields: {fields_summary} \n\n\n")
+
+    return "\n".join(type_descriptions)
+
+
+def create_document_type_validation_prompt(
+    current_document_type: str, document_fields: dict[str, list[dict[str, str]]] = DOCUMENT_FIELDS
+) -> SystemPrompt:
     """
     Create a prompt to validate if the detected document type is appropriate.
 
+    The task and the catalog of document types are identical for every document, so they form the cacheable
+    prefix. Only the current selection goes in the suffix.
+
     Args:
-        document_text: The actual text content of the document
         current_document_type: The currently selected document type
+        document_fields: Field definitions of every document type (default: DOCUMENT_FIELDS)
 
     Returns
     -------
-        A formatted prompt string for document type validation
+        The system prompt for document type validation
     """
-    # Format confidence scores with their fields
-    type_descriptions = []
-    for doc_type in DOCUMENT_FIELDS:
-        fields_summary = ", ".join([f["name"] for f in DOCUMENT_FIELDS[doc_type]])
-        if len(DOCUMENT_FIELDS[doc_type]) > 5:
-            fields_summary += f", ... ({len(DOCUMENT_FIELDS[doc_type])} fields total)"
-        type_descriptions.append(f"- {doc_type} \n  Fields: {fields_summary} \n\n\n")
-
-    available_document_types = "\n".join(type_descriptions)
+    available_document_types = format_document_type_catalog(document_fields)
 
-    return f"""
+    prefix = f"""
     <document_type_validation_task>
-        <context>
-            <current_selection>{current_document_type}</current_selection>
-            <objective>
-            Validate if the current document type selection is appropriate based on the <available_document_types> and the <document_text> provided by the user.
-            </objective>
-        </context>
+        <objective>
+        Validate if the current document type selection is appropriate based on the <available_document_types> and the <document_text> provided by the user. The current selection is given in the <context> that follows this task.
+        </objective>
 
         <instructions>
             <requirement>Review the document content and the document fields for each document type.</requirement>
@@ -77,18 +91,29 @@ def create_document_type_validation_prompt(current_document_type: str) -> str:
         </response_format>
     </document_type_validation_task>"""  # noqa: E501
 
+    suffix = VALIDATION_SUFFIX_TEMPLATE.format(current_document_type=current_document_type)
+
+    return SystemPrompt(prefix=prefix, suffix=suffix)
 
-def create_extraction_prompt(document_type: str, custom_fields: list[dict[str, str]] | None = None) -> str:
+
+def create_extraction_prompt(
+    document_type: str,
+    custom_fields: list[dict[str, str]] | None = None,
+    document_fields: dict[str, list[dict[str, str]]] = DOCUMENT_FIELDS,
+) -> SystemPrompt:
     """
     Create a structured document extraction prompt with XML tags based on the document type.
 
+    The prompt only depends on the document type and fields, so all of it is the cacheable prefix.
+
     Args:
         document_type: The type of document being processed
         custom_fields: Optional custom fields to extract instead of the default ones
+        document_fields: Field definitions of every document type (default: DOCUMENT_FIELDS)
 
     Returns
     -------
-        A formatted prompt string ready for use with an LLM
+        The system prompt for entity extraction
 
     Raises
     ------
@@ -98,29 +123,20 @@ def create_extraction_prompt(document_type: str, custom_fields: list[dict[str, s
     if custom_fields:
         fields = custom_fields
     else:
-        if document_type not in DOCUMENT_FIELDS:
+        if document_type not in document_fields:
             raise ValueError(
-                f"Unknown document type: {document_type}. Known types: {', '.join(DOCUMENT_FIELDS.keys())}"
+                f"Unknown document type: {document_type}. Known types: {', '.join(document_fields.keys())}"
             )
-        fields = DOCUMENT_FIELDS[document_type]
+        fields = document_fields[document_type]
 
     field_list = format_field_list(fields)
 
-    example_json = {}
-    for field in fields:
-        if "list" in field["description"].lower():
-            example_json[field["name"]] = ["example_item1", "example_item2"]
-        elif "date" in field["description"].lower():
-            example_json[field["name"]] = "2024-01-15"
-        elif "number" in field["name"] or "count" in field["name"] or "amount" in field["name"]:
-            example_json[field["name"]] = 123
-        else:
-            example_json[field["name"]] = "extracted_value"
+    example_json = {field["name"]: example_value(field) for field in fields}
 
     # Format example JSON with proper indentation
     example_json_str = json.dumps(example_json, indent=6).replace("\n", "\n    ")
 
-    return f"""
+    prefix = f"""
     <document_extraction_task>
         <context>
             <document_type>{document_type}</document_type>
@@ -132,19 +148,17 @@ def create_extraction_prompt(document_type: str, custom_fields: list[dict[str, s
         <instructions>
             <requirement>You MUST extract ALL of the following fields from the document text below.</requirement>
             <requirement>Each field MUST be included in your response, even if the value is null or empty.</requirement>
-            <requirement>You MUST return ONLY a valid JSON object with no additional text, explanation, or markdown formatting.</requirement>
+            <requirement>You MUST return the fields by calling the {EXTRACTION_TOOL_NAME} tool, whose input schema gives the type of every field.</requirement>
             <requirement>Extract values exactly as they appear in the document without interpretation unless explicitly required by field type.</requirement>
         </instructions>
 
         <output_format>
             <format_type>JSON</format_type>
             <format_requirements>
-            - Valid JSON syntax only
-            - No markdown code blocks
-            - No explanatory text before or after
-            - No comments within JSON
+            - Input of the {EXTRACTION_TOOL_NAME} tool only
             - Use null for missing values
-            - Maintain original data types (strings as strings, numbers as numbers)
+            - Lists as arrays of strings, counts as integers, amounts as numbers, flags as booleans
+            - Other values as strings, exactly as written in the document
             </format_requirements>
         </output_format>
 
@@ -158,3 +172,5 @@ def create_extraction_prompt(document_type: str, custom_fields: list[dict[str, s
         
 
     </document_extraction_task>"""  # noqa: E501
+
+    return SystemPrompt(prefix=prefix)
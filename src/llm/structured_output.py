@@ -0,0 +1,153 @@
+import re
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+from src.constants import EXTRACTION_OUTPUT_TOKENS_OVERHEAD, EXTRACTION_OUTPUT_TOKENS_PER_FIELD
+from src.schemas.llm import LLMResponse
+
+EXTRACTION_TOOL_NAME = "record_entities"
+# Whole words only, so that e.g. "journalist" does not make a list
+_LIST_RE = re.compile(r"\blist\b")
+_DICTIONARY_RE = re.compile(r"\bdictionary\b")
+_COUNT_RE = re.compile(r"\bnumber of\b")
+_AMOUNT_RE = re.compile(r"\bamount\b")
+
+
+def field_annotation(field: dict[str, str]) -> Any:
+    """
+    Infer the Python type of a field from its name and the whole words of its description.
+
+    Lists become arrays of strings, dictionaries objects of strings, counts integers, flags such as
+    ``signature_present`` booleans and amounts numbers (or strings, to keep a currency). Everything else,
+    including dates and identifiers, is a string holding the value as written in the document.
+
+    Args:
+        field: Field definition with a name and a description
+
+    Returns
+    -------
+        Type annotation of the field value
+    """
+    name = field["name"]
+    description = field["description"].lower()
+    if _LIST_RE.search(description):
+        return list[str]
+    if _DICTIONARY_RE.search(description):
+        return dict[str, str]
+    if name.endswith("_present"):
+        return bool
+    if name.endswith("_count") or _COUNT_RE.search(description):
+        return int
+    if _AMOUNT_RE.search(description):
+        return float | str
+    return str
+
+
+def example_value(field: dict[str, str]) -> Any:
+    """Return a placeholder value of a field for the example response in the extraction prompt."""
+    annotation = field_annotation(field)
+    if annotation == list[str]:
+        return ["example_item1", "example_item2"]
+    if annotation == dict[str, str]:
+        return {"field_name": "filled_value"}
+    if annotation is bool:
+        return True
+    if annotation is int or annotation == float | str:
+        return 123
+    if "date" in field["description"].lower():
+        return "2024-01-15"
+    return "extracted_value"
+
+
+def estimate_output_tokens(fields: list[dict[str, str]]) -> int:
+    """
+    Estimate the output tokens of an extraction call returning the given fields.
+
+    List and dictionary fields are budgeted more tokens than single values (see
+    ``EXTRACTION_OUTPUT_TOKENS_PER_FIELD``), plus a fixed overhead for the tool call.
+
+    Args:
+        fields: Field definitions to extract
+
+    Returns
+    -------
+        Output token budget of the extraction call
+    """
+    tokens = EXTRACTION_OUTPUT_TOKENS_OVERHEAD
+    for field in fields:
+        annotation = field_annotation(field)
+        if annotation == list[str]:
+            tokens += EXTRACTION_OUTPUT_TOKENS_PER_FIELD["list"]
+        elif annotation == dict[str, str]:
+            tokens += EXTRACTION_OUTPUT_TOKENS_PER_FIELD["dictionary"]
+        else:
+            tokens += EXTRACTION_OUTPUT_TOKENS_PER_FIELD["value"]
+    return tokens
+
+
+def create_entities_model(document_type: str, fields: list[dict[str, str]]) -> type[BaseModel]:
+    """
+    Create the pydantic model validating the entities of a document type.
+
+    Every field is required but nullable, matching the prompt asking for all fields with null for missing values.
+    Numbers are accepted for string fields, since identifiers such as invoice numbers are often all digits.
+
+    Args:
+        document_type: The type of document, used to name the model
+        fields: Field definitions of the document type
+
+    Returns
+    -------
+        Pydantic model class of the entities
+    """
+    model_name = "".join(part.capitalize() for part in document_type.split("_")) + "Entities"
+    field_definitions: dict[str, Any] = {
+        field["name"]: (field_annotation(field) | None, Field(description=field["description"])) for field in fields
+    }
+    return create_model(
+        model_name,
+        __config__=ConfigDict(coerce_numbers_to_str=True, extra="ignore"),
+        **field_definitions,
+    )
+
+
+def create_extraction_tool(document_type: str, entities_model: type[BaseModel]) -> dict[str, Any]:
+    """
+    Create the Anthropic tool definition whose input schema is the JSON Schema of the entities model.
+
+    Args:
+        document_type: The type of document
+        entities_model: Pydantic model of the entities (see ``create_entities_model``)
+
+    Returns
+    -------
+        Tool definition for the ``tools`` parameter of the Messages API
+    """
+    return {
+        "name": EXTRACTION_TOOL_NAME,
+        "description": f"Record the fields extracted from a {document_type.replace('_', ' ')} document.",
+        "input_schema": entities_model.model_json_schema(),
+    }
+
+
+def validate_entities(entities_model: type[BaseModel], response: LLMResponse) -> dict[str, Any]:
+    """
+    Validate the tool input of an extraction response against the entities model.
+
+    Args:
+        entities_model: Pydantic model of the entities
+        response: Response of an extraction call made with the extraction tool
+
+    Returns
+    -------
+        The validated entities
+
+    Raises
+    ------
+        AssertionError: If the response does not contain a call of the extraction tool
+        pydantic.ValidationError: If the tool input does not match the schema
+    """
+    if response.tool_input is None:
+        raise AssertionError(f"Extraction response does not call the {EXTRACTION_TOOL_NAME} tool")
+    return entities_model.model_validate(response.tool_input).model_dump()
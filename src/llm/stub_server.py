@@ -0,0 +1,369 @@
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Any, NamedTuple
+
+from src.schemas.llm import LLMStubSettings
+from src.utils.hashing import hash_text
+from src.utils.logging_helper import get_custom_logger
+from src.utils.text_compaction import estimate_tokens
+
+logger = get_custom_logger(__name__)
+
+_CURRENT_SELECTION_RE = re.compile(r"<current_selection>\s*(\w+)\s*</current_selection>")
+_AVAILABLE_TYPES_RE = re.compile(r"<available_document_types>(.*?)</available_document_types>", re.DOTALL)
+_TYPE_NAME_RE = re.compile(r"^\s*- (\w+)", re.MULTILINE)
+_DOCUMENT_TEXT_RE = re.compile(r"<document_text>(.*)</document_text>", re.DOTALL)
+# Characters of streamed output per delta, about two tokens
+_STREAM_CHUNK_CHARS = 8
+
+ERROR_TYPES = {429: "rate_limit_error", 529: "overloaded_error"}
+
+
+class StubResponse(NamedTuple):
+    """Response of the stub to one Messages API request, with the delays of the latency model."""
+
+    status: int
+    body: dict[str, Any]
+    first_token_delay_s: float = 0.0
+    output_delay_s: float = 0.0
+    headers: dict[str, str] | None = None
+
+
+def _text_of(content: Any) -> str:
+    """Join the text of a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def answer_validation(system_text: str, document_text: str) -> str:
+    """
+    Answer a document type validation prompt with rules instead of a model.
+
+    The document type named most often in the text wins, e.g. a text mentioning "invoice" twice is an invoice.
+    Texts naming no type keep the current selection.
+
+    Args:
+        system_text: Text of the validation system prompt, with the type catalog and the current selection
+        document_text: Text of the document
+
+    Returns
+    -------
+        The validated document type
+    """
+    current_selection = _CURRENT_SELECTION_RE.search(system_text)
+    catalog = _AVAILABLE_TYPES_RE.search(system_text)
+    document_types = _TYPE_NAME_RE.findall(catalog.group(1)) if catalog else []
+    lowered = document_text.lower()
+    counts = {document_type: lowered.count(document_type.replace("_", " ")) for document_type in document_types}
+    if counts and max(counts.values()) > 0:
+        return max(counts, key=counts.__getitem__)
+    return current_selection.group(1) if current_selection else "unknown"
+
+
+def _json_type(schema: dict[str, Any]) -> str:
+    """Return the first non-null JSON type of a property schema."""
+    for option in schema.get("anyOf", [schema]):
+        if option.get("type") not in (None, "null"):
+            return option["type"]
+    return "string"
+
+
+def _parse_value(json_type: str, value: str) -> Any:
+    """Convert a value read from the document text to a JSON type."""
+    if json_type == "integer":
+        digits = re.sub(r"[^\d-]", "", value)
+        return int(digits) if digits.strip("-") else None
+    if json_type == "number":
+        number = re.sub(r"[^\d.-]", "", value)
+        try:
+            return float(number)
+        except ValueError:
+            return value
+    if json_type == "boolean":
+        return value.lower() not in ("no", "false", "none", "n/a")
+    if json_type == "array":
+        return [item.strip() for item in value.split(",") if item.strip()]
+    if json_type == "object":
+        return {}
+    return value
+
+
+def _placeholder(json_type: str, name: str) -> Any:
+    """Return a non-empty placeholder value of a JSON type."""
+    return {
+        "integer": 1,
+        "number": 1.0,
+        "boolean": True,
+        "array": [f"stub {name}"],
+        "object": {name: f"stub {name}"},
+    }.get(json_type, f"stub {name}")
+
+
+def answer_extraction(tool: dict[str, Any], document_text: str) -> dict[str, Any]:
+    """
+    Build the input of an extraction tool call with rules instead of a model.
+
+    A field is read from a line of the text labelled with its name, such as ``Invoice number: 42`` for
+    ``invoice_number``, and converted to the type of its schema. Other fields get a placeholder of their type,
+    so every field is filled and the fast extraction tier keeps its entities.
+
+    Args:
+        tool: Tool definition whose input schema lists the fields
+        document_text: Text of the document
+
+    Returns
+    -------
+        The tool input
+    """
+    tool_input: dict[str, Any] = {}
+    for name, schema in tool.get("input_schema", {}).get("properties", {}).items():
+        json_type = _json_type(schema)
+        label = r"[ _]".join(re.escape(part) for part in name.split("_"))
+        match = re.search(rf"(?im)^\W*{label}\s*[:#]\s*(.+?)\s*$", document_text)
+        tool_input[name] = _parse_value(json_type, match.group(1)) if match else _placeholder(json_type, name)
+    return tool_input
+
+
+class MessagesStub:
+    """
+    Rule-based stand-in for the Messages API, with a latency model and injectable errors.
+
+    Requests forcing a tool call get the input built by ``answer_extraction``, and other requests the document
+    type chosen by ``answer_validation``. Token counts are estimated from characters. Like the API, a system
+    block marked with ``cache_control`` is written to the prompt cache on its first request and read from it
+    afterwards. A response takes ``first_token_latency_ms`` plus the input tokens at ``input_tokens_per_s``
+    before its first token, then its output tokens at ``output_tokens_per_s``, scaled by a random factor within
+    ``jitter``. Errors 429 and 529 are returned at their configured rates. Random draws use ``seed``, so a run
+    of requests is reproducible.
+    """
+
+    def __init__(self, settings: LLMStubSettings | None = None):
+        self.settings = settings or LLMStubSettings()
+        self._random = random.Random(self.settings.seed)
+        self._ids = count(1)
+        self._cached_prefixes: set[str] = set()
+        self._lock = threading.Lock()
+
+    def create(self, request: dict[str, Any]) -> StubResponse:
+        """
+        Answer a request of ``POST /v1/messages``.
+
+        Args:
+            request: Body of the request
+
+        Returns
+        -------
+            Status, body, delays and headers of the response
+        """
+        with self._lock:
+            draw = self._random.random()
+            jitter = 1 + self._random.uniform(-self.settings.jitter, self.settings.jitter)
+            message_id = f"msg_stub_{next(self._ids):08d}"
+
+        for status, rate in ((429, self.settings.error_rate_429), (529, self.settings.error_rate_529)):
+            if draw < rate:
+                return self.error(status, "Injected by the LLM stub")
+            draw -= rate
+
+        system_blocks = request.get("system") or []
+        if isinstance(system_blocks, str):
+            system_blocks = [{"type": "text", "text": system_blocks}]
+        system_text = _text_of(system_blocks)
+        user_text = _text_of(request["messages"][-1]["content"])
+        document_match = _DOCUMENT_TEXT_RE.search(user_text)
+        document_text = document_match.group(1) if document_match else user_text
+
+        tool_choice = request.get("tool_choice") or {}
+        tools = {tool["name"]: tool for tool in request.get("tools", [])}
+        tool = tools.get(tool_choice.get("name", "")) if tool_choice.get("type") == "tool" else None
+        if tool is not None:
+            tool_input = answer_extraction(tool, document_text)
+            output_text = json.dumps(tool_input)
+            content: dict[str, Any] = {
+                "type": "tool_use",
+                "id": f"toolu_stub_{message_id[9:]}",
+                "name": tool["name"],
+                "input": tool_input,
+            }
+            stop_reason = "tool_use"
+        else:
+            output_text = answer_validation(system_text, document_text)
+            content = {"type": "text", "text": output_text}
+            stop_reason = "end_turn"
+
+        output_tokens = estimate_tokens(output_text)
+        if output_tokens > request["max_tokens"]:
+            output_tokens = request["max_tokens"]
+            stop_reason = "max_tokens"
+            if content["type"] == "text":
+                content["text"] = output_text[: int(len(output_text) * output_tokens / estimate_tokens(output_text))]
+            else:
+                content["input"] = {}
+
+        usage = self.input_usage(request["model"], system_blocks, request.get("tools", []), user_text)
+        usage["output_tokens"] = output_tokens
+        body = {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": request["model"],
+            "content": [content],
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": usage,
+        }
+        input_tokens = usage["input_tokens"] + usage["cache_creation_input_tokens"]
+        return StubResponse(
+            200,
+            body,
+            first_token_delay_s=jitter
+            * (self.settings.first_token_latency_ms / 1000 + input_tokens / self.settings.input_tokens_per_s),
+            output_delay_s=jitter * output_tokens / self.settings.output_tokens_per_s,
+        )
+
+    def input_usage(
+        self, model: str, system_blocks: list[dict[str, Any]], tools: list[dict[str, Any]], user_text: str
+    ) -> dict:
+        """Estimate the input tokens of a request, split into uncached, cache write and cache read tokens."""
+        usage = {
+            "input_tokens": estimate_tokens(user_text),
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+        # Tools precede the system prompt, so they belong to the cached prefix of the first marked block
+        prefix = json.dumps(tools, sort_keys=True)
+        for block in system_blocks:
+            prefix += block.get("text", "")
+            if block.get("cache_control"):
+                # Each model has its own prompt cache
+                prefix_hash = hash_text(model + prefix)
+                with self._lock:
+                    cached = prefix_hash in self._cached_prefixes
+                    self._cached_prefixes.add(prefix_hash)
+                usage["cache_read_input_tokens" if cached else "cache_creation_input_tokens"] += estimate_tokens(prefix)
+                prefix = ""
+        usage["input_tokens"] += estimate_tokens(prefix)
+        return usage
+
+    def error(self, status: int, message: str) -> StubResponse:
+        """Build an error response in the format of the API, telling clients when to retry a 429 or 529."""
+        return StubResponse(
+            status,
+            {"type": "error", "error": {"type": ERROR_TYPES.get(status, "invalid_request_error"), "message": message}},
+            headers={"retry-after": str(self.settings.retry_after_s)} if status in ERROR_TYPES else None,
+        )
+
+
+def stream_events(response: StubResponse) -> Iterator[tuple[dict[str, Any], float]]:
+    """
+    Split a stub message into the server-sent events of a streamed response.
+
+    Args:
+        response: Successful response of ``MessagesStub.create``
+
+    Returns
+    -------
+        Iterator over the events and the seconds to wait before sending each of them
+    """
+    message = response.body
+    content = message["content"][0]
+    output_text = json.dumps(content["input"]) if content["type"] == "tool_use" else content["text"]
+    chunks = [output_text[i : i + _STREAM_CHUNK_CHARS] for i in range(0, len(output_text), _STREAM_CHUNK_CHARS)]
+    chunk_delay_s = response.output_delay_s / max(len(chunks), 1)
+
+    start = {**message, "content": [], "stop_reason": None, "usage": {**message["usage"], "output_tokens": 1}}
+    yield {"type": "message_start", "message": start}, response.first_token_delay_s
+    if content["type"] == "tool_use":
+        block, delta_type, delta_key = {**content, "input": {}}, "input_json_delta", "partial_json"
+    else:
+        block, delta_type, delta_key = {"type": "text", "text": ""}, "text_delta", "text"
+    yield {"type": "content_block_start", "index": 0, "content_block": block}, 0.0
+    for chunk in chunks:
+        yield (
+            {"type": "content_block_delta", "index": 0, "delta": {"type": delta_type, delta_key: chunk}},
+            chunk_delay_s,
+        )
+    yield {"type": "content_block_stop", "index": 0}, 0.0
+    yield (
+        {
+            "type": "message_delta",
+            "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+            "usage": {"output_tokens": message["usage"]["output_tokens"]},
+        },
+        0.0,
+    )
+    yield {"type": "message_stop"}, 0.0
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler serving ``POST /v1/messages`` from the ``MessagesStub`` of its server."""
+
+    server: "StubServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        """Answer a Messages API request, streamed as server-sent events when it asks for a stream."""
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            self.send_json(self.server.stub.error(400, "Invalid JSON body"))
+            return
+        if self.path.split("?")[0] != "/v1/messages":
+            self.send_json(self.server.stub.error(404, f"Not found: {self.path}"))
+            return
+
+        response = self.server.stub.create(request)
+        if response.status != 200 or not request.get("stream"):
+            time.sleep(response.first_token_delay_s + response.output_delay_s)
+            self.send_json(response)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for event, delay_s in stream_events(response):
+            time.sleep(delay_s)
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.close_connection = True
+
+    def send_json(self, response: StubResponse) -> None:
+        """Send a JSON response with its status and headers."""
+        payload = json.dumps(response.body).encode()
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (response.headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Log requests through the application logger instead of stderr."""
+        logger.debug(format % args)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server of the Messages API stub, answering concurrent requests like the API."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, settings: LLMStubSettings | None = None):
+        super().__init__((host, port), StubRequestHandler)
+        self.stub = MessagesStub(settings)
+
+    @property
+    def base_url(self) -> str:
+        """URL to set as ANTHROPIC_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
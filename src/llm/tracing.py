@@ -0,0 +1,220 @@
+import atexit
+import json
+import queue
+import random
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from src.constants import (
+    ELL_STORE_PATH,
+    LLM_TRACE_BATCH_SIZE,
+    LLM_TRACE_FLUSH_INTERVAL_S,
+    LLM_TRACE_MAX_QUEUE,
+    LLM_TRACE_SAMPLE_RATE,
+)
+from src.schemas.llm import LLMResponse, SystemPrompt
+from src.utils.hashing import hash_text
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+TRACE_DB_NAME = "traces.sqlite3"
+
+
+class Invocation(NamedTuple):
+    """An LLM call queued for tracing, serialized by the writer thread rather than on the request path."""
+
+    created_at: float
+    stage: str
+    system_prompt: SystemPrompt
+    user_content: str
+    response: LLMResponse
+    latency_s: float
+
+
+class LLMTracer:
+    """
+    Tracer recording LLM invocations in a SQLite database without blocking the calls it traces.
+
+    ``record`` samples the invocation and puts it on a bounded in-memory queue, which a background thread drains
+    in transactions of up to ``batch_size`` rows, at least every ``flush_interval_s`` seconds. System prompts are
+    stored once per hash. When the queue is full, invocations are dropped and counted instead of slowing the
+    request down. Tracing is off when ``store_path`` is None.
+    """
+
+    def __init__(
+        self,
+        store_path: str | Path | None,
+        sample_rate: float = 1.0,
+        batch_size: int = LLM_TRACE_BATCH_SIZE,
+        flush_interval_s: float = LLM_TRACE_FLUSH_INTERVAL_S,
+        max_queue: int = LLM_TRACE_MAX_QUEUE,
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Trace sample rate must be between 0 and 1, got {sample_rate}")
+
+        self.path = Path(store_path) / TRACE_DB_NAME if store_path else None
+        self.sample_rate = sample_rate if self.path else 0.0
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue[Invocation | None] = queue.Queue(maxsize=max_queue)
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any invocation is traced."""
+        return self.sample_rate > 0
+
+    def record(
+        self,
+        stage: str,
+        system_prompt: SystemPrompt,
+        user_content: str,
+        response: LLMResponse,
+        latency_s: float,
+    ) -> None:
+        """
+        Queue an LLM invocation for tracing, if sampled.
+
+        Args:
+            stage: Pipeline stage of the call
+            system_prompt: System prompt of the call
+            user_content: Content of the user message
+            response: Response of the call, which may come from the LLM response cache
+            latency_s: Seconds the call took
+        """
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return
+
+        if self._writer is None:
+            self._start_writer()
+        try:
+            self._queue.put_nowait(Invocation(time.time(), stage, system_prompt, user_content, response, latency_s))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every queued invocation is written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write the queued invocations and stop the writer thread."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def _start_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="llm-tracer", daemon=True)
+                self._writer.start()
+
+    def _run_writer(self) -> None:
+        """Drain the queue into the database in batches, until the ``None`` sentinel of ``close``."""
+        assert self.path is not None
+        connection = self.connect(self.path)
+        try:
+            stopped = False
+            while not stopped:
+                batch: list[Invocation] = []
+                item = self._queue.get()
+                deadline = time.monotonic() + self.flush_interval_s
+                while True:
+                    if item is None:
+                        stopped = True
+                        self._queue.task_done()
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+
+                try:
+                    self.write(connection, batch)
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not write {len(batch)} LLM traces: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def connect(path: Path) -> sqlite3.Connection:
+        """Open the trace database, creating its tables on first use."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS prompts (hash TEXT PRIMARY KEY, prefix TEXT, suffix TEXT)")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS invocations ("
+            "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, stage TEXT NOT NULL, model TEXT NOT NULL, "
+            "prompt_hash TEXT NOT NULL, user_content TEXT NOT NULL, response TEXT NOT NULL, stop_reason TEXT, "
+            "cached INTEGER NOT NULL, latency_ms REAL NOT NULL, usage TEXT NOT NULL)"
+        )
+        connection.commit()
+        return connection
+
+    def write(self, connection: sqlite3.Connection, batch: list[Invocation]) -> None:
+        """
+        Write a batch of invocations in one transaction.
+
+        Args:
+            connection: Connection to the trace database (see ``connect``)
+            batch: Invocations to write
+        """
+        prompts: dict[str, SystemPrompt] = {}
+        rows: list[tuple[Any, ...]] = []
+        for invocation in batch:
+            prompt_hash = hash_text(invocation.system_prompt.prefix + invocation.system_prompt.suffix)
+            prompts[prompt_hash] = invocation.system_prompt
+            response = invocation.response
+            rows.append(
+                (
+                    invocation.created_at,
+                    invocation.stage,
+                    response.model,
+                    prompt_hash,
+                    invocation.user_content,
+                    json.dumps(response.tool_input) if response.tool_input is not None else response.text,
+                    response.stop_reason,
+                    int(response.cached),
+                    invocation.latency_s * 1000,
+                    response.usage.model_dump_json(),
+                )
+            )
+
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO prompts (hash, prefix, suffix) VALUES (?, ?, ?)",
+                [(prompt_hash, prompt.prefix, prompt.suffix) for prompt_hash, prompt in prompts.items()],
+            )
+            connection.executemany(
+                "INSERT INTO invocations (created_at, stage, model, prompt_hash, user_content, response, "
+                "stop_reason, cached, latency_ms, usage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.written += len(rows)
+
+
+@lru_cache(maxsize=1)
+def get_llm_tracer() -> LLMTracer:
+    """Return the process-wide LLM tracer, writing to ELL_STORE_PATH, whose queue is flushed at exit."""
+    tracer = LLMTracer(ELL_STORE_PATH, LLM_TRACE_SAMPLE_RATE)
+    if tracer.enabled:
+        logger.info(f"Tracing {tracer.sample_rate:.0%} of the LLM calls to {tracer.path}")
+        atexit.register(tracer.close)
+    return tracer
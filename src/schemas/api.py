@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from src.schemas.llm import InputCompaction, LLMUsage
+
 
 class DocumentModelResponse(BaseModel):
     """Response model for the document extraction endpoint."""
@@ -8,3 +10,8 @@ class DocumentModelResponse(BaseModel):
     confidence: float | None
     entities: dict
     processing_time: float
+    extraction_tier: str | None = None
+    models: dict[str, str] | None = None
+    usage: dict[str, LLMUsage] | None = None
+    compaction: InputCompaction | None = None
+    time_to_first_field: float | None = None
@@ -20,6 +20,30 @@ class EllVariables(BaseModel):
     """Model representing the Ell variables."""
 
     store_path: str
+    sample_rate: float = 1.0
+
+
+class EmbeddingVariables(BaseModel):
+    """Model representing the embedding variables."""
+
+    backend: str
+    dimensions: int | None = None
+
+
+class ChromaVariables(BaseModel):
+    """Model representing the Chroma server variables."""
+
+    host: str | None = None
+    port: int = 8000
+
+
+class LLMVariables(BaseModel):
+    """Model representing the LLM model overrides of each pipeline stage."""
+
+    validation_model: str | None = None
+    extraction_fast_model: str | None = None
+    extraction_model: str | None = None
+    anthropic_base_url: str | None = None
 
 
 class DjangoSecrets(BaseModel):
@@ -34,3 +58,6 @@ class EnvVariables(BaseModel):
     api_keys: APIKeys
     django_secrets: DjangoSecrets
     ell: EllVariables
+    embedding: EmbeddingVariables
+    chroma: ChromaVariables
+    llm: LLMVariables
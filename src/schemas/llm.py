@@ -0,0 +1,85 @@
+from typing import Any
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class SystemPrompt(BaseModel):
+    """Model representing a system prompt split into a cacheable prefix and a small variable suffix."""
+
+    prefix: str
+    suffix: str = ""
+
+
+class FieldDefinition(BaseModel):
+    """Model representing a field to extract, as defined in DOCUMENT_FIELDS or sent by a client."""
+
+    name: str = Field(pattern=r"^[A-Za-z][A-Za-z0-9_]*$", max_length=64)
+    description: str = Field(min_length=1, max_length=500)
+
+    @field_validator("name")
+    @classmethod
+    def name_is_not_reserved(cls, name: str) -> str:
+        """Reject names that pydantic reserves or that shadow attributes of the entities model built from them."""
+        if name.startswith("model_") or hasattr(BaseModel, name):
+            raise ValueError(f"'{name}' is reserved and cannot be used as a field name")
+        return name
+
+
+class LLMStageSettings(BaseModel):
+    """Model representing the model and generation settings of one LLM stage of the pipeline."""
+
+    model: str
+    max_tokens: int = Field(gt=0)
+    temperature: float = Field(ge=0.0, le=1.0)
+
+
+class LLMUsage(BaseModel):
+    """Model representing the token usage of an LLM call, including prompt cache reads and writes."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+
+class LLMResponse(BaseModel):
+    """Model representing the response of an LLM call."""
+
+    text: str
+    model: str
+    usage: LLMUsage
+    tool_input: dict[str, Any] | None = None
+    stop_reason: str | None = None
+    cached: bool = False
+
+
+class LLMStubSettings(BaseModel):
+    """Model representing the latency, token rate and error injection of the local Messages API stub."""
+
+    first_token_latency_ms: float = Field(default=400.0, ge=0.0)
+    input_tokens_per_s: float = Field(default=50_000.0, gt=0.0)
+    output_tokens_per_s: float = Field(default=80.0, gt=0.0)
+    jitter: float = Field(default=0.0, ge=0.0, le=1.0)
+    error_rate_429: float = Field(default=0.0, ge=0.0, le=1.0)
+    error_rate_529: float = Field(default=0.0, ge=0.0, le=1.0)
+    retry_after_s: int = Field(default=1, ge=0)
+    seed: int = 0
+
+
+class InputCompaction(BaseModel):
+    """Model representing the estimated tokens of a document text before and after compaction and truncation."""
+
+    raw_tokens: int
+    compacted_tokens: int
+    sent_tokens: dict[str, int]
+    tokens_saved: int
+
+
+class BatchExtractionResult(BaseModel):
+    """Model representing the outcome of one document of a Message Batches extraction."""
+
+    custom_id: str
+    document_type: str
+    entities: dict[str, Any] | None = None
+    usage: LLMUsage | None = None
+    error: str | None = None
@@ -0,0 +1,40 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from src.constants import CHROMA_HNSW_EF_CONSTRUCTION, CHROMA_HNSW_EF_SEARCH, CHROMA_HNSW_M, CHROMA_HNSW_SPACE
+
+
+class HNSWSettings(BaseModel):
+    """Model representing the HNSW index parameters of a ChromaDB collection."""
+
+    space: Literal["cosine", "l2", "ip"] = CHROMA_HNSW_SPACE  # type: ignore[assignment]
+    m: int = Field(default=CHROMA_HNSW_M, ge=2)
+    ef_construction: int = Field(default=CHROMA_HNSW_EF_CONSTRUCTION, ge=1)
+    ef_search: int = Field(default=CHROMA_HNSW_EF_SEARCH, ge=1)
+
+    def to_metadata(self) -> dict[str, str | int]:
+        """Return the settings as ChromaDB collection metadata keys."""
+        return {
+            "hnsw:space": self.space,
+            "hnsw:M": self.m,
+            "hnsw:construction_ef": self.ef_construction,
+            "hnsw:search_ef": self.ef_search,
+        }
+
+    @classmethod
+    def from_metadata(cls, metadata: dict) -> "HNSWSettings":
+        """Read the settings recorded in ChromaDB collection metadata, using the defaults for missing keys."""
+        keys = {
+            "space": "hnsw:space",
+            "m": "hnsw:M",
+            "ef_construction": "hnsw:construction_ef",
+            "ef_search": "hnsw:search_ef",
+        }
+        return cls(**{field: metadata[key] for field, key in keys.items() if key in metadata})
+
+    @classmethod
+    def from_configuration(cls, configuration: dict) -> "HNSWSettings":
+        """Read the "hnsw" section of a ChromaDB collection configuration, using the defaults for missing keys."""
+        keys = {"space": "space", "m": "max_neighbors", "ef_construction": "ef_construction", "ef_search": "ef_search"}
+        return cls(**{field: configuration[key] for field, key in keys.items() if key in configuration})
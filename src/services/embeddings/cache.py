@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from src.constants import EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_PATH
+from src.utils.hashing import hash_text
+from src.utils.logging_helper import get_custom_logger
+from src.utils.sqlite_cache import CacheStats, SQLiteCache
+
+logger = get_custom_logger(__name__)
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Embedding function wrapper that persists vectors in a SQLite cache.
+
+    Vectors are keyed by (model, dimensions, text hash) and stored as float32 blobs, so identical texts
+    are only embedded once across requests, re-ingestions and processes. The wrapper reports the name and
+    configuration of the wrapped function, so it identifies the same vector space as the uncached function.
+    """
+
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction,
+        cache_path: str | Path = EMBEDDING_CACHE_PATH,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+    ):
+        self._embedding_function = embedding_function
+        self._cache = SQLiteCache(cache_path, table="embeddings", max_entries=max_entries)
+
+        config = self._embedding_function.get_config()
+        config = config if isinstance(config, dict) else {}
+        self.model_name = config.get("model_name") or self._embedding_function.name()
+        self.dimensions = config.get("dimensions")
+
+    def _cache_key(self, text: str) -> str:
+        return f"{self.model_name}:{self.dimensions}:{hash_text(text)}"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        """
+        Embed documents, only calling the wrapped function for texts not found in the cache.
+
+        Args:
+            input: Documents to generate embeddings for
+
+        Returns
+        -------
+            Embeddings for the documents, in input order
+        """
+        keys = [self._cache_key(text) for text in input]
+        cached = self._cache.get_many(keys)
+
+        missing = {key: text for key, text in zip(keys, input, strict=True) if key not in cached}
+        if missing:
+            embeddings = self._embedding_function(list(missing.values()))
+            new_entries = {
+                key: np.asarray(embedding, dtype=np.float32).tobytes()
+                for key, embedding in zip(missing.keys(), embeddings, strict=True)
+            }
+            self._cache.set_many(new_entries)
+            cached.update(new_entries)
+
+        logger.debug(f"Embedding cache: {len(input) - len(missing)}/{len(input)} hits")
+        return [np.frombuffer(cached[key], dtype=np.float32) for key in keys]
+
+    def stats(self) -> CacheStats:
+        """Return the hit/miss counters and size of the cache."""
+        return self._cache.stats()
+
+    def name(self) -> str:  # type: ignore[override]
+        """Return the name of the wrapped embedding function."""
+        return self._embedding_function.name()
+
+    def get_config(self) -> dict[str, Any]:
+        """Return the configuration of the wrapped embedding function."""
+        return self._embedding_function.get_config()
+
+    def build_from_config(self, config: dict[str, Any]) -> EmbeddingFunction:  # type: ignore[override]
+        """Build the wrapped embedding function from a serialized config."""
+        return self._embedding_function.build_from_config(config)
+
+    def default_space(self) -> Any:
+        """Return the default distance space of the wrapped embedding function."""
+        return self._embedding_function.default_space()
+
+    def supported_spaces(self) -> Any:
+        """Return the distance spaces supported by the wrapped embedding function."""
+        return self._embedding_function.supported_spaces()
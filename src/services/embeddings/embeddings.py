@@ -0,0 +1,96 @@
+from typing import Literal
+
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+from src.constants import EMBEDDING_DEFAULT_BACKEND, EMBEDDING_DEFAULT_MODEL, EMBEDDING_DIMENSIONS, OPENAI_API_KEY
+from src.services.embeddings.cache import CachedEmbeddingFunction
+from src.services.embeddings.local_impl import LocalEmbeddingFunction
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class EmbeddingFunctionFactory:
+    """Factory class for creating embedding function instances."""
+
+    @staticmethod
+    def create(
+        backend: Literal["openai", "local"] = EMBEDDING_DEFAULT_BACKEND,  # type: ignore[assignment]
+        cache: bool = True,
+        dimensions: int | None = EMBEDDING_DIMENSIONS,
+    ) -> EmbeddingFunction:
+        """
+        Create an embedding function for the specified backend.
+
+        Args:
+            backend: Embedding backend ("openai" for the OpenAI API or "local" for in-process ONNX MiniLM)
+            cache: Whether to wrap the embedding function with the persistent embedding cache (default: True)
+            dimensions: Output dimensions of the embeddings (default: full size of the model). Only supported
+                by the "openai" backend, whose models are trained to be shortened.
+
+        Returns
+        -------
+            Instance of the requested embedding function
+
+        Raises
+        ------
+            ValueError: If an unsupported backend is specified, or dimensions are requested from the local backend
+        """
+        if backend == "openai":
+            embedding_function = OpenAIEmbeddingFunction(
+                api_key=OPENAI_API_KEY, model_name=EMBEDDING_DEFAULT_MODEL, dimensions=dimensions
+            )
+        elif backend == "local":
+            if dimensions is not None:
+                raise ValueError("The local embedding backend does not support custom dimensions")
+            embedding_function = LocalEmbeddingFunction()
+        else:
+            raise ValueError(f"Unsupported embedding backend: {backend}")
+
+        return CachedEmbeddingFunction(embedding_function) if cache else embedding_function
+
+
+def get_embedder_id(embedding_function: EmbeddingFunction) -> str:
+    """
+    Return an identifier of the vector space produced by an embedding function.
+
+    The identifier combines the embedding function name, model and output dimensions, so two functions
+    with the same identifier produce comparable vectors.
+
+    Args:
+        embedding_function: The embedding function to describe
+
+    Returns
+    -------
+        Identifier such as "openai:text-embedding-3-small:default"
+    """
+    config = embedding_function.get_config()
+    config = config if isinstance(config, dict) else {}
+    name = embedding_function.name()
+    model = config.get("model_name") or name
+    dimensions = config.get("dimensions") or "default"
+    return f"{name}:{model}:{dimensions}"
+
+
+def validate_embedder(collection_name: str, collection_metadata: dict | None, embedder_id: str) -> None:
+    """
+    Ensure a collection is queried and extended with the embedder that built it.
+
+    Args:
+        collection_name: Name of the collection, used in error messages
+        collection_metadata: Metadata stored with the collection
+        embedder_id: Identifier of the embedding function about to be used (see ``get_embedder_id``)
+
+    Raises
+    ------
+        ValueError: If the collection records a different embedder
+    """
+    recorded = (collection_metadata or {}).get("embedder")
+    if recorded is None:
+        logger.warning(f"Collection '{collection_name}' does not record its embedder, assuming '{embedder_id}'")
+    elif recorded != embedder_id:
+        raise ValueError(
+            f"Collection '{collection_name}' was built with embedder '{recorded}', "
+            f"but '{embedder_id}' was requested. Use a different collection or rebuild it."
+        )
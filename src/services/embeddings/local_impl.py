@@ -0,0 +1,58 @@
+import os
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, Embeddings
+from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+
+from src.constants import LOCAL_EMBEDDING_BATCH_SIZE, LOCAL_EMBEDDING_NUM_THREADS
+
+
+class LocalEmbeddingFunction(ONNXMiniLM_L6_V2):
+    """
+    CPU-local embedding function running all-MiniLM-L6-v2 in-process with ONNX Runtime.
+
+    The model is downloaded once to the Chroma model cache and then runs without any network access.
+    Documents are embedded in batches of ``batch_size`` and ONNX Runtime is limited to ``num_threads``
+    intra-op threads, so several workers on one host do not oversubscribe the CPU.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+        num_threads: int | None = LOCAL_EMBEDDING_NUM_THREADS,
+    ):
+        super().__init__(preferred_providers=["CPUExecutionProvider"])
+        self.batch_size = batch_size
+        self.num_threads = num_threads or os.cpu_count() or 1
+
+    @cached_property
+    def model(self) -> Any:
+        """ONNX Runtime session pinned to the CPU provider and the configured thread count."""
+        session_options = self.ort.SessionOptions()
+        session_options.log_severity_level = 3
+        session_options.graph_optimization_level = self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session_options.intra_op_num_threads = self.num_threads
+        session_options.inter_op_num_threads = 1
+
+        return self.ort.InferenceSession(
+            os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx"),
+            providers=self._preferred_providers,
+            sess_options=session_options,
+        )
+
+    def __call__(self, input: Documents) -> Embeddings:
+        """
+        Embed documents locally in batches.
+
+        Args:
+            input: Documents to generate embeddings for
+
+        Returns
+        -------
+            Embeddings for the documents
+        """
+        self._download_model_if_not_exists()
+        embeddings = self._forward(list(input), batch_size=self.batch_size)
+        return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
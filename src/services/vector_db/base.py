@@ -1,12 +1,114 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
+import numpy as np
 from chromadb import Collection
 
+from src.utils.hashing import hash_text
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector or the rows of a matrix, leaving zero rows untouched."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def sigmoid_confidence(distances: list[float]) -> list[float]:
+    """
+    Transform cosine distances into confidence scores.
+
+    Uses a sigmoid with midpoint at 1.0 and steepness factor of 5, giving a smooth transition from
+    high similarity (near 0) to low similarity (near 1).
+
+    Args:
+        distances: List of cosine distances (0-2 range)
+
+    Returns
+    -------
+        List of similarity scores between 0 and 1, rounded to 3 decimal places
+    """
+    return [round(float(1 / (1 + np.exp(5 * (d - 1)))), 3) for d in distances]
+
+
+def prepare_records(
+    documents: list[str],
+    metadatas: list[dict[str, str]],
+    ids: list[str] | None = None,
+    embeddings: np.ndarray | None = None,
+) -> tuple[list[str], list[str], list[dict[str, str]], np.ndarray | None]:
+    """
+    Validate records and derive content-hashed IDs when none are provided.
+
+    Documents with identical text map to the same ID, so only the first occurrence is kept.
+
+    Args:
+        documents: list of text documents
+        metadatas: list of metadata dicts, one per document
+        ids: list of unique identifiers (SHA-256 of the document text if not provided)
+        embeddings: Precomputed embeddings, one row per document (optional)
+
+    Returns
+    -------
+        tuple of (ids, documents, metadatas, embeddings)
+
+    Raises
+    ------
+        ValueError: If the lengths of the records do not match
+    """
+    if len(metadatas) != len(documents):
+        raise ValueError("Length of metadatas must match length of documents")
+    if ids is not None and len(ids) != len(documents):
+        raise ValueError("Length of ids must match length of documents")
+    if embeddings is not None and len(embeddings) != len(documents):
+        raise ValueError("Length of embeddings must match length of documents")
+
+    if ids is not None:
+        return ids, documents, metadatas, embeddings
+
+    rows: dict[str, int] = {}
+    for row, document in enumerate(documents):
+        rows.setdefault(hash_text(document), row)
+
+    if len(rows) < len(documents):
+        logger.info(f"Skipping {len(documents) - len(rows)} documents with duplicate text")
+
+    kept = list(rows.values())
+    return (
+        list(rows.keys()),
+        [documents[row] for row in kept],
+        [metadatas[row] for row in kept],
+        None if embeddings is None else np.asarray(embeddings)[kept],
+    )
+
 
 class VectorDBBase(ABC):
     """Abstract base class for vector database implementations."""
 
+    # Set by get_or_create_collection
+    collection: Any = None
+    embedding_function: Any = None
+    # Embedder of the configured backend, used by collections opened without an embedding function
+    _default_embedding_function: Any = None
+
+    def resolve_embedding_function(self, embedding_function: Any = None) -> Any:
+        """Return the embedding function that ``get_or_create_collection`` uses for ``embedding_function``."""
+        return embedding_function if embedding_function is not None else self._default_embedding_function
+
+    def collection_metadata(self) -> dict[str, Any]:
+        """
+        Return the metadata of the open collection, including the embedder and index parameters it was built with.
+
+        Raises
+        ------
+            ValueError: If no collection is selected
+        """
+        if self.collection is None:
+            raise ValueError("Collection not initialized. Call get_or_create_collection() first.")
+        return dict(self.collection.metadata or {})
+
     @abstractmethod
     def get_or_create_collection(
         self, name: str = "idu_collection", embedding_function: Any = None, metadata: dict[str, Any] | None = None
@@ -33,7 +135,63 @@ class VectorDBBase(ABC):
         Args:
             documents: list of text documents to add
             metadatas: list of metadata dicts (e.g., {"document_type": "folder_name"})
-            ids: list of unique identifiers (auto-generated if not provided)
+            ids: list of unique identifiers (derived from the document text if not provided)
+        """
+        pass
+
+    @abstractmethod
+    def upsert_docs(
+        self,
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        ids: list[str] | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        """
+        Insert documents, replacing any existing document with the same ID.
+
+        Args:
+            documents: list of text documents to insert or update
+            metadatas: list of metadata dicts (e.g., {"document_type": "folder_name"})
+            ids: list of unique identifiers (derived from the document text if not provided)
+            embeddings: Precomputed embeddings, one row per document (embedded on write if not provided)
+        """
+        pass
+
+    @abstractmethod
+    def get_docs(
+        self, ids: list[str] | None = None, include_embeddings: bool = False
+    ) -> tuple[list[str], list[str], list[dict[str, Any]], np.ndarray | None]:
+        """
+        Get documents stored in the collection.
+
+        Args:
+            ids: Identifiers of the documents to get (default: every document). Unknown IDs are ignored.
+            include_embeddings: Whether to also return the stored embeddings (default: False)
+
+        Returns
+        -------
+            tuple of (ids, documents, metadatas, embeddings), where embeddings is a float32 matrix
+            with one row per document, or None if not requested
+        """
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the number of documents stored in the collection."""
+        pass
+
+    @abstractmethod
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed texts with the embedding function of the collection.
+
+        Args:
+            texts: Texts to embed
+
+        Returns
+        -------
+            float32 matrix with one row per text
         """
         pass
 
@@ -53,3 +211,22 @@ class VectorDBBase(ABC):
             tuple of (ids, documents, metadatas, distances, confidence)
         """
         pass
+
+    def find_similar_docs_batch(
+        self, query_texts: list[str], n_results: int = 10
+    ) -> list[tuple[list[str], list[str], list[dict[str, Any]], list[float], list[float]]]:
+        """
+        Find similar documents for several queries at once.
+
+        Backends able to answer multiple queries in a single round-trip should override this method;
+        the default implementation runs one query per text.
+
+        Args:
+            query_texts: Texts to search for similar documents
+            n_results: Number of results to return per query (default: 10)
+
+        Returns
+        -------
+            list of (ids, documents, metadatas, distances, confidence) tuples, one per query text
+        """
+        return [self.find_similar_docs(query_text, n_results) for query_text in query_texts]
@@ -0,0 +1,136 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.constants import VECTOR_DB_BATCH_WINDOW_MS, VECTOR_DB_MAX_BATCH_SIZE
+from src.services.vector_db.base import VectorDBBase
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+SimilarDocsResult = tuple[list[str], list[str], list[dict[str, Any]], list[float], list[float]]
+
+
+@dataclass
+class _PendingQuery:
+    """A similarity query waiting to be dispatched in a batch."""
+
+    query_text: str
+    n_results: int
+    future: Future = field(default_factory=Future)
+
+
+class QueryBatcher:
+    """
+    Coalesce concurrent similarity queries into batched vector database lookups.
+
+    Queries submitted from any thread or event loop are collected by a background worker for up to
+    ``window_ms`` milliseconds (or until ``max_batch_size`` queries are waiting) and answered with a
+    single ``find_similar_docs_batch`` call. Results are fanned back out to each caller's future.
+    """
+
+    def __init__(
+        self,
+        vector_db: VectorDBBase,
+        window_ms: float = VECTOR_DB_BATCH_WINDOW_MS,
+        max_batch_size: int = VECTOR_DB_MAX_BATCH_SIZE,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.vector_db = vector_db
+        self.window = max(window_ms, 0) / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: queue.Queue[_PendingQuery] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, query_text: str, n_results: int = 10) -> Future:
+        """
+        Queue a similarity query and return a future resolved with its result.
+
+        Args:
+            query_text: Text to search for similar documents
+            n_results: Number of results to return (default: 10)
+
+        Returns
+        -------
+            Future resolving to (ids, documents, metadatas, distances, confidence)
+        """
+        self._ensure_worker()
+        pending = _PendingQuery(query_text=query_text, n_results=n_results)
+        self._queue.put(pending)
+        return pending.future
+
+    def find_similar_docs(self, query_text: str, n_results: int = 10) -> SimilarDocsResult:
+        """Find similar documents, blocking until the batch containing the query is answered."""
+        return self.submit(query_text, n_results).result()
+
+    async def find_similar_docs_async(self, query_text: str, n_results: int = 10) -> SimilarDocsResult:
+        """Find similar documents without blocking the running event loop."""
+        return await asyncio.wrap_future(self.submit(query_text, n_results))
+
+    def _ensure_worker(self) -> None:
+        """Start the background dispatch thread on first use."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="vector-db-query-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self) -> list[_PendingQuery]:
+        """Block for the first query, then gather more until the window closes or the batch is full."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        """Worker loop dispatching batches forever."""
+        while True:
+            self._dispatch(self._collect_batch())
+
+    def _dispatch(self, batch: list[_PendingQuery]) -> None:
+        """Answer a batch of queries, grouping them by ``n_results`` and de-duplicating identical texts."""
+        groups: dict[int, dict[str, list[_PendingQuery]]] = {}
+        for pending in batch:
+            groups.setdefault(pending.n_results, {}).setdefault(pending.query_text, []).append(pending)
+
+        for n_results, by_text in groups.items():
+            query_texts = list(by_text.keys())
+            try:
+                if len(query_texts) == 1:
+                    results = [self.vector_db.find_similar_docs(query_texts[0], n_results)]
+                else:
+                    results = self.vector_db.find_similar_docs_batch(query_texts, n_results)
+                if len(results) != len(query_texts):
+                    raise ValueError(f"Expected {len(query_texts)} query results, got {len(results)}")
+            except Exception as e:
+                logger.error(f"Batched similarity query failed: {e}")
+                for waiting in by_text.values():
+                    for pending in waiting:
+                        if not pending.future.done():
+                            pending.future.set_exception(e)
+                continue
+
+            logger.debug(f"Answered {sum(map(len, by_text.values()))} queries with {len(query_texts)} unique texts")
+            for query_text, result in zip(query_texts, results, strict=True):
+                for pending in by_text[query_text]:
+                    # Callers may have been cancelled while the batch was in flight
+                    if not pending.future.done():
+                        pending.future.set_result(result)
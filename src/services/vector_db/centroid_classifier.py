@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+from src.constants import CENTROID_REFRESH_INTERVAL_S
+from src.services.vector_db.base import VectorDBBase, l2_normalize, sigmoid_confidence
+from src.utils.hashing import hash_text
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def content_version(ids: list[str], metadatas: list[dict[str, Any]]) -> str:
+    """
+    Return a hash of the stored IDs and metadata, which changes when documents are added, removed or replaced.
+
+    Replaced documents are detected through their metadata, which carries the ``document_type`` and, for
+    ingested files, the ``content_hash`` of the file.
+    """
+    records = sorted(zip(ids, metadatas, strict=True), key=lambda record: record[0])
+    return hash_text(json.dumps(records, sort_keys=True))
+
+
+class CentroidClassifier:
+    """
+    Classify documents by their nearest ``document_type`` centroid.
+
+    The stored embeddings of each document type are averaged into an L2-normalized centroid, and the
+    centroids are kept in memory as a single matrix. Classifying a text is then one matrix-vector product
+    against a handful of centroids instead of a top-k query over the whole collection.
+
+    The centroids are rebuilt when the stored IDs or metadata change (see ``content_version``), which is
+    checked at most once every ``refresh_interval_s`` seconds.
+    """
+
+    def __init__(self, vector_db: VectorDBBase, refresh_interval_s: float = CENTROID_REFRESH_INTERVAL_S):
+        self.vector_db = vector_db
+        self.refresh_interval_s = refresh_interval_s
+        # Labels and centroid matrix are swapped in together, so readers never see a half-refreshed index
+        self._index: tuple[list[str], np.ndarray] | None = None
+        self._version: str | None = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def labels(self) -> list[str]:
+        """Document types known to the classifier, in centroid row order."""
+        return list(self._index[0]) if self._index else []
+
+    def refresh(self) -> None:
+        """
+        Rebuild the centroids from the embeddings stored in the vector database.
+
+        Raises
+        ------
+            ValueError: If the collection is empty
+        """
+        start_time = time.perf_counter()
+        ids, _, metadatas, embeddings = self.vector_db.get_docs(include_embeddings=True)
+        if not ids or embeddings is None:
+            raise ValueError("Cannot build centroids from an empty collection")
+
+        document_types = np.array([metadata["document_type"] for metadata in metadatas])
+        unit_embeddings = l2_normalize(embeddings)
+        labels = sorted(set(document_types))
+        centroids = np.stack([unit_embeddings[document_types == label].mean(axis=0) for label in labels])
+
+        self._index = (labels, l2_normalize(centroids).astype(np.float32))
+        self._version = content_version(ids, metadatas)
+        logger.info(
+            f"Built {len(labels)} centroids from {len(ids)} documents in {time.perf_counter() - start_time:.2f}s"
+        )
+
+    def _refresh_if_stale(self) -> None:
+        """Rebuild the centroids on first use, or when the collection content changed since the last build."""
+        now = time.monotonic()
+        if self._index is not None and now - self._last_check < self.refresh_interval_s:
+            return
+
+        with self._lock:
+            if self._index is not None and now - self._last_check < self.refresh_interval_s:
+                return
+            if self._index is None:
+                self.refresh()
+            else:
+                ids, _, metadatas, _ = self.vector_db.get_docs()
+                if content_version(ids, metadatas) != self._version:
+                    self.refresh()
+            self._last_check = now
+
+    def classify_embedding(self, embedding: np.ndarray) -> tuple[str, float]:
+        """
+        Classify an embedding by its most similar centroid.
+
+        Args:
+            embedding: Embedding of the document text
+
+        Returns
+        -------
+            tuple of (document_type, confidence)
+        """
+        self._refresh_if_stale()
+        labels, centroids = self._index  # type: ignore[misc]
+        similarities = centroids @ l2_normalize(np.asarray(embedding, dtype=np.float32))
+        best = int(np.argmax(similarities))
+        # Same sigmoid over the cosine distance as the kNN path, so confidences stay comparable
+        return labels[best], sigmoid_confidence([1 - float(similarities[best])])[0]
+
+    def classify(self, text: str) -> tuple[str, float]:
+        """
+        Classify a document text by its most similar centroid.
+
+        Args:
+            text: Text of the document
+
+        Returns
+        -------
+            tuple of (document_type, confidence)
+        """
+        return self.classify_embedding(self.vector_db.embed_texts([text])[0])
@@ -1,33 +1,94 @@
-import uuid
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
 
 import chromadb
 import numpy as np
 from chromadb import Collection
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+from chromadb.api import ClientAPI
+from chromadb.config import Settings
+from tenacity import retry, stop_after_attempt, wait_exponential
 
-from src.constants import EMBEDDING_DEFAULT_MODEL, OPENAI_API_KEY
-from src.services.vector_db.base import VectorDBBase
+from src.constants import (
+    CHROMA_HOST,
+    CHROMA_HTTP_MAX_CONNECTIONS,
+    CHROMA_PORT,
+    EMBEDDING_DEFAULT_BACKEND,
+    EMBEDDING_DIMENSIONS,
+    VECTOR_DB_INSERT_CHUNK_SIZE,
+    VECTOR_DB_INSERT_MAX_WORKERS,
+    VECTOR_DB_INSERT_REQUESTS_PER_SECOND,
+)
+from src.schemas.vector_db import HNSWSettings
+from src.services.embeddings.embeddings import EmbeddingFunctionFactory, get_embedder_id, validate_embedder
+from src.services.vector_db.base import VectorDBBase, prepare_records, sigmoid_confidence
+from src.utils.logging_helper import get_custom_logger, log_attempt_retry
+from src.utils.rate_limiter import RateLimiter
+
+logger = get_custom_logger(__name__)
+
+
+@lru_cache
+def get_chroma_client(host: str | None = CHROMA_HOST, port: int = CHROMA_PORT) -> ClientAPI:
+    """
+    Return the Chroma client shared by every ChromaVectorDB of the process.
+
+    With a host, the client talks to a Chroma server over a pool of keep-alive HTTP connections, so worker
+    processes share the server's index instead of each loading the embedded store and contending for its
+    SQLite lock. Without one, the embedded store in ``./chroma`` is opened.
+
+    Args:
+        host: Hostname of the Chroma server (default: CHROMA_HOST, None for the embedded store)
+        port: HTTP port of the Chroma server (default: CHROMA_PORT)
+
+    Returns
+    -------
+        Chroma client
+    """
+    if host:
+        logger.info(f"Connecting to the Chroma server at {host}:{port}")
+        settings = Settings(
+            chroma_http_max_connections=CHROMA_HTTP_MAX_CONNECTIONS,
+            chroma_http_max_keepalive_connections=CHROMA_HTTP_MAX_CONNECTIONS,
+        )
+        return chromadb.HttpClient(host=host, port=port, settings=settings)
+    return chromadb.PersistentClient()
 
 
 class ChromaVectorDB(VectorDBBase):
     """ChromaDB implementation of the VectorDBBase interface."""
 
-    def __init__(self):
-        self.client = chromadb.PersistentClient()
+    def __init__(
+        self,
+        embedding_backend: str = EMBEDDING_DEFAULT_BACKEND,
+        embedding_dimensions: int | None = EMBEDDING_DIMENSIONS,
+        insert_chunk_size: int = VECTOR_DB_INSERT_CHUNK_SIZE,
+        insert_max_workers: int = VECTOR_DB_INSERT_MAX_WORKERS,
+        insert_requests_per_second: float = VECTOR_DB_INSERT_REQUESTS_PER_SECOND,
+        hnsw: HNSWSettings | None = None,
+        host: str | None = CHROMA_HOST,
+        port: int = CHROMA_PORT,
+    ):
+        self.client = get_chroma_client(host, port)
         self.collection = None
-        self._default_embedding_function = OpenAIEmbeddingFunction(
-            api_key=OPENAI_API_KEY, model_name=EMBEDDING_DEFAULT_MODEL
+        self.embedding_function = None
+        self._default_embedding_function = EmbeddingFunctionFactory.create(
+            embedding_backend,  # type: ignore[arg-type]
+            dimensions=embedding_dimensions,
         )
+        self.insert_chunk_size = insert_chunk_size
+        self.insert_max_workers = insert_max_workers
+        self._rate_limiter = RateLimiter(insert_requests_per_second)
+        self.hnsw = hnsw or HNSWSettings()
 
     def __apply_sigmoid(self, distances: list[float]) -> list[float]:
         """
         Apply sigmoid transformation to normalize distances into confidence scores.
 
-        Transforms cosine distances into confidence scores using a sigmoid function
-        with midpoint at 1.0 and steepness factor of 5. This creates a smooth
-        transition from high similarity (near 0) to low similarity (near 1).
+        See ``sigmoid_confidence`` for the transformation.
 
         Args:
             distances: List of cosine distances (0-2 range)
@@ -40,7 +101,7 @@ class ChromaVectorDB(VectorDBBase):
             >>> __apply_sigmoid([0.5, 1.0, 1.5])
             [0.993, 0.5, 0.007]  # High, medium, low similarity
         """
-        return [round(float(1 / (1 + np.exp(5 * (d - 1)))), 3) for d in distances]
+        return sigmoid_confidence(distances)
 
     def get_or_create_collection(
         self,
@@ -53,27 +114,89 @@ class ChromaVectorDB(VectorDBBase):
 
         Args:
             name: Name of the collection (default: "idu_collection")
-            embedding_function: Embedding function (default: OpenAI text-embedding-3-small)
-            metadata: Collection metadata (default: includes description and creation time)
+            embedding_function: Embedding function (default: cached embedder of the configured backend)
+            metadata: Collection metadata (default: includes description and creation time). The embedder
+                that builds the collection is always recorded under the "embedder" key, and the HNSW
+                settings under the "hnsw:*" keys.
 
         Returns
         -------
             ChromaDB collection object
+
+        Raises
+        ------
+            ValueError: If the existing collection was built with a different embedder
         """
-        if embedding_function is None:
-            embedding_function = self._default_embedding_function
+        embedding_function = self.resolve_embedding_function(embedding_function)
 
         if metadata is None:
             metadata = {"description": "Collection for IDU API", "created": str(datetime.now())}
 
-        self.collection = self.client.get_or_create_collection(
+        embedder_id = get_embedder_id(embedding_function)
+        collection = self.client.get_or_create_collection(
             name=name,
             embedding_function=embedding_function,
-            metadata=metadata,
+            metadata={**metadata, **self.hnsw.to_metadata(), "embedder": embedder_id},
         )
+        validate_embedder(name, collection.metadata, embedder_id)
+        self._sync_hnsw_settings(name, collection)
 
+        self.collection = collection
+        self.embedding_function = embedding_function
         return self.collection
 
+    def _sync_hnsw_settings(self, name: str, collection: Collection) -> None:
+        """
+        Reconcile the HNSW settings of an existing collection with the configured ones.
+
+        The distance space and construction parameters are fixed when a collection is created, so mismatches
+        are only reported. The search parameter is persisted in the collection configuration, and takes effect
+        the next time its index is loaded. Chroma replaces the whole metadata on ``modify`` and rejects the
+        "hnsw:space" key, so the "hnsw:*" metadata keeps the creation values (see ``collection_metadata``).
+        """
+        configuration = (collection.configuration_json or {}).get("hnsw") or {}
+        # Collections created before the space was configured use Chroma's L2 default
+        space = configuration.get("space", "l2")
+        if space != self.hnsw.space:
+            logger.warning(
+                f"Collection '{name}' uses the {space} distance, not {self.hnsw.space}. Confidence scores "
+                "assume cosine distances, so rebuild the collection to change it."
+            )
+        for key, value in (("max_neighbors", self.hnsw.m), ("ef_construction", self.hnsw.ef_construction)):
+            if key in configuration and configuration[key] != value:
+                logger.warning(f"Collection '{name}' was built with {key}={configuration[key]}, keeping it")
+
+        if configuration.get("ef_search") != self.hnsw.ef_search:
+            logger.info(f"Setting ef_search={self.hnsw.ef_search} on collection '{name}'")
+            collection.modify(configuration={"hnsw": {"ef_search": self.hnsw.ef_search}})
+
+    def collection_metadata(self) -> dict[str, Any]:
+        """
+        Return the metadata of the open collection, with the "hnsw:*" keys read from its configuration.
+
+        Raises
+        ------
+            ValueError: If no collection is selected
+        """
+        metadata = super().collection_metadata()
+        configuration = (self.collection.configuration_json or {}).get("hnsw")  # type: ignore[union-attr]
+        if configuration:
+            metadata.update(HNSWSettings.from_configuration(configuration).to_metadata())
+        return metadata
+
+    def _prepare_records(
+        self,
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        ids: list[str] | None,
+        embeddings: np.ndarray | None = None,
+    ) -> tuple[list[str], list[str], list[dict[str, str]], np.ndarray | None]:
+        """Validate records against the open collection and derive content-hashed IDs when none are provided."""
+        if self.collection is None:
+            raise ValueError("Collection not initialized. Call create_collection() first.")
+
+        return prepare_records(documents, metadatas, ids, embeddings)
+
     def add_docs(self, documents: list[str], metadatas: list[dict[str, str]], ids: list[str] | None = None) -> None:
         """
         Add documents to the ChromaDB collection.
@@ -81,24 +204,154 @@ class ChromaVectorDB(VectorDBBase):
         Args:
             documents: list of text documents to add
             metadatas: list of metadata dicts with document_type field
-            ids: list of unique identifiers (auto-generated UUIDs if not provided)
+            ids: list of unique identifiers (SHA-256 of the document text if not provided)
+        """
+        ids, documents, metadatas, _ = self._prepare_records(documents, metadatas, ids)
+        self._write_in_chunks(self.collection.add, ids, documents, metadatas)  # type: ignore[union-attr]
+
+    def upsert_docs(
+        self,
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        ids: list[str] | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        """
+        Insert documents into the ChromaDB collection, replacing documents with the same ID.
+
+        Args:
+            documents: list of text documents to insert or update
+            metadatas: list of metadata dicts with document_type field
+            ids: list of unique identifiers (SHA-256 of the document text if not provided)
+            embeddings: Precomputed embeddings, one row per document (embedded on write if not provided)
+        """
+        ids, documents, metadatas, embeddings = self._prepare_records(documents, metadatas, ids, embeddings)
+        self._write_in_chunks(self.collection.upsert, ids, documents, metadatas, embeddings)  # type: ignore[union-attr]
+
+    @retry(
+        wait=wait_exponential(multiplier=1, min=1, max=30),
+        reraise=True,
+        stop=stop_after_attempt(3),
+        after=log_attempt_retry,
+    )
+    def _write_chunk(
+        self,
+        write: Callable[..., None],
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        """Embed and commit a single chunk, retrying it on failure."""
+        if embeddings is not None:
+            write(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+            return
+
+        self._rate_limiter.acquire()
+        write(ids=ids, documents=documents, metadatas=metadatas)
+
+    def _write_in_chunks(
+        self,
+        write: Callable[..., None],
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        """
+        Split a bulk write into chunks that are embedded concurrently and committed independently.
+
+        Every chunk is attempted even if others fail, so a failure only loses the affected chunks.
+
+        Raises
+        ------
+            RuntimeError: If any chunk still fails after its retries
+        """
+        size = self.insert_chunk_size
+        chunks = [
+            (
+                ids[i : i + size],
+                documents[i : i + size],
+                metadatas[i : i + size],
+                None if embeddings is None else embeddings[i : i + size],
+            )
+            for i in range(0, len(ids), size)
+        ]
+
+        start_time = time.perf_counter()
+        written = 0
+        failed_chunks = 0
+        first_error: Exception | None = None
+        with ThreadPoolExecutor(max_workers=self.insert_max_workers) as executor:
+            futures = {executor.submit(self._write_chunk, write, *chunk): len(chunk[0]) for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    written += futures[future]
+                except Exception as e:
+                    logger.error(f"Failed to write chunk to the vector database: {e}")
+                    failed_chunks += 1
+                    first_error = first_error or e
+
+        elapsed = time.perf_counter() - start_time
+        logger.info(
+            f"Wrote {written}/{len(ids)} documents in {len(chunks)} chunks, "
+            f"{elapsed:.2f}s ({written / elapsed if elapsed else 0:.1f} docs/s)"
+        )
+
+        if failed_chunks:
+            raise RuntimeError(f"{failed_chunks} of {len(chunks)} chunks failed to be written") from first_error
+
+    def get_docs(
+        self, ids: list[str] | None = None, include_embeddings: bool = False
+    ) -> tuple[list[str], list[str], list[dict[str, Any]], np.ndarray | None]:
+        """
+        Get documents stored in the ChromaDB collection.
+
+        Args:
+            ids: Identifiers of the documents to get (default: every document). Unknown IDs are ignored.
+            include_embeddings: Whether to also return the stored embeddings (default: False)
+
+        Returns
+        -------
+            tuple of (ids, documents, metadatas, embeddings)
         """
         if self.collection is None:
             raise ValueError("Collection not initialized. Call create_collection() first.")
 
-        # Generate UUIDs if ids not provided
-        if ids is None:
-            ids = [str(uuid.uuid4()) for _ in documents]
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        result = self.collection.get(ids=ids, include=include)  # type: ignore[arg-type]
 
-        # Ensure metadatas list matches documents length
-        elif len(metadatas) != len(documents):
-            raise ValueError("Length of metadatas must match length of documents")
+        embeddings = None
+        if include_embeddings:
+            embeddings = np.asarray(result["embeddings"], dtype=np.float32)
+            if embeddings.size == 0:
+                embeddings = embeddings.reshape(0, 0)
 
-        self.collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas,  # type: ignore
-        )
+        return result["ids"], result["documents"] or [], result["metadatas"] or [], embeddings  # type: ignore
+
+    def count(self) -> int:
+        """Return the number of documents stored in the ChromaDB collection."""
+        if self.collection is None:
+            raise ValueError("Collection not initialized. Call create_collection() first.")
+
+        return self.collection.count()
+
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed texts with the embedding function of the ChromaDB collection.
+
+        Args:
+            texts: Texts to embed
+
+        Returns
+        -------
+            float32 matrix with one row per text
+        """
+        if self.collection is None or self.embedding_function is None:
+            raise ValueError("Collection not initialized. Call create_collection() first.")
+
+        return np.asarray(self.embedding_function(texts), dtype=np.float32)
 
     def find_similar_docs(
         self, query_text: str, n_results: int = 10
@@ -114,17 +367,35 @@ class ChromaVectorDB(VectorDBBase):
         -------
             tuple of (ids, documents, metadatas, distances, confidence)
         """
+        return self.find_similar_docs_batch([query_text], n_results)[0]
+
+    def find_similar_docs_batch(
+        self, query_texts: list[str], n_results: int = 10
+    ) -> list[tuple[list[str], list[str], list[dict[str, Any]], list[float], list[float]]]:
+        """
+        Find similar documents for several queries with a single embedding request and collection query.
+
+        Args:
+            query_texts: Texts to search for similar documents
+            n_results: Number of results to return per query (default: 10)
+
+        Returns
+        -------
+            list of (ids, documents, metadatas, distances, confidence) tuples, one per query text
+        """
         if self.collection is None:
             raise ValueError("Collection not initialized. Call create_collection() first.")
 
-        query_result = self.collection.query(query_texts=[query_text], n_results=n_results)
-        # Extract fields from query result
-        # ChromaDB returns lists of lists, so we flatten them
-        ids = query_result["ids"][0] if query_result["ids"] else []
-        documents = query_result["documents"][0] if query_result["documents"] else []
-        metadatas = query_result["metadatas"][0] if query_result["metadatas"] else []
-        distances = query_result["distances"][0] if query_result["distances"] else []
+        query_result = self.collection.query(query_texts=query_texts, n_results=n_results)
+        # ChromaDB returns one list per query text, so we split them back per query
+        results = []
+        for i in range(len(query_texts)):
+            ids = query_result["ids"][i] if query_result["ids"] else []
+            documents = query_result["documents"][i] if query_result["documents"] else []
+            metadatas = query_result["metadatas"][i] if query_result["metadatas"] else []
+            distances = query_result["distances"][i] if query_result["distances"] else []
 
-        confidence = self.__apply_sigmoid(distances)
+            confidence = self.__apply_sigmoid(distances)
+            results.append((ids, documents, metadatas, distances, confidence))
 
-        return ids, documents, metadatas, distances, confidence  # type: ignore
+        return results  # type: ignore
@@ -0,0 +1,512 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.constants import (
+    EMBEDDING_DEFAULT_BACKEND,
+    EMBEDDING_DIMENSIONS,
+    NUMPY_VECTOR_DB_PATH,
+    QUANTIZATION_RERANK_FACTOR,
+    VECTOR_DB_INSERT_CHUNK_SIZE,
+    VECTOR_DB_QUANTIZATION,
+)
+from src.services.embeddings.embeddings import EmbeddingFunctionFactory, get_embedder_id, validate_embedder
+from src.services.vector_db.base import VectorDBBase, l2_normalize, prepare_records, sigmoid_confidence
+from src.services.vector_db.quantization import CODE_DTYPES, QuantizationType, approximate_scores, quantize
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def _top_k(similarities: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the column indices and values of the ``k`` largest similarities of each row, best first."""
+    # Partial sort for the top-k, then order only those k by similarity
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_similarities = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_similarities, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_similarities, order, axis=1)
+
+
+class NumpyCollection:
+    """
+    Flat vector index persisted as memory-mapped matrices and a SQLite side table.
+
+    Row ``i`` of ``vectors.f32`` holds the L2-normalized embedding of the document stored with ``row = i``
+    in ``metadata.sqlite3``. Quantized collections also keep the compact codes (and int8 scales) of every
+    vector, which are scanned instead of the float32 matrix. Vectors are written before their rows are
+    committed, and readers only map the rows present in the side table, so other processes can query the
+    collection while it is written. Writers, including those of other processes, take turns on the SQLite
+    write lock.
+    """
+
+    def __init__(self, path: Path, name: str, metadata: dict[str, Any]):
+        self.path = path
+        self.name = name
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._maps: dict[str, np.ndarray] = {}
+        self._dimensions: int | None = None
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS collection (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            # Collections written before quantization was recorded hold no codes, so they must not take on
+            # the quantization requested when they are reopened
+            conn.execute(
+                "INSERT OR IGNORE INTO collection (key, value) "
+                "SELECT 'quantization', ? WHERE EXISTS (SELECT 1 FROM documents)",
+                (json.dumps("none"),),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO collection (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in metadata.items()],
+            )
+
+        # The quantization recorded at creation wins, since the codes of stored vectors depend on it
+        self.quantization: QuantizationType = self.metadata.get("quantization", "none")
+        # Memory-mapped arrays as name -> (file name, dtype, whether rows hold one value per dimension)
+        self._arrays: dict[str, tuple[str, type[np.generic], bool]] = {"vectors": ("vectors.f32", np.float32, True)}
+        if self.quantization != "none":
+            self._arrays["codes"] = (f"codes.{self.quantization}", CODE_DTYPES[self.quantization], True)
+        if self.quantization == "int8":
+            self._arrays["scales"] = ("scales.f32", np.float32, False)
+        for file_name, _, _ in self._arrays.values():
+            (self.path / file_name).touch()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the SQLite connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path / "metadata.sqlite3", timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """Metadata recorded when the collection was created."""
+        rows = self._connection().execute("SELECT key, value FROM collection").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    @property
+    def dimensions(self) -> int | None:
+        """Dimensionality of the stored vectors, or None while the collection is empty."""
+        if self._dimensions is None:
+            self._dimensions = self.metadata.get("dimensions")
+        return self._dimensions
+
+    def count(self) -> int:
+        """Return the number of stored documents."""
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _array(self, name: str, n_rows: int | None = None) -> np.ndarray:
+        """Return the committed rows of an array as a read-only memory map, remapping it when rows were added."""
+        if n_rows is None:
+            n_rows = self._connection().execute("SELECT COALESCE(MAX(row) + 1, 0) FROM documents").fetchone()[0]
+        file_name, dtype, per_dimension = self._arrays[name]
+        dimensions = self.dimensions or 0
+        shape = (n_rows, dimensions) if per_dimension else (n_rows,)
+        if not n_rows or not dimensions:
+            return np.empty(shape, dtype=dtype)
+
+        if name not in self._maps or len(self._maps[name]) != n_rows:
+            self._maps[name] = np.memmap(self.path / file_name, dtype=dtype, mode="r", shape=shape)
+        return self._maps[name]
+
+    def vectors(self) -> np.ndarray:
+        """Return the committed full-precision vectors."""
+        return self._array("vectors")
+
+    def codes(self, n_rows: int) -> tuple[np.ndarray, np.ndarray | None]:
+        """Return the quantized codes of the first ``n_rows`` rows, with their scales for int8 codes."""
+        scales = self._array("scales", n_rows) if "scales" in self._arrays else None
+        return self._array("codes", n_rows), scales
+
+    def memory_footprint(self) -> dict[str, int]:
+        """Return the size in bytes of each memory-mapped array."""
+        return {name: (self.path / file_name).stat().st_size for name, (file_name, _, _) in self._arrays.items()}
+
+    def write(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        embeddings: np.ndarray,
+        replace: bool,
+    ) -> int:
+        """
+        Write records, overwriting the vectors of existing IDs in place and appending new ones.
+
+        Args:
+            ids: Unique identifiers of the documents
+            documents: Text of the documents
+            metadatas: Metadata of the documents
+            embeddings: Embeddings of the documents, one row per document
+            replace: Whether existing IDs are replaced (upsert) or skipped (add)
+
+        Returns
+        -------
+            Number of documents written
+        """
+        vectors = l2_normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._write_lock:
+            conn = self._connection()
+            # Take the database write lock before reading the rows, so writers of other processes wait here
+            # instead of allocating the same new rows and overwriting each other's vectors
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                records = self._write_rows(conn, ids, documents, metadatas, vectors, replace)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+        return len(records)
+
+    def _write_rows(
+        self,
+        conn: sqlite3.Connection,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        vectors: np.ndarray,
+        replace: bool,
+    ) -> list[tuple[int, str, str, str]]:
+        """Allocate rows, write the vectors and insert the records, within the caller's write transaction."""
+        # Another process may have stored the first vectors since this collection was opened
+        dimensions = self._dimensions = self.metadata.get("dimensions")
+        if dimensions is None:
+            dimensions = self._dimensions = vectors.shape[1]
+            conn.execute("INSERT INTO collection (key, value) VALUES ('dimensions', ?)", (json.dumps(dimensions),))
+        if vectors.shape[1] != dimensions:
+            raise ValueError(f"Expected embeddings of dimension {dimensions}, got {vectors.shape[1]}")
+
+        placeholders = ",".join("?" * len(ids))
+        existing = dict(conn.execute(f"SELECT id, row FROM documents WHERE id IN ({placeholders})", ids).fetchall())
+        next_row = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM documents").fetchone()[0]
+
+        records = []
+        positions = []
+        for i, doc_id in enumerate(ids):
+            if doc_id in existing and not replace:
+                continue
+            row = existing.get(doc_id)
+            if row is None:
+                row, next_row = next_row, next_row + 1
+                existing[doc_id] = row
+            positions.append((i, row))
+            records.append((row, doc_id, documents[i], json.dumps(metadatas[i])))
+
+        arrays = {"vectors": vectors}
+        if self.quantization != "none":
+            arrays["codes"], scales = quantize(vectors, self.quantization)
+            if scales is not None:
+                arrays["scales"] = scales
+        for name, values in arrays.items():
+            with open(self.path / self._arrays[name][0], "r+b") as f:
+                for i, row in positions:
+                    f.seek(row * values[i].nbytes)
+                    f.write(values[i].tobytes())
+
+        conn.executemany("INSERT OR REPLACE INTO documents (row, id, document, metadata) VALUES (?, ?, ?, ?)", records)
+        return records
+
+    def get(self, ids: list[str] | None = None) -> list[tuple[int, str, str, dict[str, Any]]]:
+        """Return (row, id, document, metadata) of the given IDs, or of every document, in row order."""
+        query = "SELECT row, id, document, metadata FROM documents"
+        params: list[Any] = []
+        if ids is not None:
+            query += f" WHERE id IN ({','.join('?' * len(ids))})"
+            params = ids
+        rows = self._connection().execute(query + " ORDER BY row", params).fetchall()
+        return [(row, doc_id, document, json.loads(metadata)) for row, doc_id, document, metadata in rows]
+
+    def get_rows(self, rows: list[int]) -> dict[int, tuple[str, str, dict[str, Any]]]:
+        """Return (id, document, metadata) of the given rows, keyed by row."""
+        placeholders = ",".join("?" * len(rows))
+        records = self._connection().execute(
+            f"SELECT row, id, document, metadata FROM documents WHERE row IN ({placeholders})",
+            rows,
+        )
+        return {row: (doc_id, document, json.loads(metadata)) for row, doc_id, document, metadata in records}
+
+    def filter_rows(self, where: dict[str, Any]) -> np.ndarray:
+        """Return the rows whose metadata matches every ``key: value`` pair of ``where``."""
+        conditions = " AND ".join("json_extract(metadata, ?) = ?" for _ in where)
+        params = [p for key, value in where.items() for p in (f"$.{key}", value)]
+        rows = self._connection().execute(f"SELECT row FROM documents WHERE {conditions}", params).fetchall()
+        return np.fromiter((row for (row,) in rows), dtype=np.int64)
+
+
+class NumpyVectorDB(VectorDBBase):
+    """
+    Brute-force vector database backed by NumPy.
+
+    Each collection is a memory-mapped float32 matrix of L2-normalized vectors plus a SQLite side table
+    for ids, documents and metadata. Similarity queries are a single matrix product followed by a partial
+    sort, which is faster than an HNSW index at our collection sizes and exact. The files can be mapped by
+    several processes at once, so workers share the OS page cache instead of each loading the index.
+
+    New collections can be created with ``quantization="float16"`` or ``"int8"``. Queries then scan the
+    compact codes, and only the best ``n_results * rerank_factor`` candidates are re-ranked with the
+    full-precision vectors, so the float32 matrix is paged in for a few rows per query only.
+    """
+
+    def __init__(
+        self,
+        embedding_backend: str = EMBEDDING_DEFAULT_BACKEND,
+        embedding_dimensions: int | None = EMBEDDING_DIMENSIONS,
+        path: str | Path = NUMPY_VECTOR_DB_PATH,
+        insert_chunk_size: int = VECTOR_DB_INSERT_CHUNK_SIZE,
+        quantization: QuantizationType = VECTOR_DB_QUANTIZATION,  # type: ignore[assignment]
+        rerank_factor: int = QUANTIZATION_RERANK_FACTOR,
+    ):
+        if quantization != "none" and quantization not in CODE_DTYPES:
+            raise ValueError(f"Unsupported quantization type: {quantization}")
+
+        self.path = Path(path)
+        self.collection: NumpyCollection | None = None
+        self.embedding_function = None
+        self._default_embedding_function = EmbeddingFunctionFactory.create(
+            embedding_backend,  # type: ignore[arg-type]
+            dimensions=embedding_dimensions,
+        )
+        self.insert_chunk_size = insert_chunk_size
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+
+    def get_or_create_collection(
+        self,
+        name: str = "idu_collection",
+        embedding_function: Any | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> NumpyCollection:
+        """
+        Create or get a collection stored under ``<path>/<name>``.
+
+        Args:
+            name: Name of the collection (default: "idu_collection")
+            embedding_function: Embedding function (default: cached embedder of the configured backend)
+            metadata: Collection metadata (default: includes description and creation time). The embedder
+                that builds the collection is always recorded under the "embedder" key, and the vector
+                quantization under the "quantization" key.
+
+        Returns
+        -------
+            NumpyCollection object
+
+        Raises
+        ------
+            ValueError: If the existing collection was built with a different embedder or quantization
+        """
+        embedding_function = self.resolve_embedding_function(embedding_function)
+
+        if metadata is None:
+            metadata = {"description": "Collection for IDU API", "created": str(datetime.now())}
+
+        embedder_id = get_embedder_id(embedding_function)
+        collection = NumpyCollection(
+            self.path / name, name, {**metadata, "embedder": embedder_id, "quantization": self.quantization}
+        )
+        validate_embedder(name, collection.metadata, embedder_id)
+        if collection.quantization != self.quantization:
+            raise ValueError(
+                f"Collection '{name}' stores {collection.quantization} quantization, but {self.quantization} "
+                f"was requested. Open it with quantization='{collection.quantization}', or rebuild it."
+            )
+
+        self.collection = collection
+        self.embedding_function = embedding_function
+        return self.collection
+
+    def _require_collection(self) -> NumpyCollection:
+        if self.collection is None:
+            raise ValueError("Collection not initialized. Call create_collection() first.")
+        return self.collection
+
+    def _write(
+        self,
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        ids: list[str] | None,
+        embeddings: np.ndarray | None,
+        replace: bool,
+    ) -> None:
+        collection = self._require_collection()
+        ids, documents, metadatas, embeddings = prepare_records(documents, metadatas, ids, embeddings)
+
+        written = 0
+        size = self.insert_chunk_size
+        for i in range(0, len(ids), size):
+            chunk_documents = documents[i : i + size]
+            chunk_embeddings = embeddings[i : i + size] if embeddings is not None else self.embed_texts(chunk_documents)
+            written += collection.write(
+                ids[i : i + size], chunk_documents, metadatas[i : i + size], chunk_embeddings, replace
+            )
+
+        logger.info(f"Wrote {written}/{len(ids)} documents to the {collection.name} collection")
+
+    def add_docs(self, documents: list[str], metadatas: list[dict[str, str]], ids: list[str] | None = None) -> None:
+        """
+        Add documents to the collection, skipping IDs that are already stored.
+
+        Args:
+            documents: list of text documents to add
+            metadatas: list of metadata dicts with document_type field
+            ids: list of unique identifiers (SHA-256 of the document text if not provided)
+        """
+        self._write(documents, metadatas, ids, None, replace=False)
+
+    def upsert_docs(
+        self,
+        documents: list[str],
+        metadatas: list[dict[str, str]],
+        ids: list[str] | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        """
+        Insert documents into the collection, replacing documents with the same ID.
+
+        Args:
+            documents: list of text documents to insert or update
+            metadatas: list of metadata dicts with document_type field
+            ids: list of unique identifiers (SHA-256 of the document text if not provided)
+            embeddings: Precomputed embeddings, one row per document (embedded on write if not provided)
+        """
+        self._write(documents, metadatas, ids, embeddings, replace=True)
+
+    def get_docs(
+        self, ids: list[str] | None = None, include_embeddings: bool = False
+    ) -> tuple[list[str], list[str], list[dict[str, Any]], np.ndarray | None]:
+        """
+        Get documents stored in the collection.
+
+        Args:
+            ids: Identifiers of the documents to get (default: every document). Unknown IDs are ignored.
+            include_embeddings: Whether to also return the stored (L2-normalized) embeddings (default: False)
+
+        Returns
+        -------
+            tuple of (ids, documents, metadatas, embeddings)
+        """
+        records = self._require_collection().get(ids)
+
+        embeddings = None
+        if include_embeddings:
+            vectors = self.collection.vectors()  # type: ignore[union-attr]
+            embeddings = np.array(vectors[[r[0] for r in records]], dtype=np.float32)
+
+        return [r[1] for r in records], [r[2] for r in records], [r[3] for r in records], embeddings
+
+    def count(self) -> int:
+        """Return the number of documents stored in the collection."""
+        return self._require_collection().count()
+
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed texts with the embedding function of the collection.
+
+        Args:
+            texts: Texts to embed
+
+        Returns
+        -------
+            float32 matrix with one row per text
+        """
+        self._require_collection()
+        return np.asarray(self.embedding_function(texts), dtype=np.float32)  # type: ignore[misc]
+
+    def find_similar_docs(
+        self, query_text: str, n_results: int = 10, where: dict[str, Any] | None = None
+    ) -> tuple[list[str], list[str], list[dict[str, Any]], list[float], list[float]]:
+        """
+        Find similar documents in the collection.
+
+        Args:
+            query_text: Text to search for similar documents
+            n_results: Number of results to return (default: 10)
+            where: Only consider documents whose metadata equals every ``key: value`` pair (optional)
+
+        Returns
+        -------
+            tuple of (ids, documents, metadatas, distances, confidence)
+        """
+        return self.find_similar_docs_batch([query_text], n_results, where)[0]
+
+    def find_similar_docs_batch(
+        self, query_texts: list[str], n_results: int = 10, where: dict[str, Any] | None = None
+    ) -> list[tuple[list[str], list[str], list[dict[str, Any]], list[float], list[float]]]:
+        """
+        Find similar documents for several queries with a single matrix product.
+
+        Args:
+            query_texts: Texts to search for similar documents
+            n_results: Number of results to return per query (default: 10)
+            where: Only consider documents whose metadata equals every ``key: value`` pair (optional)
+
+        Returns
+        -------
+            list of (ids, documents, metadatas, distances, confidence) tuples, one per query text
+        """
+        collection = self._require_collection()
+        vectors = collection.vectors()
+        if not len(vectors):
+            return [([], [], [], [], []) for _ in query_texts]
+
+        queries = l2_normalize(self.embed_texts(query_texts))
+
+        candidates = collection.filter_rows(where) if where else None
+        if candidates is not None:
+            candidates = candidates[candidates < len(vectors)]
+
+        k = min(n_results, len(vectors) if candidates is None else len(candidates))
+        if k == 0:
+            return [([], [], [], [], []) for _ in query_texts]
+
+        if collection.quantization == "none":
+            similarities = queries @ (vectors if candidates is None else vectors[candidates]).T
+            top, top_similarities = _top_k(similarities, k)
+            top_rows = top if candidates is None else candidates[top]
+        else:
+            top_rows, top_similarities = self._search_quantized(collection, queries, candidates, len(vectors), k)
+
+        records = collection.get_rows(sorted({int(row) for row in top_rows.ravel()}))
+        results = []
+        for rows, row_similarities in zip(top_rows, top_similarities, strict=True):
+            ids, documents, metadatas = zip(*(records[int(row)] for row in rows), strict=True)
+            distances = [round(float(1 - similarity), 6) for similarity in row_similarities]
+            results.append((list(ids), list(documents), list(metadatas), distances, sigmoid_confidence(distances)))
+
+        return results  # type: ignore[return-value]
+
+    def _search_quantized(
+        self, collection: NumpyCollection, queries: np.ndarray, candidates: np.ndarray | None, n_rows: int, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Shortlist candidates by scanning the quantized codes, then re-rank them with full-precision vectors.
+
+        Returns
+        -------
+            tuple of (rows, similarities) of the top-k documents of each query, best first
+        """
+        codes, scales = collection.codes(n_rows)
+        if candidates is not None:
+            codes, scales = codes[candidates], None if scales is None else scales[candidates]
+
+        shortlist, _ = _top_k(approximate_scores(queries, codes, scales), min(k * self.rerank_factor, len(codes)))
+        shortlist_rows = shortlist if candidates is None else candidates[shortlist]
+
+        vectors = collection.vectors()
+        exact = np.einsum("qd,qmd->qm", queries, vectors[shortlist_rows.ravel()].reshape(*shortlist_rows.shape, -1))
+        order, top_similarities = _top_k(exact, k)
+        return np.take_along_axis(shortlist_rows, order, axis=1), top_similarities
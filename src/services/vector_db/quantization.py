@@ -0,0 +1,76 @@
+from typing import Literal
+
+import numpy as np
+
+from src.constants import QUANTIZATION_BLOCK_ROWS
+
+QuantizationType = Literal["none", "float16", "int8"]
+
+CODE_DTYPES: dict[str, type[np.generic]] = {"float16": np.float16, "int8": np.int8}
+
+
+def quantize(vectors: np.ndarray, quantization: QuantizationType) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Encode float32 vectors into compact codes.
+
+    ``int8`` codes are scaled per vector, so that the largest component maps to 127. The scale of each
+    vector is returned alongside the codes, and new vectors never require re-encoding stored ones.
+
+    Args:
+        vectors: float32 matrix with one vector per row
+        quantization: "float16" or "int8"
+
+    Returns
+    -------
+        tuple of (codes, scales), where scales is None for float16 codes
+
+    Raises
+    ------
+        ValueError: If the quantization type is not supported
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+
+    if quantization == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    raise ValueError(f"Unsupported quantization type: {quantization}")
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray | None) -> np.ndarray:
+    """Decode codes back into approximate float32 vectors."""
+    vectors = codes.astype(np.float32)
+    if scales is not None:
+        vectors *= scales[:, None]
+    return vectors
+
+
+def approximate_scores(
+    queries: np.ndarray, codes: np.ndarray, scales: np.ndarray | None, block_rows: int = QUANTIZATION_BLOCK_ROWS
+) -> np.ndarray:
+    """
+    Score queries against quantized vectors with inner products.
+
+    Codes are decoded ``block_rows`` rows at a time, so scanning never materializes the full-precision matrix.
+
+    Args:
+        queries: float32 matrix with one query per row
+        codes: Quantized vectors, one per row
+        scales: Per-vector scales of int8 codes (None for float16 codes)
+        block_rows: Number of code rows decoded at once
+
+    Returns
+    -------
+        float32 matrix of approximate scores, one row per query and one column per vector
+    """
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), block_rows):
+        end = start + block_rows
+        scores[:, start:end] = queries @ codes[start:end].astype(np.float32).T
+        if scales is not None:
+            scores[:, start:end] *= scales[start:end]
+    return scores
@@ -0,0 +1,196 @@
+import hashlib
+import itertools
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.services.embeddings.embeddings import get_embedder_id
+from src.services.vector_db.base import VectorDBBase
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Collection metadata keys describing how a backend built its index, set again by the importing backend
+BACKEND_METADATA_KEYS = ("embedder", "quantization", "dimensions")
+
+
+def _pack_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Encode strings as one UTF-8 byte buffer and the offsets delimiting each string."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> list[str]:
+    """Decode strings packed by ``_pack_strings``."""
+    buffer = data.tobytes()
+    return [buffer[start:end].decode("utf-8") for start, end in itertools.pairwise(offsets.tolist())]
+
+
+def _checksum(array: np.ndarray) -> str:
+    """Return the SHA-256 hex digest of the raw bytes of an array."""
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def export_snapshot(vector_db: VectorDBBase, path: str | Path) -> dict[str, Any]:
+    """
+    Write the current collection of a vector database to an ``.npz`` snapshot.
+
+    The snapshot holds the IDs, documents and metadata as packed UTF-8 buffers, the float32 vectors as a single
+    matrix, and a manifest recording the collection metadata (embedder and index parameters) and the SHA-256
+    checksum of every array. It is written to a temporary file first, so an interrupted export never leaves
+    a partial snapshot behind.
+
+    Args:
+        vector_db: Vector database whose current collection is exported
+        path: File the snapshot is written to
+
+    Returns
+    -------
+        The snapshot manifest
+
+    Raises
+    ------
+        ValueError: If no collection is selected
+    """
+    if vector_db.collection is None:
+        raise ValueError("Collection not initialized. Call get_or_create_collection() first.")
+
+    ids, documents, metadatas, embeddings = vector_db.get_docs(include_embeddings=True)
+    ids_data, ids_offsets = _pack_strings(ids)
+    documents_data, documents_offsets = _pack_strings(documents)
+    metadatas_data, metadatas_offsets = _pack_strings([json.dumps(metadata) for metadata in metadatas])
+    arrays = {
+        "ids_data": ids_data,
+        "ids_offsets": ids_offsets,
+        "documents_data": documents_data,
+        "documents_offsets": documents_offsets,
+        "metadatas_data": metadatas_data,
+        "metadatas_offsets": metadatas_offsets,
+        "embeddings": np.zeros((0, 0), dtype=np.float32)
+        if embeddings is None
+        else np.asarray(embeddings, dtype=np.float32),
+    }
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "collection": vector_db.collection.name,
+        "metadata": vector_db.collection_metadata(),
+        "count": len(ids),
+        "dimensions": arrays["embeddings"].shape[1],
+        "created": str(datetime.now()),
+        "checksums": {name: _checksum(array) for name, array in arrays.items()},
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    with open(temporary_path, "wb") as f:
+        np.savez(f, manifest=np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8), **arrays)
+    os.replace(temporary_path, path)
+
+    logger.info(f"Exported {len(ids)} documents of collection '{manifest['collection']}' to {path}")
+    return manifest
+
+
+def _load_manifest(snapshot: Any, path: str | Path) -> dict[str, Any]:
+    manifest = json.loads(snapshot["manifest"].tobytes().decode("utf-8"))
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')} in {path}")
+    return manifest
+
+
+def read_manifest(path: str | Path) -> dict[str, Any]:
+    """
+    Read the manifest of an ``.npz`` snapshot without loading its arrays.
+
+    Raises
+    ------
+        ValueError: If the snapshot version is not supported
+    """
+    with np.load(path) as snapshot:
+        return _load_manifest(snapshot, path)
+
+
+def read_snapshot(
+    path: str | Path,
+) -> tuple[dict[str, Any], list[str], list[str], list[dict[str, Any]], np.ndarray]:
+    """
+    Read and verify an ``.npz`` snapshot written by ``export_snapshot``.
+
+    Args:
+        path: Snapshot file
+
+    Returns
+    -------
+        tuple of (manifest, ids, documents, metadatas, embeddings)
+
+    Raises
+    ------
+        ValueError: If the snapshot version is not supported or an array does not match its checksum
+    """
+    with np.load(path) as snapshot:
+        manifest = _load_manifest(snapshot, path)
+        arrays = {name: snapshot[name] for name in manifest["checksums"]}
+
+    for name, array in arrays.items():
+        if _checksum(array) != manifest["checksums"][name]:
+            raise ValueError(f"Snapshot {path} is corrupted: checksum mismatch for '{name}'")
+
+    ids = _unpack_strings(arrays["ids_data"], arrays["ids_offsets"])
+    documents = _unpack_strings(arrays["documents_data"], arrays["documents_offsets"])
+    metadatas = [json.loads(m) for m in _unpack_strings(arrays["metadatas_data"], arrays["metadatas_offsets"])]
+    return manifest, ids, documents, metadatas, arrays["embeddings"]
+
+
+def import_snapshot(vector_db: VectorDBBase, path: str | Path, name: str | None = None) -> dict[str, Any]:
+    """
+    Bulk-load an ``.npz`` snapshot into a collection of any vector database backend.
+
+    The stored vectors are written as they are, so nothing is re-embedded. The target collection must use
+    the embedder that produced them.
+
+    Args:
+        vector_db: Vector database to load the snapshot into
+        path: Snapshot file
+        name: Name of the target collection (default: name of the exported collection)
+
+    Returns
+    -------
+        The snapshot manifest
+
+    Raises
+    ------
+        ValueError: If the snapshot is invalid, or the target collection uses a different embedder
+    """
+    manifest, ids, documents, metadatas, embeddings = read_snapshot(path)
+    name = name or manifest["collection"]
+    recorded_metadata = manifest["metadata"]
+    metadata = {
+        key: value
+        for key, value in recorded_metadata.items()
+        if key not in BACKEND_METADATA_KEYS and not key.startswith("hnsw:")
+    }
+
+    # Checked before the collection is created, so a rejected import leaves nothing behind
+    embedder_id = get_embedder_id(vector_db.resolve_embedding_function())
+    recorded_embedder = recorded_metadata.get("embedder")
+    if recorded_embedder is not None and recorded_embedder != embedder_id:
+        raise ValueError(
+            f"Snapshot {path} was built with embedder '{recorded_embedder}', "
+            f"but collection '{name}' uses '{embedder_id}'"
+        )
+
+    vector_db.get_or_create_collection(name=name, metadata=metadata)
+
+    if ids:
+        vector_db.upsert_docs(documents, metadatas, ids, embeddings=embeddings)
+
+    logger.info(f"Imported {len(ids)} documents from {path} into collection '{name}'")
+    return manifest
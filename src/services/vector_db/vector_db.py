@@ -1,19 +1,27 @@
 from typing import Literal
 
+from src.constants import EMBEDDING_DEFAULT_BACKEND, EMBEDDING_DIMENSIONS
 from src.services.vector_db.base import VectorDBBase
 from src.services.vector_db.chroma_impl import ChromaVectorDB
+from src.services.vector_db.numpy_impl import NumpyVectorDB
 
 
 class VectorDBFactory:
     """Factory class for creating vector database instances."""
 
     @staticmethod
-    def create(db_type: Literal["chromadb"]) -> VectorDBBase:
+    def create(
+        db_type: Literal["chromadb", "numpy"],
+        embedding_backend: Literal["openai", "local"] = EMBEDDING_DEFAULT_BACKEND,  # type: ignore[assignment]
+        embedding_dimensions: int | None = EMBEDDING_DIMENSIONS,
+    ) -> VectorDBBase:
         """
         Create a vector database instance based on the specified type.
 
         Args:
-            db_type: Type of vector database (currently only "chromadb" supported)
+            db_type: Type of vector database ("chromadb" or "numpy")
+            embedding_backend: Embedding backend used by the collections ("openai" or "local")
+            embedding_dimensions: Output dimensions of the embeddings (default: full size of the model)
 
         Returns
         -------
@@ -24,6 +32,8 @@ class VectorDBFactory:
             ValueError: If an unsupported database type is specified
         """
         if db_type == "chromadb":
-            return ChromaVectorDB()
+            return ChromaVectorDB(embedding_backend=embedding_backend, embedding_dimensions=embedding_dimensions)
+        elif db_type == "numpy":
+            return NumpyVectorDB(embedding_backend=embedding_backend, embedding_dimensions=embedding_dimensions)
         else:
             raise ValueError(f"Unsupported vector database type: {db_type}")
@@ -0,0 +1,223 @@
+import asyncio
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.services.ocr.base import OCREngineBase
+from src.utils.logging_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def read_labeled_files(dataset_path: str | Path, limit_per_label: int | None = None) -> tuple[list[str], list[str]]:
+    """
+    Read a dataset laid out as one subfolder per document type.
+
+    Parameters
+    ----------
+    dataset_path : str | Path
+        Folder containing one subfolder per document type
+    limit_per_label : int | None, optional
+        Maximum number of files read per document type, by default every file
+
+    Returns
+    -------
+    tuple[list[str], list[str]]
+        File paths and their document types
+    """
+    file_paths = []
+    labels = []
+    for subfolder in sorted(Path(dataset_path).iterdir()):
+        if not subfolder.is_dir():
+            continue
+
+        files = sorted(f for f in subfolder.iterdir() if f.is_file())[:limit_per_label]
+        file_paths.extend(f.as_posix() for f in files)
+        labels.extend([subfolder.name] * len(files))
+
+    return file_paths, labels
+
+
+async def extract_text(ocr_engine: OCREngineBase, file_path: str) -> str:
+    """
+    Extract the text of a file, running the synchronous OCR in a thread for engines without async extraction.
+
+    Parameters
+    ----------
+    ocr_engine : OCREngineBase
+        OCR engine used to extract the text
+    file_path : str
+        File to extract the text from
+
+    Returns
+    -------
+    str
+        Extracted text
+    """
+    try:
+        return await ocr_engine.extract_text_from_image_async(image_path=file_path)
+    except NotImplementedError:
+        return await asyncio.to_thread(ocr_engine.extract_text_from_image, image_path=file_path)
+
+
+async def extract_texts(ocr_engine: OCREngineBase, file_paths: list[str], batch_size: int = 10) -> list[str | None]:
+    """
+    Extract the text of many files, a batch of concurrent OCR requests at a time.
+
+    Parameters
+    ----------
+    ocr_engine : OCREngineBase
+        OCR engine used to extract the texts
+    file_paths : list[str]
+        Files to extract the text from
+    batch_size : int, optional
+        Number of concurrent OCR requests, by default 10
+
+    Returns
+    -------
+    list[str | None]
+        Extracted texts in input order, None for files that failed
+    """
+    texts: list[str | None] = []
+    for i in range(0, len(file_paths), batch_size):
+        batch = file_paths[i : i + batch_size]
+        results = await asyncio.gather(*(extract_text(ocr_engine, path) for path in batch), return_exceptions=True)
+        for path, result in zip(batch, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to process file {path}: {result}")
+                texts.append(None)
+            else:
+                texts.append(result)
+
+    return texts
+
+
+def accuracy(predictions: list[str], labels: list[str]) -> float:
+    """
+    Fraction of predictions equal to their label.
+
+    Parameters
+    ----------
+    predictions : list[str]
+        Predicted labels
+    labels : list[str]
+        Expected labels
+
+    Returns
+    -------
+    float
+        Accuracy between 0 and 1 (0 for empty inputs)
+    """
+    if not labels:
+        return 0.0
+    return sum(p == label for p, label in zip(predictions, labels, strict=True)) / len(labels)
+
+
+def recall_at_k(retrieved: list[list[str]], relevant: list[list[str]], k: int) -> float:
+    """
+    Mean fraction of the top-k relevant IDs found in the top-k retrieved IDs.
+
+    Parameters
+    ----------
+    retrieved : list[list[str]]
+        IDs returned for each query, best first
+    relevant : list[list[str]]
+        Exact nearest neighbour IDs for each query, best first
+    k : int
+        Number of neighbours compared
+
+    Returns
+    -------
+    float
+        Recall between 0 and 1 (0 for empty inputs)
+    """
+    recalls = [
+        len(set(found[:k]) & set(expected[:k])) / len(expected[:k])
+        for found, expected in zip(retrieved, relevant, strict=True)
+        if expected
+    ]
+    return sum(recalls) / len(recalls) if recalls else 0.0
+
+
+def directory_size(path: str | Path) -> int:
+    """Return the total size in bytes of the files under a directory."""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def process_rss() -> int | None:
+    """Return the resident set size in bytes of the current process, or None where /proc is unavailable."""
+    try:
+        resident_pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except OSError:
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def mapped_rss(path: str | Path) -> int | None:
+    """
+    Return the resident bytes of the current process's memory maps of files under a directory.
+
+    Parameters
+    ----------
+    path : str | Path
+        Directory of the mapped files
+
+    Returns
+    -------
+    int | None
+        Resident bytes summed over the matching mappings, None where /proc is unavailable
+    """
+    try:
+        smaps = Path("/proc/self/smaps").read_text()
+    except OSError:
+        return None
+
+    directory = str(Path(path).resolve())
+    resident = 0
+    in_directory = False
+    for line in smaps.splitlines():
+        fields = line.split()
+        # Mapping headers start with an address range such as 7f2a1c000000-7f2a1c021000
+        if fields and "-" in fields[0] and not fields[0].endswith(":"):
+            in_directory = len(fields) >= 6 and fields[5].startswith(directory + os.sep)
+        elif in_directory and fields[0] == "Rss:":
+            resident += int(fields[1]) * 1024
+    return resident
+
+
+def format_bytes(size: float) -> str:
+    """Format a size in bytes with a binary unit."""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+def summarize_latencies(latencies: list[float]) -> dict[str, float]:
+    """
+    Summarize latencies measured in seconds.
+
+    Parameters
+    ----------
+    latencies : list[float]
+        Latencies in seconds
+
+    Returns
+    -------
+    dict[str, float]
+        Mean, p50, p95 and p99 latencies in milliseconds
+    """
+    if not latencies:
+        return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"mean_ms": float(values.mean()), "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def format_latencies(latencies: list[float]) -> str:
+    """Format a latency summary as a single human readable line."""
+    summary = summarize_latencies(latencies)
+    return ", ".join(f"{name.removesuffix('_ms')} {value:.3f}ms" for name, value in summary.items())
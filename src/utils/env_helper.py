@@ -2,7 +2,16 @@ import os
 
 from dotenv import find_dotenv, load_dotenv
 
-from src.schemas.env_variables import APIKeys, DjangoSecrets, EllVariables, EnvVariables, HuggingFaceAPIKeys
+from src.schemas.env_variables import (
+    APIKeys,
+    ChromaVariables,
+    DjangoSecrets,
+    EllVariables,
+    EmbeddingVariables,
+    EnvVariables,
+    HuggingFaceAPIKeys,
+    LLMVariables,
+)
 from src.utils.logging_helper import get_custom_logger
 
 logger = get_custom_logger(__name__)
@@ -32,5 +41,22 @@ class EnvHelper:
                 ),
             ),
             django_secrets=DjangoSecrets(secret_key=os.environ["DJANGO_SECRET_KEY"]),
-            ell=EllVariables(store_path=os.environ.get("ELL_STORE_PATH", "")),
+            ell=EllVariables(
+                store_path=os.environ.get("ELL_STORE_PATH", ""),
+                sample_rate=os.environ.get("ELL_TRACE_SAMPLE_RATE") or 1.0,  # type: ignore[arg-type]
+            ),
+            embedding=EmbeddingVariables(
+                backend=os.environ.get("EMBEDDING_BACKEND") or "openai",
+                dimensions=os.environ.get("EMBEDDING_DIMENSIONS") or None,  # type: ignore[arg-type]
+            ),
+            chroma=ChromaVariables(
+                host=os.environ.get("CHROMA_HOST") or None,
+                port=os.environ.get("CHROMA_PORT") or 8000,  # type: ignore[arg-type]
+            ),
+            llm=LLMVariables(
+                validation_model=os.environ.get("VALIDATION_MODEL") or None,
+                extraction_fast_model=os.environ.get("EXTRACTION_FAST_MODEL") or None,
+                extraction_model=os.environ.get("EXTRACTION_MODEL") or None,
+                anthropic_base_url=os.environ.get("ANTHROPIC_BASE_URL") or None,
+            ),
         )
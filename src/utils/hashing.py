@@ -0,0 +1,42 @@
+import hashlib
+from pathlib import Path
+
+
+def hash_text(text: str) -> str:
+    """
+    Return a stable hex digest for a piece of text.
+
+    Parameters
+    ----------
+    text: str
+        The text to hash.
+
+    Returns
+    -------
+    str
+        The SHA-256 hex digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Return a stable hex digest of a file's content.
+
+    Parameters
+    ----------
+    path: str | Path
+        The path of the file to hash.
+    chunk_size: int
+        Number of bytes read at a time, by default 1 MiB.
+
+    Returns
+    -------
+    str
+        The SHA-256 hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,102 @@
+import json
+from typing import Any
+
+
+class IncrementalJSONObjectParser:
+    """
+    Parser of a JSON object arriving in chunks, returning each top-level member as soon as its value is complete.
+
+    Strings, arrays and objects are complete at their closing character, numbers, booleans and null at the
+    delimiter that follows them. Only the characters of each new chunk are scanned, and each value is decoded
+    once with ``json.loads``, so parsing a stream costs about as much as parsing the whole object at the end.
+    """
+
+    def __init__(self):
+        self.fields: dict[str, Any] = {}
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+        self._key_start = 0
+        self._key: str | None = None
+        self._value_start: int | None = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the object was parsed."""
+        return self._done
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """
+        Parse the next chunk of the object.
+
+        Parameters
+        ----------
+        chunk : str
+            Next characters of the JSON text
+
+        Returns
+        -------
+        list[tuple[str, Any]]
+            Names and values of the members completed by the chunk, in order
+
+        Raises
+        ------
+        json.JSONDecodeError
+            If a completed value is not valid JSON
+        """
+        self._text += chunk
+        completed: list[tuple[str, Any]] = []
+        text = self._text
+        for position in range(self._position, len(text)):
+            if self._done:
+                break
+            char = text[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None:
+                        self._key = json.loads(text[self._key_start : position + 1])
+                    elif self._depth == 1 and self._value_start is not None:
+                        completed.append(self._complete(position + 1))
+                continue
+
+            if char.isspace():
+                continue
+            if self._depth == 1 and self._key is not None and self._value_start is None and char != ":":
+                self._value_start = position
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = position
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    completed.append(self._complete(position + 1))
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        completed.append(self._complete(position))
+                    self._done = True
+            elif char == "," and self._depth == 1 and self._value_start is not None:
+                completed.append(self._complete(position))
+
+        self._position = len(text)
+        return completed
+
+    def _complete(self, end: int) -> tuple[str, Any]:
+        """Decode the value of the current member ending before ``end`` and start the next member."""
+        assert self._key is not None and self._value_start is not None
+        name, value = self._key, json.loads(self._text[self._value_start : end])
+        self.fields[name] = value
+        self._key = None
+        self._value_start = None
+        return name, value
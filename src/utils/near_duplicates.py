@@ -0,0 +1,194 @@
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from src.constants import (
+    NEAR_DUPLICATE_NUM_PERM,
+    NEAR_DUPLICATE_PRUNED_MAX_ENTRIES,
+    NEAR_DUPLICATE_PRUNED_PATH,
+    NEAR_DUPLICATE_SHINGLE_SIZE,
+    NEAR_DUPLICATE_THRESHOLD,
+)
+from src.utils.sqlite_cache import SQLiteCache
+
+# Largest prime below 2**32, so permuted hashes fit in 32 bits and never overflow uint64 arithmetic
+_PRIME = np.uint64(4_294_967_291)
+
+
+def shingles(text: str, size: int = NEAR_DUPLICATE_SHINGLE_SIZE) -> set[str]:
+    """
+    Return the word shingles of a text.
+
+    Parameters
+    ----------
+    text : str
+        Text to split, compared case-insensitively and ignoring punctuation
+    size : int, optional
+        Number of consecutive words per shingle, by default NEAR_DUPLICATE_SHINGLE_SIZE
+
+    Returns
+    -------
+    set[str]
+        Distinct shingles, or the whole text as a single shingle when it has fewer words than ``size``
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """Computes MinHash signatures, whose agreement estimates the Jaccard similarity of two shingle sets."""
+
+    def __init__(
+        self, num_perm: int = NEAR_DUPLICATE_NUM_PERM, shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE, seed: int = 42
+    ):
+        """
+        Initialize the hasher.
+
+        Parameters
+        ----------
+        num_perm : int, optional
+            Number of hash permutations, i.e. signature length, by default NEAR_DUPLICATE_NUM_PERM
+        shingle_size : int, optional
+            Number of consecutive words per shingle, by default NEAR_DUPLICATE_SHINGLE_SIZE
+        seed : int, optional
+            Seed of the permutations. Signatures are only comparable between hashers with the same seed.
+        """
+        rng = np.random.default_rng(seed)
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Return the MinHash signature of a text as a uint64 vector of length ``num_perm``."""
+        hashes = np.array(
+            [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text, self.shingle_size)], dtype=np.uint64
+        )
+        return (((hashes[:, None] % _PRIME) * self._a + self._b) % _PRIME).min(axis=0)
+
+
+class NearDuplicateIndex:
+    """
+    Keeps one exemplar per group of near-identical texts of the same label.
+
+    Texts are compared against the kept exemplars of their label only, so similar pages of different
+    document types are never pruned against each other.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD, hasher: MinHasher | None = None):
+        """
+        Initialize the index.
+
+        Parameters
+        ----------
+        threshold : float, optional
+            Estimated Jaccard similarity from which a text is a near-duplicate, by default NEAR_DUPLICATE_THRESHOLD
+        hasher : MinHasher | None, optional
+            Signature hasher, by default a MinHasher with the default settings
+        """
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        self.seeded = 0
+        self.kept = 0
+        self.pruned = 0
+        self._signatures: dict[str, list[np.ndarray]] = {}
+
+    def seed(self, text: str, label: str) -> None:
+        """
+        Add an already indexed text as an exemplar, without comparing it or counting it as kept.
+
+        Parameters
+        ----------
+        text : str
+            Text to add
+        label : str
+            Label of the text, e.g. its document type
+        """
+        self._signatures.setdefault(label, []).append(self.hasher.signature(text))
+        self.seeded += 1
+
+    def add(self, text: str, label: str, prune: bool = True) -> bool:
+        """
+        Add a text unless it is a near-duplicate of a kept text with the same label.
+
+        Parameters
+        ----------
+        text : str
+            Text to add
+        label : str
+            Label of the text, e.g. its document type
+        prune : bool, optional
+            Whether a near-duplicate text is pruned, by default True. Texts that must be indexed anyway, e.g. new
+            versions of stored texts, are kept as exemplars
+
+        Returns
+        -------
+        bool
+            True if the text was kept, False if it was pruned as a near-duplicate
+        """
+        signature = self.hasher.signature(text)
+        exemplars = self._signatures.setdefault(label, [])
+        if prune and exemplars and (np.stack(exemplars) == signature).mean(axis=1).max() >= self.threshold:
+            self.pruned += 1
+            return False
+
+        exemplars.append(signature)
+        self.kept += 1
+        return True
+
+
+class PrunedPageLog:
+    """
+    Persistent record of the documents pruned as near-duplicates, with the content hash each was pruned at.
+
+    Entries are scoped, e.g. to a collection and threshold, so pruning one collection does not skip pages of
+    another, and a stricter threshold re-examines the pages pruned at a looser one.
+    """
+
+    def __init__(self, scope: str, path: str | Path = NEAR_DUPLICATE_PRUNED_PATH):
+        """
+        Initialize the log.
+
+        Parameters
+        ----------
+        scope : str
+            Scope of the entries, e.g. the vector database, collection and threshold
+        path : str | Path, optional
+            SQLite database of the log, by default NEAR_DUPLICATE_PRUNED_PATH
+        """
+        self.scope = scope
+        self._cache = SQLiteCache(path, table="pruned_pages", max_entries=NEAR_DUPLICATE_PRUNED_MAX_ENTRIES)
+
+    def content_hashes(self, doc_ids: list[str]) -> dict[str, str]:
+        """
+        Look up the pruned documents among ``doc_ids``.
+
+        Parameters
+        ----------
+        doc_ids : list[str]
+            IDs of the documents
+
+        Returns
+        -------
+        dict[str, str]
+            Content hash each pruned document had when it was pruned, by document ID
+        """
+        found = self._cache.get_many([f"{self.scope}:{doc_id}" for doc_id in doc_ids])
+        prefix_length = len(self.scope) + 1
+        return {key[prefix_length:]: value.decode("utf-8") for key, value in found.items()}
+
+    def record(self, content_hashes: dict[str, str]) -> None:
+        """
+        Record pruned documents.
+
+        Parameters
+        ----------
+        content_hashes : dict[str, str]
+            Content hash of each pruned document, by document ID
+        """
+        self._cache.set_many(
+            {f"{self.scope}:{doc_id}": content_hash.encode("utf-8") for doc_id, content_hash in content_hashes.items()}
+        )
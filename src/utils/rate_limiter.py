@@ -0,0 +1,28 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls evenly to at most ``rate_per_second`` per second.
+
+    A rate of zero or less disables limiting.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may issue its next call."""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
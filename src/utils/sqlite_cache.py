@@ -0,0 +1,178 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters of a cache instance."""
+
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SQLiteCache:
+    """
+    Persistent, size-bounded key/value cache stored in a SQLite database.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is exceeded, and entries older than
+    ``ttl_s`` seconds are ignored and deleted on the next write. The database runs in WAL mode so several worker
+    processes can share the same file; their hits and misses are also added to a ``cache_stats`` table shared by
+    every cache of the file (see ``shared_stats``).
+    """
+
+    def __init__(self, path: str | Path, table: str = "cache", max_entries: int = 100_000, ttl_s: float | None = None):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+
+        self.path = Path(path)
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._stats = CacheStats()
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Open the database lazily on first use."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at ON {self.table} (accessed_at)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_stats "
+                "(name TEXT PRIMARY KEY, hits INTEGER NOT NULL, misses INTEGER NOT NULL)"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: Keys to look up
+
+        Returns
+        -------
+            Mapping of the keys found in the cache to their values
+        """
+        if not keys:
+            return {}
+
+        unique_keys = list(dict.fromkeys(keys))
+        found: dict[str, bytes] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders}) AND created_at >= ?",
+                    [*chunk, self._expiry_cutoff()],
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                self.connection.executemany(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                    [(time.time(), key) for key in found],
+                )
+
+            hits = sum(1 for key in keys if key in found)
+            misses = len(keys) - hits
+            self.connection.execute(
+                "INSERT INTO cache_stats (name, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (self.table, hits, misses),
+            )
+            self.connection.commit()
+
+            self._stats.hits += hits
+            self._stats.misses += misses
+
+        return found
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached value for ``key`` or None."""
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: dict[str, bytes]) -> None:
+        """
+        Store several values, evicting the least recently used entries if the cache grows too large.
+
+        Args:
+            items: Mapping of keys to values
+        """
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, value, now, now) for key, value in items.items()],
+            )
+            self._evict()
+            self.connection.commit()
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a single value."""
+        self.set_many({key: value})
+
+    def _expiry_cutoff(self) -> float:
+        """Return the creation time before which entries are expired."""
+        return time.time() - self.ttl_s if self.ttl_s is not None else 0.0
+
+    def _evict(self) -> None:
+        """Delete expired entries, then the least recently used entries above ``max_entries``."""
+        if self.ttl_s is not None:
+            self.connection.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (self._expiry_cutoff(),))
+        (count,) = self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.connection.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters for this instance and the current number of entries."""
+        with self._lock:
+            (entries,) = self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return CacheStats(hits=self._stats.hits, misses=self._stats.misses, entries=entries)
+
+    def shared_stats(self) -> CacheStats:
+        """Return hit/miss counters summed over every process using this cache, and the current number of entries."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT hits, misses FROM cache_stats WHERE name = ?", (self.table,)
+            ).fetchone()
+            (entries,) = self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        hits, misses = row or (0, 0)
+        return CacheStats(hits=hits, misses=misses, entries=entries)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters, including the shared ones."""
+        with self._lock:
+            self.connection.execute(f"DELETE FROM {self.table}")
+            self.connection.execute("DELETE FROM cache_stats WHERE name = ?", (self.table,))
+            self.connection.commit()
+            self._stats = CacheStats()
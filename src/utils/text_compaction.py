@@ -0,0 +1,102 @@
+import math
+import re
+
+from src.constants import LLM_CHARS_PER_TOKEN
+
+# A word broken across lines by a hyphen (or soft hyphen), e.g. "docu-\nment". Continuations starting with an
+# uppercase letter or digit are more likely compounds or ranges, and are left alone.
+_HYPHENATED_RE = re.compile(r"(\w)[-\u00ad][ \t]*\n[ \t]*([a-z])")
+# Four or more repetitions of the same symbol, e.g. table rules "-----", "=====", "|||||" or dot leaders "....."
+_SYMBOL_RUN_RE = re.compile(r"([^\w\s])\1{3,}")
+_SPACES_RE = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_ALPHANUMERIC_RE = re.compile(r"\w")
+_WHITESPACE_RE = re.compile(r"\s")
+
+
+def estimate_tokens(text: str, chars_per_token: float = LLM_CHARS_PER_TOKEN) -> int:
+    """
+    Estimate the number of LLM tokens of a text from its length.
+
+    Parameters
+    ----------
+    text : str
+        Text to estimate
+    chars_per_token : float, optional
+        Average number of characters per token, by default LLM_CHARS_PER_TOKEN
+
+    Returns
+    -------
+    int
+        Estimated number of tokens. Exact counts are only known from the usage reported by the API.
+    """
+    return math.ceil(len(text) / chars_per_token)
+
+
+def compact_text(text: str) -> str:
+    """
+    Remove the noise of OCR output that costs tokens without carrying content.
+
+    Words hyphenated across lines are joined, runs of repeated symbols (table rules, dot leaders) and lines
+    without any letter or digit are dropped, and whitespace is collapsed while keeping line breaks and
+    paragraph boundaries, which carry the layout of forms and tables.
+
+    Parameters
+    ----------
+    text : str
+        Raw OCR text
+
+    Returns
+    -------
+    str
+        Compacted text
+    """
+    text = _HYPHENATED_RE.sub(r"\1\2", text.replace("\r\n", "\n").replace("\r", "\n"))
+    text = _SYMBOL_RUN_RE.sub(" ", text)
+    lines = []
+    for line in text.split("\n"):
+        line = _SPACES_RE.sub(" ", line).strip()
+        # Blank lines are kept as paragraph boundaries, lines of symbols only are dropped
+        if not line or _ALPHANUMERIC_RE.search(line):
+            lines.append(line)
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def truncate_to_budget(
+    text: str, max_tokens: int, head_ratio: float = 0.8, chars_per_token: float = LLM_CHARS_PER_TOKEN
+) -> str:
+    """
+    Shorten a text to an estimated token budget, keeping its beginning and end.
+
+    The beginning carries titles and headers, the end totals and signatures, so the middle is cut. Cuts are
+    moved to the nearest whitespace so no word is split.
+
+    Parameters
+    ----------
+    text : str
+        Text to shorten
+    max_tokens : int
+        Estimated token budget of the result
+    head_ratio : float, optional
+        Share of the budget spent on the beginning of the text, by default 0.8
+    chars_per_token : float, optional
+        Average number of characters per token, by default LLM_CHARS_PER_TOKEN
+
+    Returns
+    -------
+    str
+        The text itself if it fits the budget, otherwise its beginning and end around an omission marker
+    """
+    if estimate_tokens(text, chars_per_token) <= max_tokens:
+        return text
+
+    # The omission marker counts against the budget too
+    max_chars = int(max_tokens * chars_per_token) - len(f"\n[... {len(text)} characters omitted ...]\n")
+    head_end = int(max_chars * head_ratio)
+    tail_start = len(text) - (max_chars - head_end)
+    head_cut = max(text.rfind(" ", 0, head_end), text.rfind("\n", 0, head_end))
+    head_end = head_cut if head_cut > 0 else head_end
+    tail_match = _WHITESPACE_RE.search(text, tail_start)
+    tail_start = tail_match.end() if tail_match else tail_start
+    omitted = tail_start - head_end
+    return f"{text[:head_end].rstrip()}\n[... {omitted} characters omitted ...]\n{text[tail_start:].lstrip()}"
@@ -0,0 +1,114 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api.management.commands.populate_vectordb import Command
+from src.utils.hashing import hash_file, hash_text
+from src.utils.near_duplicates import PrunedPageLog
+
+INVOICE = "Invoice number 1042 issued to Acme Corporation for consulting services rendered in March, total due 500 USD"
+
+
+class InMemoryVectorDB:
+    """Vector database stand-in keeping documents and metadata by ID."""
+
+    def __init__(self):
+        self.docs: dict[str, tuple[str, dict]] = {}
+        self.write_sizes: list[int] = []
+
+    def get_docs(self, ids=None, include_embeddings=False):
+        """Return the stored documents among ``ids``, or every document."""
+        found = [doc_id for doc_id in (ids if ids is not None else self.docs) if doc_id in self.docs]
+        return found, [self.docs[doc_id][0] for doc_id in found], [self.docs[doc_id][1] for doc_id in found], None
+
+    def upsert_docs(self, documents, metadatas, ids):
+        """Insert or replace documents."""
+        self.write_sizes.append(len(ids))
+        for doc_id, document, doc_metadata in zip(ids, documents, metadatas, strict=True):
+            self.docs[doc_id] = (document, dict(doc_metadata))
+
+
+class TestPopulateVectorDB:
+    """Tests for the incremental and near-duplicate handling of the populate_vectordb command."""
+
+    @pytest.fixture
+    def command(self):
+        """Command whose output is discarded."""
+        return Command(stdout=MagicMock())
+
+    async def populate(self, command, vector_db, pruned_pages, file_paths, texts):
+        """Run one incremental, deduplicated population, returning the paths of the files OCR'd."""
+        metadata = [{"document_type": "invoice", "source": f"invoice/{path.name}"} for path in file_paths]
+        file_paths, metadata = command.skip_unchanged_files(
+            vector_db, [path.as_posix() for path in file_paths], metadata, pruned_pages
+        )
+        near_duplicates, replaced_ids = command.build_near_duplicate_index(
+            vector_db, 0.8, [hash_text(file_metadata["source"]) for file_metadata in metadata]
+        )
+        ocr_engine = AsyncMock()
+        ocr_engine.extract_text_from_image_async.side_effect = lambda image_path: texts[image_path]
+        await command._process_files_with_ocr(
+            file_paths, metadata, ocr_engine, 10, vector_db, near_duplicates, pruned_pages, replaced_ids
+        )
+        return file_paths
+
+    @pytest.mark.asyncio
+    async def test_modified_page_that_becomes_a_near_duplicate(self, command, tmp_path):
+        """Test that a stored page modified into a near-duplicate replaces its old version and is then skipped."""
+        original, modified = tmp_path / "0.png", tmp_path / "1.png"
+        original.write_bytes(b"original")
+        modified.write_bytes(b"before")
+        vector_db = InMemoryVectorDB()
+        pruned_pages = PrunedPageLog("numpy/test/0.8", tmp_path / "pruned.sqlite3")
+        texts = {
+            original.as_posix(): INVOICE,
+            modified.as_posix(): "Meeting moved to Thursday afternoon in the main conference room",
+        }
+        await self.populate(command, vector_db, pruned_pages, [original, modified], texts)
+
+        modified.write_bytes(b"after")
+        texts[modified.as_posix()] = INVOICE + " thank you"
+        processed = await self.populate(command, vector_db, pruned_pages, [original, modified], texts)
+
+        modified_id = hash_text("invoice/1.png")
+        assert processed == [modified.as_posix()]
+        assert vector_db.docs[modified_id] == (
+            INVOICE + " thank you",
+            {"document_type": "invoice", "source": "invoice/1.png", "content_hash": hash_file(modified)},
+        )
+        assert pruned_pages.content_hashes([modified_id]) == {}
+        assert await self.populate(command, vector_db, pruned_pages, [original, modified], texts) == []
+
+    @pytest.mark.asyncio
+    async def test_ocr_batches_are_buffered_into_larger_writes(self, command, tmp_path):
+        """Test that small OCR batches are written together, so each write spans several insert chunks."""
+        file_paths = [(tmp_path / f"{i}.png").as_posix() for i in range(25)]
+        metadata = [{"document_type": "invoice", "source": f"invoice/{i}.png"} for i in range(25)]
+        ocr_engine = AsyncMock()
+        ocr_engine.extract_text_from_image_async.side_effect = lambda image_path: f"text of {image_path}"
+        vector_db = InMemoryVectorDB()
+
+        written, failed_paths, _ = await command._process_files_with_ocr(
+            file_paths, metadata, ocr_engine, 5, vector_db, write_size=20
+        )
+
+        assert (written, failed_paths) == (25, [])
+        assert vector_db.write_sizes == [20, 5]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_reports_its_files(self, command, tmp_path):
+        """Test that the files of a failed write are returned for a retry."""
+        file_paths = [(tmp_path / f"{i}.png").as_posix() for i in range(4)]
+        metadata = [{"document_type": "invoice", "source": f"invoice/{i}.png"} for i in range(4)]
+        ocr_engine = AsyncMock()
+        ocr_engine.extract_text_from_image_async.return_value = "text"
+        vector_db = MagicMock()
+        vector_db.upsert_docs.side_effect = RuntimeError("embedding failed")
+
+        written, failed_paths, failed_metadata = await command._process_files_with_ocr(
+            file_paths, metadata, ocr_engine, 2, vector_db, write_size=10
+        )
+
+        assert written == 0
+        assert failed_paths == file_paths
+        assert failed_metadata == metadata
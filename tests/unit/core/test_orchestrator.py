@@ -1,13 +1,40 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
+from pydantic import ValidationError
 
-from src.core.orchestrator import extract_entities_impl
+from src.constants import DOCUMENT_FIELDS, EXTRACTION_REQUIRED_FIELDS, LLM_STAGE_SETTINGS
+from src.core.orchestrator import (
+    extract_entities_impl,
+    extract_entities_with_cascade,
+    get_centroid_classifier,
+    get_query_batcher,
+    get_vector_db,
+    measure_compaction,
+    stream_entities_impl,
+)
+from src.llm.batches import BatchExtractor
+from src.llm.cache import LLMResponseCache
+from src.llm.prompt_registry import get_prompt_registry
+from src.schemas.llm import LLMResponse, LLMUsage
 
 
 class TestExtractEntitiesImpl:
     """Unit tests for the extract_entities_impl function."""
 
+    @pytest.fixture(autouse=True)
+    def reset_query_batcher(self):
+        """Ensure every test builds its batcher from the patched vector DB factory, without a batching window."""
+        for cached in (get_vector_db, get_query_batcher, get_centroid_classifier):
+            cached.cache_clear()
+        # Prompts are compiled at startup, not within the timed request
+        get_prompt_registry()
+        with patch("src.core.orchestrator.VECTOR_DB_BATCH_WINDOW_MS", 0):
+            yield
+        for cached in (get_vector_db, get_query_batcher, get_centroid_classifier):
+            cached.cache_clear()
+
     @pytest.fixture
     def mock_image_input(self):
         """Mock image input as bytes."""
@@ -26,18 +53,27 @@ class TestExtractEntitiesImpl:
     @pytest.fixture
     def mock_llm_response(self):
         """Mock LLM response."""
-        return MagicMock(text="invoice")
+        return LLMResponse(text="invoice", model="claude", usage=LLMUsage(input_tokens=20, cache_read_input_tokens=900))
 
     @pytest.fixture
     def mock_extraction_response(self):
         """Mock extraction response."""
-        return MagicMock(text='{"field1": "value1", "field2": "value2"}')
+        return LLMResponse(
+            text="",
+            model="claude",
+            usage=LLMUsage(input_tokens=600, output_tokens=30, cache_creation_input_tokens=580),
+            tool_input={
+                "invoice_number": 1001,
+                "invoice_date": "2024-01-15",
+                "due_date": None,
+                "vendor_details": "ACME",
+                "total_amount": 99.5,
+            },
+        )
 
-    @patch("src.core.orchestrator.extract_valid_json")
+    @patch("src.core.orchestrator.get_cached_message", return_value=None)
     @patch("src.core.orchestrator.extract_entities_from_doc")
-    @patch("src.core.orchestrator.create_extraction_prompt")
     @patch("src.core.orchestrator.validate_document_type")
-    @patch("src.core.orchestrator.create_document_type_validation_prompt")
     @patch("src.core.orchestrator.VectorDBFactory")
     @patch("src.core.orchestrator.OCREngineFactory")
     @patch("src.core.orchestrator.time.time")
@@ -47,11 +83,9 @@ class TestExtractEntitiesImpl:
         mock_time,
         mock_ocr_factory,
         mock_vector_factory,
-        mock_validation_prompt,
         mock_validate_doc_type,
-        mock_extraction_prompt,
         mock_extract_entities,
-        mock_extract_json,
+        mock_get_cached_message,
         mock_image_input,
         mock_ocr_response,
         mock_vector_db_response,
@@ -69,25 +103,56 @@ class TestExtractEntitiesImpl:
         mock_vector_db.find_similar_docs.return_value = mock_vector_db_response
         mock_vector_factory.create.return_value = mock_vector_db
 
-        mock_validation_prompt.return_value = "validation prompt"
         mock_validate_doc_type.return_value = mock_llm_response
-        mock_extraction_prompt.return_value = "extraction prompt"
         mock_extract_entities.return_value = mock_extraction_response
-        mock_extract_json.return_value = {"field1": "value1", "field2": "value2"}
 
         result = await extract_entities_impl(mock_image_input)
 
         assert result == {
             "document_type": "invoice",
             "confidence": 0.8,
-            "entities": {"field1": "value1", "field2": "value2"},
+            "entities": {
+                "invoice_number": "1001",
+                "invoice_date": "2024-01-15",
+                "due_date": None,
+                "vendor_details": "ACME",
+                "total_amount": 99.5,
+            },
             "processing_time": 0.0,
+            "extraction_tier": "extraction_fast",
+            "models": {"validation": "claude", "extraction_fast": "claude"},
+            "usage": {
+                "validation": {
+                    "input_tokens": 20,
+                    "output_tokens": 0,
+                    "cache_creation_input_tokens": 0,
+                    "cache_read_input_tokens": 900,
+                },
+                "extraction_fast": {
+                    "input_tokens": 600,
+                    "output_tokens": 30,
+                    "cache_creation_input_tokens": 580,
+                    "cache_read_input_tokens": 0,
+                },
+            },
+            "compaction": {
+                "raw_tokens": 11,
+                "compacted_tokens": 11,
+                "sent_tokens": {"validation": 11, "extraction": 11},
+                "tokens_saved": 0,
+            },
         }
 
         mock_ocr.extract_text_from_image_async.assert_called_once_with(image_input=mock_image_input)
         mock_vector_factory.create.assert_called_once_with("chromadb")
         mock_vector_db.get_or_create_collection.assert_called_once()
-        mock_vector_db.find_similar_docs.assert_called_once_with(mock_ocr_response)
+        mock_vector_db.find_similar_docs.assert_called_once_with(mock_ocr_response, 10)
+        assert mock_validate_doc_type.call_args.args[2] == LLM_STAGE_SETTINGS["validation"]
+        mock_extract_entities.assert_called_once()
+        assert mock_extract_entities.call_args.args[3:] == (LLM_STAGE_SETTINGS["extraction_fast"], "extraction_fast")
+        extraction_tool = mock_extract_entities.call_args.args[2]
+        assert extraction_tool["name"] == "record_entities"
+        assert "total_amount" in extraction_tool["input_schema"]["properties"]
 
     @patch("src.core.orchestrator.OCREngineFactory")
     @pytest.mark.asyncio
@@ -101,7 +166,6 @@ class TestExtractEntitiesImpl:
             await extract_entities_impl(mock_image_input)
 
     @patch("src.core.orchestrator.validate_document_type")
-    @patch("src.core.orchestrator.create_document_type_validation_prompt")
     @patch("src.core.orchestrator.VectorDBFactory")
     @patch("src.core.orchestrator.OCREngineFactory")
     @pytest.mark.asyncio
@@ -109,7 +173,6 @@ class TestExtractEntitiesImpl:
         self,
         mock_ocr_factory,
         mock_vector_factory,
-        mock_validation_prompt,
         mock_validate_doc_type,
         mock_image_input,
         mock_ocr_response,
@@ -124,12 +187,44 @@ class TestExtractEntitiesImpl:
         mock_vector_db.find_similar_docs.return_value = mock_vector_db_response
         mock_vector_factory.create.return_value = mock_vector_db
 
-        mock_validation_prompt.return_value = "validation prompt"
         mock_validate_doc_type.return_value = MagicMock(text="invalid_document_type")
 
         with pytest.raises(AssertionError, match="Document type validation failed"):
             await extract_entities_impl(mock_image_input)
 
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    @patch("src.core.orchestrator.validate_document_type")
+    @patch("src.core.orchestrator.VectorDBFactory")
+    @patch("src.core.orchestrator.OCREngineFactory")
+    @pytest.mark.asyncio
+    async def test_extract_entities_impl_invalid_entities(
+        self,
+        mock_ocr_factory,
+        mock_vector_factory,
+        mock_validate_doc_type,
+        mock_extract_entities,
+        mock_image_input,
+        mock_ocr_response,
+        mock_vector_db_response,
+        mock_llm_response,
+    ):
+        """Test that a tool input not matching the schema of the document type is rejected."""
+        mock_ocr = AsyncMock()
+        mock_ocr.extract_text_from_image_async.return_value = mock_ocr_response
+        mock_ocr_factory.create.return_value = mock_ocr
+
+        mock_vector_db = MagicMock()
+        mock_vector_db.find_similar_docs.return_value = mock_vector_db_response
+        mock_vector_factory.create.return_value = mock_vector_db
+
+        mock_validate_doc_type.return_value = mock_llm_response
+        mock_extract_entities.return_value = LLMResponse(
+            text="", model="claude", usage=LLMUsage(), tool_input={"invoice_number": "1001"}
+        )
+
+        with pytest.raises(ValidationError, match="invoice_date"):
+            await extract_entities_impl(mock_image_input)
+
     @patch("src.core.orchestrator.VectorDBFactory")
     @patch("src.core.orchestrator.OCREngineFactory")
     @pytest.mark.asyncio
@@ -147,3 +242,238 @@ class TestExtractEntitiesImpl:
 
         with pytest.raises(Exception, match="Vector DB failed"):
             await extract_entities_impl(mock_image_input)
+
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    @patch("src.core.orchestrator.validate_document_type")
+    @patch("src.core.orchestrator.VectorDBFactory")
+    @patch("src.core.orchestrator.OCREngineFactory")
+    @patch("src.core.orchestrator.DOCUMENT_CLASSIFIER", "centroid")
+    @pytest.mark.asyncio
+    async def test_extract_entities_impl_centroid_classifier(
+        self,
+        mock_ocr_factory,
+        mock_vector_factory,
+        mock_validate_doc_type,
+        mock_extract_entities,
+        mock_image_input,
+        mock_ocr_response,
+        mock_llm_response,
+        mock_extraction_response,
+    ):
+        """Test that the centroid classifier replaces the similarity query when configured."""
+        mock_ocr = AsyncMock()
+        mock_ocr.extract_text_from_image_async.return_value = mock_ocr_response
+        mock_ocr_factory.create.return_value = mock_ocr
+
+        mock_vector_db = MagicMock()
+        mock_vector_db.get_docs.return_value = (
+            ["id1", "id2"],
+            ["doc1", "doc2"],
+            [{"document_type": "invoice"}, {"document_type": "memo"}],
+            np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32),
+        )
+        mock_vector_db.count.return_value = 2
+        mock_vector_db.embed_texts.return_value = np.array([[0.9, 0.1]], dtype=np.float32)
+        mock_vector_factory.create.return_value = mock_vector_db
+
+        mock_validate_doc_type.return_value = mock_llm_response
+        mock_extract_entities.return_value = mock_extraction_response
+
+        result = await extract_entities_impl(mock_image_input)
+
+        assert result["document_type"] == "invoice"
+        assert 0.5 < result["confidence"] <= 1
+        mock_vector_db.embed_texts.assert_called_once_with([mock_ocr_response])
+        mock_vector_db.find_similar_docs.assert_not_called()
+
+    @patch("src.core.orchestrator.stream_entities_from_doc")
+    @patch("src.core.orchestrator.validate_document_type")
+    @patch("src.core.orchestrator.VectorDBFactory")
+    @patch("src.core.orchestrator.OCREngineFactory")
+    @pytest.mark.asyncio
+    async def test_stream_entities_impl(
+        self,
+        mock_ocr_factory,
+        mock_vector_factory,
+        mock_validate_doc_type,
+        mock_stream_entities,
+        mock_image_input,
+        mock_ocr_response,
+        mock_vector_db_response,
+        mock_llm_response,
+        mock_extraction_response,
+    ):
+        """Test that fields are streamed as events before the validated result."""
+        mock_ocr = AsyncMock()
+        mock_ocr.extract_text_from_image_async.return_value = mock_ocr_response
+        mock_ocr_factory.create.return_value = mock_ocr
+        mock_vector_db = MagicMock()
+        mock_vector_db.find_similar_docs.return_value = mock_vector_db_response
+        mock_vector_factory.create.return_value = mock_vector_db
+        mock_validate_doc_type.return_value = mock_llm_response
+        mock_stream_entities.return_value = iter(
+            [*mock_extraction_response.tool_input.items(), mock_extraction_response]
+        )
+
+        events = [event async for event in stream_entities_impl(mock_image_input)]
+
+        assert events[0] == {"event": "document_type", "document_type": "invoice", "confidence": 0.8}
+        assert [(event["name"], event["value"]) for event in events[1:-1]] == list(
+            mock_extraction_response.tool_input.items()
+        )
+        result = events[-1]
+        assert result["event"] == "result"
+        assert result["entities"]["invoice_number"] == "1001"
+        assert result["extraction_tier"] == "extraction"
+        assert result["time_to_first_field"] == events[1]["elapsed"]
+        assert mock_stream_entities.call_args.args[3:] == (LLM_STAGE_SETTINGS["extraction"], "extraction")
+
+
+class TestExtractEntitiesWithCascade:
+    """Unit tests for the extract_entities_with_cascade function."""
+
+    TIERS = (
+        ("extraction_fast", LLM_STAGE_SETTINGS["extraction_fast"]),
+        ("extraction", LLM_STAGE_SETTINGS["extraction"]),
+    )
+
+    @pytest.fixture(autouse=True)
+    def cache(self, tmp_path):
+        """Replace the process-wide LLM response cache with one in a temporary directory."""
+        cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+        with patch("src.llm.llm.get_llm_cache", return_value=cache):
+            yield cache
+
+    @staticmethod
+    def make_response(model: str, **entities) -> LLMResponse:
+        """Build an extraction response whose tool input holds the given invoice entities."""
+        tool_input = {
+            "invoice_number": "1001",
+            "invoice_date": None,
+            "due_date": None,
+            "vendor_details": "ACME",
+            "total_amount": 99.5,
+            **entities,
+        }
+        return LLMResponse(text="", model=model, usage=LLMUsage(output_tokens=30), tool_input=tool_input)
+
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    def test_fast_tier_is_kept(self, mock_extract_entities):
+        """Test that complete entities of the fast tier are returned without calling the large model."""
+        mock_extract_entities.return_value = self.make_response("haiku")
+
+        entities, tier, responses = extract_entities_with_cascade("invoice", "text", list(self.TIERS))
+
+        assert tier == "extraction_fast"
+        assert list(responses) == ["extraction_fast"]
+        assert entities["vendor_details"] == "ACME"
+
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    def test_escalates_on_missing_required_field(self, mock_extract_entities):
+        """Test that a required field left empty by the fast tier escalates to the large model."""
+        mock_extract_entities.side_effect = [
+            self.make_response("haiku", total_amount=None),
+            self.make_response("sonnet"),
+        ]
+
+        entities, tier, responses = extract_entities_with_cascade("invoice", "text", list(self.TIERS))
+
+        assert tier == "extraction"
+        assert list(responses) == ["extraction_fast", "extraction"]
+        assert entities["total_amount"] == 99.5
+        assert mock_extract_entities.call_args.args[3:] == (LLM_STAGE_SETTINGS["extraction"], "extraction")
+
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    def test_escalates_on_invalid_entities(self, mock_extract_entities):
+        """Test that entities not matching the schema escalate to the large model."""
+        mock_extract_entities.side_effect = [
+            LLMResponse(text="", model="haiku", usage=LLMUsage(), tool_input={"invoice_number": "1001"}),
+            self.make_response("sonnet"),
+        ]
+
+        _, tier, _ = extract_entities_with_cascade("invoice", "text", list(self.TIERS))
+
+        assert tier == "extraction"
+
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    def test_last_tier_is_held_to_the_schema_only(self, mock_extract_entities):
+        """Test that missing required fields are accepted from the last tier, but invalid entities are not."""
+        mock_extract_entities.return_value = self.make_response("sonnet", total_amount=None)
+
+        entities, tier, _ = extract_entities_with_cascade("invoice", "text", list(self.TIERS[1:]))
+
+        assert tier == "extraction"
+        assert entities["total_amount"] is None
+
+        mock_extract_entities.return_value = LLMResponse(text="{}", model="sonnet", usage=LLMUsage())
+        with pytest.raises(AssertionError, match="record_entities"):
+            extract_entities_with_cascade("invoice", "text", list(self.TIERS[1:]))
+
+    @patch("src.core.orchestrator.extract_entities_from_doc")
+    def test_field_selection(self, mock_extract_entities):
+        """Test that a selection is extracted with a capped max_tokens and only its required fields checked."""
+        mock_extract_entities.return_value = LLMResponse(
+            text="", model="haiku", usage=LLMUsage(), tool_input={"invoice_number": "1001", "total_amount": 99.5}
+        )
+
+        entities, tier, _ = extract_entities_with_cascade(
+            "invoice", "text", list(self.TIERS), fields=["invoice_number", "total_amount"]
+        )
+
+        assert tier == "extraction_fast"
+        assert entities == {"invoice_number": "1001", "total_amount": 99.5}
+        prompt, _, tool, settings, _ = mock_extract_entities.call_args.args
+        assert "vendor_details" not in prompt.prefix
+        assert set(tool["input_schema"]["properties"]) == {"invoice_number", "total_amount"}
+        assert settings.max_tokens < LLM_STAGE_SETTINGS["extraction_fast"].max_tokens
+        assert settings.model == LLM_STAGE_SETTINGS["extraction_fast"].model
+
+    def test_batch_results_skip_the_fast_tier(self, cache):
+        """Test that a document extracted by the batch extractor is answered from the cache of the last tier."""
+        registry = get_prompt_registry()
+        params = BatchExtractor(batches=MagicMock(), prompt_registry=registry).build_request(
+            "doc-0", "invoice", "Invoice 1001 from ACME"
+        )["params"]
+        key = cache.key(
+            params["model"],
+            params["temperature"],
+            params["max_tokens"],
+            registry.extraction_prompt("invoice"),
+            params["messages"][0]["content"],
+            params["tools"][0],
+        )
+        cache.set("extraction", key, self.make_response(params["model"]))
+
+        with patch("src.llm.llm.client") as mock_client:
+            entities, tier, responses = extract_entities_with_cascade(
+                "invoice", "Invoice 1001 from ACME", list(self.TIERS)
+            )
+
+        mock_client.messages.create.assert_not_called()
+        assert tier == "extraction"
+        assert responses["extraction"].cached is True
+        assert entities["invoice_number"] == "1001"
+
+    def test_required_fields_exist(self):
+        """Test that every required field is a field of its document type."""
+        for document_type, required_fields in EXTRACTION_REQUIRED_FIELDS.items():
+            names = {field["name"] for field in DOCUMENT_FIELDS[document_type]}
+            assert set(required_fields) <= names, document_type
+
+
+class TestMeasureCompaction:
+    """Unit tests for the measure_compaction function."""
+
+    def test_tokens_saved_per_call(self):
+        """Test that savings are counted once per LLM call, with extraction tiers sharing a budget."""
+        compaction = measure_compaction(
+            "x" * 700,
+            "x" * 350,
+            {"validation": "x" * 70, "extraction": "x" * 350},
+            ["validation", "extraction_fast", "extraction"],
+        )
+
+        assert compaction.raw_tokens == 200
+        assert compaction.compacted_tokens == 100
+        assert compaction.sent_tokens == {"validation": 20, "extraction": 100}
+        assert compaction.tokens_saved == 180 + 100 + 100
@@ -0,0 +1,191 @@
+import itertools
+import json
+import re
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from src.llm.batches import BatchExtractor
+from src.llm.cache import LLMResponseCache
+from src.llm.llm import extract_entities_from_doc
+from src.llm.prompt_registry import PromptRegistry
+
+
+class StubMessageBatches:
+    """
+    Local stand-in for ``client.messages.batches``.
+
+    Batches end after ``polls_until_ended`` status checks, and every request is answered by ``respond``, which
+    receives the request parameters and returns either the input of the forced tool call or an error type.
+    """
+
+    def __init__(self, respond: Callable[[dict[str, Any]], dict[str, Any] | str], polls_until_ended: int = 2):
+        self.respond = respond
+        self.polls_until_ended = polls_until_ended
+        self.created: dict[str, list[dict[str, Any]]] = {}
+        self._polls: dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    def create(self, requests: list[dict[str, Any]]) -> SimpleNamespace:
+        """Store a batch of requests."""
+        batch_id = f"msgbatch_{next(self._ids)}"
+        self.created[batch_id] = requests
+        self._polls[batch_id] = 0
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    def retrieve(self, batch_id: str) -> SimpleNamespace:
+        """Report a batch as ended once it has been polled enough times."""
+        self._polls[batch_id] += 1
+        ended = self._polls[batch_id] >= self.polls_until_ended
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status="ended" if ended else "in_progress",
+            request_counts=SimpleNamespace(succeeded=len(self.created[batch_id]) if ended else 0),
+        )
+
+    def results(self, batch_id: str):
+        """Yield one result per request of an ended batch."""
+        for request in self.created[batch_id]:
+            answer = self.respond(request["params"])
+            if isinstance(answer, str):
+                result = SimpleNamespace(type=answer)
+            else:
+                message = SimpleNamespace(
+                    model=request["params"]["model"],
+                    stop_reason="tool_use",
+                    content=[SimpleNamespace(type="tool_use", input=answer)],
+                    usage=SimpleNamespace(
+                        input_tokens=500, output_tokens=40, cache_creation_input_tokens=None, cache_read_input_tokens=0
+                    ),
+                )
+                result = SimpleNamespace(type="succeeded", message=message)
+            yield SimpleNamespace(custom_id=request["custom_id"], result=result)
+
+
+def answer_invoice(params: dict[str, Any]) -> dict[str, Any] | str:
+    """Answer with the invoice number found in the document text, or fail documents without one."""
+    match = re.search(r"Invoice (\d+)", params["messages"][0]["content"])
+    if match is None:
+        return "errored"
+    return {
+        "invoice_number": match.group(1),
+        "invoice_date": None,
+        "due_date": None,
+        "vendor_details": "ACME",
+        "total_amount": 10.5,
+    }
+
+
+class TestBatchExtractor:
+    """Tests for the BatchExtractor class."""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, tmp_path):
+        """Replace the process-wide LLM response cache with one in a temporary directory."""
+        cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+        with patch("src.llm.batches.get_llm_cache", return_value=cache):
+            yield cache
+
+    @pytest.fixture
+    def documents(self):
+        """Documents to extract, keyed by custom ID."""
+        return {
+            "doc-0": ("invoice", "Invoice 1001 from ACME"),
+            "doc-1": ("invoice", "Invoice 1002 from ACME"),
+            "doc-2": ("invoice", "A blurry scan"),
+        }
+
+    def test_build_request(self):
+        """Test that batch requests force the extraction tool of the document type."""
+        extractor = BatchExtractor(batches=StubMessageBatches(answer_invoice), prompt_registry=PromptRegistry())
+
+        request = extractor.build_request("doc-0", "memo", "text")
+
+        assert request["custom_id"] == "doc-0"
+        assert request["params"]["tool_choice"] == {"type": "tool", "name": "record_entities"}
+        assert request["params"]["messages"] == [{"role": "user", "content": "<document_text>text</document_text>"}]
+        assert "action_items" in request["params"]["tools"][0]["input_schema"]["properties"]
+
+    def test_run(self, documents):
+        """Test that results are mapped back to their documents, including failed requests."""
+        batches = StubMessageBatches(answer_invoice)
+        extractor = BatchExtractor(batches=batches, prompt_registry=PromptRegistry(), poll_interval_s=0)
+
+        results = extractor.run(documents)
+
+        assert list(results) == ["doc-0", "doc-1", "doc-2"]
+        assert results["doc-0"].entities["invoice_number"] == "1001"
+        assert results["doc-1"].entities["invoice_number"] == "1002"
+        assert results["doc-1"].usage.output_tokens == 40
+        assert results["doc-2"].entities is None
+        assert results["doc-2"].error == "errored"
+
+    def test_submit_splits_batches(self, documents):
+        """Test that requests are split into batches of at most max_requests."""
+        batches = StubMessageBatches(answer_invoice)
+        extractor = BatchExtractor(batches=batches, prompt_registry=PromptRegistry(), poll_interval_s=0, max_requests=2)
+
+        batch_ids = extractor.submit(documents)
+
+        assert [len(batches.created[batch_id]) for batch_id in batch_ids] == [2, 1]
+        extractor.wait(batch_ids)
+        assert extractor.collect(batch_ids, documents)["doc-1"].entities is not None
+
+    def test_submit_splits_batches_by_size(self, documents):
+        """Test that requests are split into batches of at most max_bytes of serialized requests."""
+        batches = StubMessageBatches(answer_invoice)
+        extractor = BatchExtractor(batches=batches, prompt_registry=PromptRegistry(), poll_interval_s=0)
+        request_bytes = len(json.dumps(extractor.build_request("doc-0", *documents["doc-0"])).encode())
+        extractor.max_bytes = 2 * request_bytes + 10
+
+        batch_ids = extractor.submit(documents)
+
+        assert [len(batches.created[batch_id]) for batch_id in batch_ids] == [2, 1]
+        for batch_id in batch_ids:
+            assert len(json.dumps(batches.created[batch_id]).encode()) <= extractor.max_bytes
+
+    def test_invalid_entities(self):
+        """Test that results not matching the schema are reported as errors."""
+        extractor = BatchExtractor(
+            batches=StubMessageBatches(lambda params: {"invoice_number": "1"}),
+            prompt_registry=PromptRegistry(),
+            poll_interval_s=0,
+        )
+
+        result = extractor.run({"doc-0": ("invoice", "Invoice 1")})["doc-0"]
+
+        assert result.entities is None
+        assert "invoice_date" in result.error
+
+    def test_wait_timeout(self):
+        """Test that waiting gives up after the timeout."""
+        batches = StubMessageBatches(answer_invoice, polls_until_ended=10**6)
+        extractor = BatchExtractor(batches=batches, prompt_registry=PromptRegistry(), poll_interval_s=0)
+        batch_ids = extractor.submit({"doc-0": ("invoice", "Invoice 1")})
+
+        with pytest.raises(TimeoutError, match=batch_ids[0]):
+            extractor.wait(batch_ids, timeout_s=0)
+
+    def test_results_are_cached(self, documents, cache):
+        """Test that valid results answer later interactive calls from the cache."""
+        registry = PromptRegistry()
+        extractor = BatchExtractor(
+            batches=StubMessageBatches(answer_invoice), prompt_registry=registry, poll_interval_s=0
+        )
+
+        extractor.run(documents)
+
+        assert cache.stats()["extraction"].entries == 2
+        with patch("src.llm.llm.get_llm_cache", return_value=cache), patch("src.llm.llm.client") as mock_client:
+            response = extract_entities_from_doc(
+                registry.extraction_prompt("invoice"),
+                "<document_text>Invoice 1001 from ACME</document_text>",
+                registry.extraction_tool("invoice"),
+            )
+
+        mock_client.messages.create.assert_not_called()
+        assert response.cached is True
+        assert response.tool_input["invoice_number"] == "1001"
@@ -0,0 +1,269 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.constants import LLM_STAGE_SETTINGS
+from src.llm.cache import LLMResponseCache
+from src.llm.llm import (
+    create_cached_message,
+    create_message,
+    resolve_llm_settings,
+    stream_entities_from_doc,
+    system_blocks,
+    validate_document_type,
+)
+from src.schemas.llm import LLMResponse, SystemPrompt
+
+EXTRACTION_TOOL = {"name": "record_entities", "input_schema": {"type": "object"}}
+
+
+def make_message(text: str, cache_read: int | None = 0, cache_write: int | None = 0) -> MagicMock:
+    """Build a Messages API response with one text block."""
+    message = MagicMock()
+    message.model = "claude-test"
+    message.stop_reason = "end_turn"
+    message.content = [MagicMock(type="text", text=text)]
+    message.usage = MagicMock(
+        input_tokens=12,
+        output_tokens=3,
+        cache_read_input_tokens=cache_read,
+        cache_creation_input_tokens=cache_write,
+    )
+    return message
+
+
+class TestSystemBlocks:
+    """Tests for the system_blocks function."""
+
+    def test_prefix_is_cached(self):
+        """Test that only the prefix carries a cache breakpoint."""
+        blocks = system_blocks(SystemPrompt(prefix="catalog", suffix="selection"))
+
+        assert blocks == [
+            {"type": "text", "text": "catalog", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "selection"},
+        ]
+
+    def test_empty_suffix_is_omitted(self):
+        """Test that a prompt without suffix is a single cached block."""
+        assert len(system_blocks(SystemPrompt(prefix="catalog"))) == 1
+
+
+class TestCreateMessage:
+    """Tests for the create_message function."""
+
+    @patch("src.llm.llm.client")
+    def test_create_message(self, mock_client):
+        """Test the request parameters and the parsed response."""
+        mock_client.messages.create.return_value = make_message("invoice", cache_read=900)
+
+        response = create_message(SystemPrompt(prefix="catalog"), "<document_text>...</document_text>", max_tokens=5)
+
+        kwargs = mock_client.messages.create.call_args.kwargs
+        assert kwargs["max_tokens"] == 5
+        assert kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert kwargs["messages"] == [{"role": "user", "content": "<document_text>...</document_text>"}]
+        assert response.text == "invoice"
+        assert response.model == "claude-test"
+        assert response.usage.cache_read_input_tokens == 900
+        assert response.usage.input_tokens == 12
+
+    @patch("src.llm.llm.client")
+    def test_create_message_without_cache_usage(self, mock_client):
+        """Test that missing cache counts are reported as zero."""
+        mock_client.messages.create.return_value = make_message("memo", cache_read=None, cache_write=None)
+
+        response = create_message(SystemPrompt(prefix="catalog"), "text")
+
+        assert response.usage.cache_read_input_tokens == 0
+        assert response.usage.cache_creation_input_tokens == 0
+
+    @patch("src.llm.llm.client")
+    def test_create_message_with_tool(self, mock_client):
+        """Test that a tool is forced and its input returned."""
+        message = make_message("")
+        message.content = [MagicMock(type="tool_use", input={"invoice_number": "1001"})]
+        mock_client.messages.create.return_value = message
+        tool = {"name": "record_entities", "description": "Record", "input_schema": {"type": "object"}}
+
+        response = create_message(SystemPrompt(prefix="fields"), "text", tool=tool)
+
+        kwargs = mock_client.messages.create.call_args.kwargs
+        assert kwargs["tools"] == [tool]
+        assert kwargs["tool_choice"] == {"type": "tool", "name": "record_entities"}
+        assert response.tool_input == {"invoice_number": "1001"}
+        assert response.text == ""
+
+    @patch("src.llm.llm.client")
+    def test_create_message_without_tool(self, mock_client):
+        """Test that text calls do not send tools."""
+        mock_client.messages.create.return_value = make_message("memo")
+
+        response = create_message(SystemPrompt(prefix="catalog"), "text")
+
+        assert "tools" not in mock_client.messages.create.call_args.kwargs
+        assert response.tool_input is None
+
+
+class TestCreateCachedMessage:
+    """Tests for the create_cached_message function."""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, tmp_path):
+        """Replace the process-wide LLM response cache with one in a temporary directory."""
+        cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+        with patch("src.llm.llm.get_llm_cache", return_value=cache):
+            yield cache
+
+    @patch("src.llm.llm.client")
+    def test_repeated_call_is_cached(self, mock_client, cache):
+        """Test that a repeated document is answered from the cache."""
+        mock_client.messages.create.return_value = make_message("invoice")
+
+        first = create_cached_message("validation", SystemPrompt(prefix="catalog"), "Invoice\nNo. 42")
+        second = create_cached_message("validation", SystemPrompt(prefix="catalog"), "Invoice No. 42")
+
+        mock_client.messages.create.assert_called_once()
+        assert second.text == first.text == "invoice"
+        assert second.cached is True
+        assert second.usage.input_tokens == 0
+        assert cache.stats()["validation"].hits == 1
+
+    @patch("src.llm.llm.get_llm_tracer")
+    @patch("src.llm.llm.client")
+    def test_calls_are_traced(self, mock_client, mock_get_tracer):
+        """Test that new and cached responses are both handed to the tracer."""
+        mock_client.messages.create.return_value = make_message("invoice")
+
+        create_cached_message("validation", SystemPrompt(prefix="catalog"), "text")
+        create_cached_message("validation", SystemPrompt(prefix="catalog"), "text")
+
+        calls = mock_get_tracer.return_value.record.call_args_list
+        assert [call.args[0] for call in calls] == ["validation", "validation"]
+        assert [call.args[3].cached for call in calls] == [False, True]
+
+    @patch("src.llm.llm.client")
+    def test_truncated_response_is_not_cached(self, mock_client):
+        """Test that responses cut off by max_tokens are requested again."""
+        message = make_message("{")
+        message.stop_reason = "max_tokens"
+        mock_client.messages.create.return_value = message
+
+        create_cached_message("extraction", SystemPrompt(prefix="fields"), "text")
+        create_cached_message("extraction", SystemPrompt(prefix="fields"), "text")
+
+        assert mock_client.messages.create.call_count == 2
+
+    @patch("src.llm.llm.LLM_CACHE_ENABLED", False)
+    @patch("src.llm.llm.client")
+    def test_cache_disabled(self, mock_client, cache):
+        """Test that the cache is bypassed when disabled."""
+        mock_client.messages.create.return_value = make_message("invoice")
+
+        create_cached_message("validation", SystemPrompt(prefix="catalog"), "text")
+        create_cached_message("validation", SystemPrompt(prefix="catalog"), "text")
+
+        assert mock_client.messages.create.call_count == 2
+        assert cache.stats()["validation"].entries == 0
+
+
+class TestStreamEntitiesFromDoc:
+    """Tests for the stream_entities_from_doc function."""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, tmp_path):
+        """Replace the process-wide LLM response cache with one in a temporary directory."""
+        cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+        with patch("src.llm.llm.get_llm_cache", return_value=cache):
+            yield cache
+
+    @staticmethod
+    def mock_stream(mock_client, chunks: list[str]) -> None:
+        """Make the client stream the tool input in chunks of partial JSON."""
+        events = [MagicMock(type="message_start")]
+        events += [
+            MagicMock(type="content_block_delta", delta=MagicMock(type="input_json_delta", partial_json=chunk))
+            for chunk in chunks
+        ]
+        message = make_message("")
+        message.content = [MagicMock(type="tool_use", input={"invoice_number": "42", "total_amount": 9.5})]
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(events)
+        stream.get_final_message.return_value = message
+        mock_client.messages.stream.return_value.__enter__.return_value = stream
+
+    @patch("src.llm.llm.client")
+    def test_fields_are_yielded_as_they_complete(self, mock_client, cache):
+        """Test that each field is yielded once its value is complete, followed by the cached response."""
+        self.mock_stream(mock_client, ['{"invoice_number": "4', '2", "total_', 'amount": 9.5', "}"])
+
+        items = stream_entities_from_doc(SystemPrompt(prefix="fields"), "text", EXTRACTION_TOOL)
+
+        assert next(items) == ("invoice_number", "42")
+        assert next(items) == ("total_amount", 9.5)
+        response = next(items)
+        assert isinstance(response, LLMResponse)
+        assert response.tool_input == {"invoice_number": "42", "total_amount": 9.5}
+        assert mock_client.messages.stream.call_args.kwargs["tool_choice"] == {
+            "type": "tool",
+            "name": "record_entities",
+        }
+        assert cache.stats()["extraction"].entries == 1
+
+    @patch("src.llm.llm.client")
+    def test_cached_response_yields_every_field(self, mock_client):
+        """Test that a cached extraction is replayed without streaming."""
+        self.mock_stream(mock_client, ['{"invoice_number": "42", "total_amount": 9.5}'])
+        list(stream_entities_from_doc(SystemPrompt(prefix="fields"), "text", EXTRACTION_TOOL))
+
+        items = list(stream_entities_from_doc(SystemPrompt(prefix="fields"), "text", EXTRACTION_TOOL))
+
+        mock_client.messages.stream.assert_called_once()
+        assert items[:2] == [("invoice_number", "42"), ("total_amount", 9.5)]
+        assert items[2].cached is True
+
+
+class TestStageSettings:
+    """Tests for the per-stage model and generation settings."""
+
+    def test_resolve_without_overrides(self):
+        """Test that the configured settings are used by default."""
+        assert resolve_llm_settings() == LLM_STAGE_SETTINGS
+
+    def test_resolve_with_overrides(self):
+        """Test that overrides only replace the given settings of the given stage."""
+        settings = resolve_llm_settings({"validation": {"model": "claude-4-sonnet-20250514", "max_tokens": "8"}})
+
+        assert settings["validation"].model == "claude-4-sonnet-20250514"
+        assert settings["validation"].max_tokens == 8
+        assert settings["validation"].temperature == LLM_STAGE_SETTINGS["validation"].temperature
+        assert settings["extraction"] == LLM_STAGE_SETTINGS["extraction"]
+
+    @pytest.mark.parametrize(
+        ("overrides", "match"),
+        [
+            ({"summary": {"model": "claude"}}, "Unknown LLM stage"),
+            ({"validation": {"top_k": 5}}, "Unknown settings"),
+            ({"validation": {"max_tokens": 0}}, "max_tokens"),
+            ({"validation": {"max_tokens": 65}}, "at most 64"),
+            ({"extraction": {"max_tokens": 10**9}}, "at most 8192"),
+            ({"extraction": {"model": "claude-opus-4-20250514"}}, "not allowed"),
+        ],
+    )
+    def test_resolve_invalid_overrides(self, overrides, match):
+        """Test that invalid overrides are rejected."""
+        with pytest.raises(ValueError, match=match):
+            resolve_llm_settings(overrides)
+
+    @patch("src.llm.llm.LLM_CACHE_ENABLED", False)
+    @patch("src.llm.llm.client")
+    def test_validation_uses_stage_settings(self, mock_client):
+        """Test that the validator runs with its own model and output limit."""
+        mock_client.messages.create.return_value = make_message("invoice")
+
+        validate_document_type(SystemPrompt(prefix="catalog"), "text")
+
+        kwargs = mock_client.messages.create.call_args.kwargs
+        assert kwargs["model"] == LLM_STAGE_SETTINGS["validation"].model
+        assert kwargs["max_tokens"] == LLM_STAGE_SETTINGS["validation"].max_tokens
+        assert kwargs["temperature"] == LLM_STAGE_SETTINGS["validation"].temperature
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.llm.cache import LLMResponseCache, normalize_user_content
+from src.schemas.llm import LLMResponse, LLMUsage, SystemPrompt
+
+
+class TestLLMResponseCache:
+    """Tests for the LLMResponseCache class."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Cache stored in a temporary directory."""
+        return LLMResponseCache(tmp_path / "llm.sqlite3", max_entries=10, ttl_s=60)
+
+    @pytest.fixture
+    def response(self):
+        """Response of a validation call."""
+        return LLMResponse(
+            text="invoice", model="claude", usage=LLMUsage(input_tokens=900, output_tokens=2), stop_reason="end_turn"
+        )
+
+    def test_normalize_user_content(self):
+        """Test that whitespace differences are ignored."""
+        assert normalize_user_content("  Invoice\n\nNo.  42 ") == "Invoice No. 42"
+
+    def test_key_ignores_whitespace(self):
+        """Test that re-scans differing only in whitespace share a key."""
+        prompt = SystemPrompt(prefix="catalog", suffix="invoice")
+
+        assert LLMResponseCache.key("claude", 0.1, 10, prompt, "Invoice\nNo. 42") == LLMResponseCache.key(
+            "claude", 0.1, 10, prompt, "Invoice  No. 42 "
+        )
+
+    @pytest.mark.parametrize(
+        "changed",
+        [
+            {"model": "other"},
+            {"temperature": 0.5},
+            {"max_tokens": 20},
+            {"system_prompt": SystemPrompt(prefix="catalog", suffix="memo")},
+            {"user_content": "Invoice No. 43"},
+            {"tool": {"name": "record_entities"}},
+        ],
+    )
+    def test_key_changes(self, changed):
+        """Test that every parameter shaping the answer is part of the key."""
+        arguments = {
+            "model": "claude",
+            "temperature": 0.1,
+            "max_tokens": 10,
+            "system_prompt": SystemPrompt(prefix="catalog", suffix="invoice"),
+            "user_content": "Invoice No. 42",
+        }
+
+        assert LLMResponseCache.key(**arguments) != LLMResponseCache.key(**{**arguments, **changed})
+
+    def test_get_and_set(self, cache, response):
+        """Test that a cached response reports no token usage."""
+        assert cache.get("validation", "key") is None
+
+        cache.set("validation", "key", response)
+        cached = cache.get("validation", "key")
+
+        assert cached.text == "invoice"
+        assert cached.cached is True
+        assert cached.usage == LLMUsage()
+        assert cache.get("extraction", "key") is None
+
+    def test_entries_expire(self, cache, response):
+        """Test that entries older than the TTL are not returned."""
+        cache.set("validation", "key", response)
+
+        with patch("src.utils.sqlite_cache.time.time", return_value=10**10):
+            assert cache.get("validation", "key") is None
+
+    def test_stats_per_stage(self, cache, response, tmp_path):
+        """Test that hit rates are kept per stage and shared between instances."""
+        cache.set("validation", "key", response)
+        cache.get("validation", "key")
+        LLMResponseCache(tmp_path / "llm.sqlite3").get("extraction", "key")
+
+        stats = cache.stats()
+
+        assert (stats["validation"].hits, stats["validation"].misses, stats["validation"].entries) == (1, 0, 1)
+        assert (stats["extraction"].hits, stats["extraction"].misses) == (0, 1)
+
+    def test_clear(self, cache, response):
+        """Test clearing the entries and counters of every stage."""
+        cache.set("validation", "key", response)
+        cache.get("validation", "key")
+        cache.clear()
+
+        assert cache.stats()["validation"].entries == 0
+        assert cache.stats()["validation"].hits == 0
@@ -0,0 +1,152 @@
+import copy
+from unittest.mock import patch
+
+import pytest
+
+from src.constants import DOCUMENT_FIELDS
+from src.llm.prompt_registry import PromptRegistry, fingerprint_fields, select_fields
+from src.llm.prompts import create_document_type_validation_prompt, create_extraction_prompt
+
+
+class TestPromptRegistry:
+    """Tests for the PromptRegistry class."""
+
+    @pytest.fixture
+    def document_fields(self):
+        """Copy of the field definitions that tests can edit."""
+        return copy.deepcopy(DOCUMENT_FIELDS)
+
+    def test_prompts_match_the_builders(self):
+        """Test that compiled prompts are identical to the ones built per request."""
+        registry = PromptRegistry()
+
+        assert registry.validation_prompt("memo") == create_document_type_validation_prompt("memo")
+        assert registry.extraction_prompt("invoice") == create_extraction_prompt("invoice")
+
+    def test_prompts_are_built_once(self):
+        """Test that requests do not rebuild the prompts."""
+        registry = PromptRegistry()
+
+        with patch("src.llm.prompt_registry.create_extraction_prompt") as mock_create:
+            registry.extraction_prompt("invoice")
+            registry.validation_prompt("invoice")
+
+        mock_create.assert_not_called()
+
+    def test_unknown_document_type(self):
+        """Test that an unknown document type raises an error."""
+        with pytest.raises(ValueError, match="Unknown document type: invalid_type"):
+            PromptRegistry().extraction_prompt("invalid_type")
+
+    def test_recompiles_when_fields_change(self, document_fields):
+        """Test that edited field definitions invalidate the compiled prompts."""
+        registry = PromptRegistry(document_fields, check_interval_s=0)
+        fingerprint = registry.fingerprint
+
+        document_fields["invoice"].append({"name": "currency", "description": "Currency of the amounts"})
+
+        assert "currency" in registry.extraction_prompt("invoice").prefix
+        assert registry.fingerprint != fingerprint
+
+    def test_changes_are_checked_at_most_once_per_interval(self, document_fields):
+        """Test that field definitions are not fingerprinted on every request."""
+        registry = PromptRegistry(document_fields, check_interval_s=3600)
+        document_fields["invoice"].append({"name": "currency", "description": "Currency of the amounts"})
+
+        assert "currency" not in registry.extraction_prompt("invoice").prefix
+
+
+class TestExtractionVariant:
+    """Tests for the extraction variants of field selections."""
+
+    def test_full_type_is_precompiled(self):
+        """Test that the variant without a selection is the precompiled extraction, without an output budget."""
+        registry = PromptRegistry()
+
+        variant = registry.extraction_variant("invoice")
+
+        assert variant.prompt == registry.extraction_prompt("invoice")
+        assert variant.tool == registry.extraction_tool("invoice")
+        assert variant.max_tokens is None
+
+    def test_selection(self):
+        """Test that a selection compiles a prompt, schema and output budget of the selected fields only."""
+        variant = PromptRegistry().extraction_variant(
+            "invoice", ["invoice_number", "total_amount"], [{"name": "iban", "description": "Bank account number"}]
+        )
+
+        assert variant.field_names == ("invoice_number", "total_amount", "iban")
+        assert set(variant.tool["input_schema"]["required"]) == {"invoice_number", "total_amount", "iban"}
+        assert "iban: Bank account number" in variant.prompt.prefix
+        assert "due_date" not in variant.prompt.prefix
+        assert variant.max_tokens == 400
+
+    def test_variants_are_cached(self):
+        """Test that a selection is compiled once, and the least recently used variant is evicted."""
+        registry = PromptRegistry(max_variants=2)
+
+        with patch("src.llm.prompt_registry.create_extraction_prompt", wraps=create_extraction_prompt) as mock_create:
+            first = registry.extraction_variant("invoice", ["invoice_number"])
+            assert registry.extraction_variant("invoice", ["invoice_number"]) is first
+            registry.extraction_variant("invoice", ["total_amount"])
+            registry.extraction_variant("invoice", ["due_date"])
+            assert registry.extraction_variant("invoice", ["invoice_number"]) is not first
+
+        assert mock_create.call_count == 4
+
+    def test_variants_are_dropped_on_recompile(self):
+        """Test that edited field definitions invalidate the compiled variants."""
+        document_fields = copy.deepcopy(DOCUMENT_FIELDS)
+        registry = PromptRegistry(document_fields, check_interval_s=0)
+        registry.extraction_variant("invoice", ["invoice_number"])
+
+        document_fields["invoice"][0]["description"] = "Invoice identifier"
+
+        assert "Invoice identifier" in registry.extraction_variant("invoice", ["invoice_number"]).prompt.prefix
+
+    @pytest.mark.parametrize("name", ["_secret", "model_config", "model_dump", "json", "schema", "validate", "9lives"])
+    def test_reserved_custom_field_names(self, name):
+        """Test that custom field names pydantic reserves or would shadow raise a ValueError."""
+        with pytest.raises(ValueError, match=name):
+            PromptRegistry().extraction_variant("invoice", custom_fields=[{"name": name, "description": "A field"}])
+
+
+class TestSelectFields:
+    """Tests for the select_fields function."""
+
+    TYPE_FIELDS = (
+        {"name": "a", "description": "A"},
+        {"name": "b", "description": "B"},
+    )
+
+    def test_no_selection(self):
+        """Test that every field of the type is extracted without a selection."""
+        type_fields = list(self.TYPE_FIELDS)
+        assert select_fields(type_fields) is type_fields
+
+    def test_names_follow_the_type_order(self):
+        """Test that selected fields keep the order of the definitions and unknown names are ignored."""
+        assert select_fields(list(self.TYPE_FIELDS), ["b", "a", "z"]) == list(self.TYPE_FIELDS)
+
+    def test_custom_fields_replace_the_type(self):
+        """Test that custom fields alone replace the fields of the type, without redefining selected ones."""
+        custom = [{"name": "c", "description": "C"}]
+
+        assert select_fields(list(self.TYPE_FIELDS), None, custom) == custom
+        assert select_fields(list(self.TYPE_FIELDS), ["a"], [{"name": "a", "description": "Other"}, *custom]) == [
+            self.TYPE_FIELDS[0],
+            *custom,
+        ]
+
+    def test_empty_selection_falls_back_to_the_type(self):
+        """Test that a selection matching no field extracts every field of the type."""
+        assert select_fields(list(self.TYPE_FIELDS), ["z"]) == list(self.TYPE_FIELDS)
+
+
+class TestFingerprintFields:
+    """Tests for the fingerprint_fields function."""
+
+    def test_fingerprint_ignores_key_order(self):
+        """Test that the fingerprint only depends on the content of the definitions."""
+        fields = [{"name": "a", "description": "b"}]
+        assert fingerprint_fields({"x": fields, "y": []}) == fingerprint_fields({"y": [], "x": fields})
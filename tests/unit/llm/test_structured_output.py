@@ -0,0 +1,161 @@
+import pytest
+from pydantic import ValidationError
+
+from src.constants import DOCUMENT_FIELDS
+from src.llm.structured_output import (
+    EXTRACTION_TOOL_NAME,
+    create_entities_model,
+    create_extraction_tool,
+    estimate_output_tokens,
+    field_annotation,
+    validate_entities,
+)
+from src.schemas.llm import LLMResponse, LLMUsage
+
+
+class TestFieldAnnotation:
+    """Tests for the field_annotation function."""
+
+    @pytest.mark.parametrize(
+        ("document_type", "name", "expected"),
+        [
+            ("resume", "skills", list[str]),
+            ("form", "filled_fields", dict[str, str]),
+            ("form", "signature_present", bool),
+            ("presentation", "slide_count", int),
+            ("questionnaire", "total_questions", int),
+            ("invoice", "total_amount", float | str),
+            ("invoice", "invoice_date", str),
+            ("invoice", "invoice_number", str),
+            ("budget", "approval_status", str),
+        ],
+    )
+    def test_document_fields(self, document_type, name, expected):
+        """Test the types inferred for the predefined fields."""
+        field = next(f for f in DOCUMENT_FIELDS[document_type] if f["name"] == name)
+
+        assert field_annotation(field) == expected
+
+    def test_every_document_field(self):
+        """Test that every predefined field gets its intended type, and only the listed fields are not strings."""
+        expected = {
+            ("specification", "requirements"): list[str],
+            ("presentation", "slide_count"): int,
+            ("presentation", "key_topics"): list[str],
+            ("resume", "work_experience"): list[str],
+            ("resume", "skills"): list[str],
+            ("budget", "total_budget"): float | str,
+            ("budget", "line_items"): list[str],
+            ("email", "recipient_emails"): list[str],
+            ("email", "attachments"): list[str],
+            ("scientific_publication", "authors"): list[str],
+            ("scientific_publication", "keywords"): list[str],
+            ("invoice", "total_amount"): float | str,
+            ("file_folder", "file_count"): int,
+            ("memo", "action_items"): list[str],
+            ("scientific_report", "key_findings"): list[str],
+            ("form", "filled_fields"): dict[str, str],
+            ("form", "signature_present"): bool,
+            ("questionnaire", "questions_and_answers"): list[str],
+            ("questionnaire", "total_questions"): int,
+        }
+
+        for document_type, fields in DOCUMENT_FIELDS.items():
+            for field in fields:
+                annotation = field_annotation(field)
+                assert annotation == expected.get((document_type, field["name"]), str), (document_type, field)
+
+    def test_words_containing_list_are_strings(self):
+        """Test that "list" inside another word, as in "journalist", does not make a list."""
+        assert field_annotation({"name": "author", "description": "Author or journalist name"}) is str
+        assert field_annotation({"name": "tags", "description": "Comma-separated list of tags"}) == list[str]
+
+    def test_news_article_author_accepts_a_string(self):
+        """Test that the entities model of news articles accepts a plain-string author."""
+        model = create_entities_model("news_article", DOCUMENT_FIELDS["news_article"])
+
+        assert model.model_json_schema()["properties"]["author"]["anyOf"][0] == {"type": "string"}
+        entities = dict.fromkeys(model.model_fields) | {"author": "Jane Doe"}
+
+        assert model.model_validate(entities).author == "Jane Doe"
+
+
+class TestEstimateOutputTokens:
+    """Tests for the estimate_output_tokens function."""
+
+    def test_lists_get_larger_budgets(self):
+        """Test that list fields are budgeted more output tokens than single values."""
+        fields = {field["name"]: field for field in DOCUMENT_FIELDS["resume"]}
+
+        assert estimate_output_tokens([fields["skills"]]) > estimate_output_tokens([fields["candidate_name"]])
+        assert estimate_output_tokens([]) > 0
+
+
+class TestEntitiesModel:
+    """Tests for the entities model and extraction tool."""
+
+    @pytest.fixture
+    def invoice_model(self):
+        """Entities model of the invoice document type."""
+        return create_entities_model("invoice", DOCUMENT_FIELDS["invoice"])
+
+    def test_every_type_compiles(self):
+        """Test that a model and a tool can be built for every document type."""
+        for document_type, fields in DOCUMENT_FIELDS.items():
+            tool = create_extraction_tool(document_type, create_entities_model(document_type, fields))
+            assert set(tool["input_schema"]["required"]) == {field["name"] for field in fields}
+
+    def test_json_schema(self):
+        """Test the JSON Schema of lists, counts and nullable strings."""
+        schema = create_extraction_tool(
+            "presentation", create_entities_model("presentation", DOCUMENT_FIELDS["presentation"])
+        )["input_schema"]
+
+        assert schema["properties"]["key_topics"]["anyOf"][0] == {"items": {"type": "string"}, "type": "array"}
+        assert schema["properties"]["slide_count"]["anyOf"][0] == {"type": "integer"}
+        assert {"type": "null"} in schema["properties"]["presentation_title"]["anyOf"]
+
+    def test_tool_definition(self, invoice_model):
+        """Test the name and description of the extraction tool."""
+        tool = create_extraction_tool("invoice", invoice_model)
+
+        assert tool["name"] == EXTRACTION_TOOL_NAME
+        assert "invoice" in tool["description"]
+
+    def test_validate_entities(self, invoice_model):
+        """Test that digits are accepted for identifiers and unknown keys are dropped."""
+        response = LLMResponse(
+            text="",
+            model="claude",
+            usage=LLMUsage(),
+            tool_input={
+                "invoice_number": 42,
+                "invoice_date": "2024-01-15",
+                "due_date": None,
+                "vendor_details": "ACME",
+                "total_amount": "1,200.00 EUR",
+                "notes": "extra",
+            },
+        )
+
+        assert validate_entities(invoice_model, response) == {
+            "invoice_number": "42",
+            "invoice_date": "2024-01-15",
+            "due_date": None,
+            "vendor_details": "ACME",
+            "total_amount": "1,200.00 EUR",
+        }
+
+    def test_validate_entities_missing_field(self, invoice_model):
+        """Test that a missing field is rejected."""
+        response = LLMResponse(text="", model="claude", usage=LLMUsage(), tool_input={"invoice_number": "42"})
+
+        with pytest.raises(ValidationError):
+            validate_entities(invoice_model, response)
+
+    def test_validate_entities_without_tool_call(self, invoice_model):
+        """Test that a text response is rejected."""
+        response = LLMResponse(text="{}", model="claude", usage=LLMUsage())
+
+        with pytest.raises(AssertionError, match=EXTRACTION_TOOL_NAME):
+            validate_entities(invoice_model, response)
@@ -0,0 +1,142 @@
+import threading
+
+import anthropic
+import pytest
+
+from src.llm.prompt_registry import get_prompt_registry
+from src.llm.stub_server import MessagesStub, StubServer, answer_extraction, answer_validation
+from src.schemas.llm import LLMStubSettings
+
+DOCUMENT_TEXT = "INVOICE\nInvoice number: 42\nTotal amount: 1,200.50 EUR\nPlease pay this invoice."
+FAST_SETTINGS = LLMStubSettings(first_token_latency_ms=0, output_tokens_per_s=1e6)
+
+
+def extraction_request(max_tokens: int = 2000, stream: bool = False) -> dict:
+    """Build the request of an invoice extraction, as sent by the pipeline."""
+    registry = get_prompt_registry()
+    return {
+        "model": "claude-test",
+        "max_tokens": max_tokens,
+        "system": [
+            {
+                "type": "text",
+                "text": registry.extraction_prompt("invoice").prefix,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
+        "messages": [{"role": "user", "content": f"<document_text>{DOCUMENT_TEXT}</document_text>"}],
+        "tools": [registry.extraction_tool("invoice")],
+        "tool_choice": {"type": "tool", "name": "record_entities"},
+        "stream": stream,
+    }
+
+
+class TestRules:
+    """Tests for the rule-based answers of the stub."""
+
+    def test_validation_picks_the_most_named_type(self):
+        """Test that the type named most often in the document wins over the current selection."""
+        system_text = get_prompt_registry().validation_prompt("memo")
+        system_text = system_text.prefix + system_text.suffix
+
+        assert answer_validation(system_text, DOCUMENT_TEXT) == "invoice"
+        assert answer_validation(system_text, "Nothing to see here") == "memo"
+
+    def test_extraction_reads_labelled_lines(self):
+        """Test that labelled values are converted to their schema type and other fields get placeholders."""
+        tool_input = answer_extraction(get_prompt_registry().extraction_tool("invoice"), DOCUMENT_TEXT)
+
+        assert tool_input["invoice_number"] == "42"
+        assert tool_input["total_amount"] == 1200.5
+        assert tool_input["vendor_details"] == "stub vendor_details"
+
+
+class TestMessagesStub:
+    """Tests for the MessagesStub class."""
+
+    def test_tool_call(self):
+        """Test that a forced tool call is answered with a tool_use block and estimated usage."""
+        body = MessagesStub(FAST_SETTINGS).create(extraction_request()).body
+
+        assert body["stop_reason"] == "tool_use"
+        assert body["content"][0]["name"] == "record_entities"
+        assert body["content"][0]["input"]["invoice_number"] == "42"
+        assert body["usage"]["output_tokens"] > 0
+
+    def test_prompt_cache(self):
+        """Test that a system block marked for caching is written once, then read."""
+        stub = MessagesStub(FAST_SETTINGS)
+
+        first = stub.create(extraction_request()).body["usage"]
+        second = stub.create(extraction_request()).body["usage"]
+
+        assert first["cache_creation_input_tokens"] == second["cache_read_input_tokens"] > 0
+        assert second["cache_creation_input_tokens"] == 0
+
+    def test_max_tokens(self):
+        """Test that output beyond max_tokens is cut off."""
+        body = MessagesStub(FAST_SETTINGS).create(extraction_request(max_tokens=5)).body
+
+        assert body["stop_reason"] == "max_tokens"
+        assert body["usage"]["output_tokens"] == 5
+
+    def test_latency_model(self):
+        """Test that the delays follow the first token latency and token rates."""
+        settings = LLMStubSettings(first_token_latency_ms=300, input_tokens_per_s=1e9, output_tokens_per_s=100)
+        response = MessagesStub(settings).create(extraction_request())
+
+        assert response.first_token_delay_s == pytest.approx(0.3, abs=1e-3)
+        assert response.output_delay_s == pytest.approx(response.body["usage"]["output_tokens"] / 100)
+
+    def test_injected_errors_are_reproducible(self):
+        """Test that errors are injected at their rates, with the same draws for the same seed."""
+        settings = LLMStubSettings(error_rate_429=0.3, error_rate_529=0.3, seed=7)
+
+        def run() -> list[int]:
+            stub = MessagesStub(settings)
+            return [stub.create(extraction_request()).status for _ in range(50)]
+
+        statuses = run()
+        assert statuses == run()
+        assert set(statuses) == {200, 429, 529}
+        error = MessagesStub(LLMStubSettings(error_rate_529=1.0)).create(extraction_request())
+        assert error.body["error"]["type"] == "overloaded_error"
+        assert error.headers == {"retry-after": "1"}
+
+
+class TestStubServer:
+    """Tests of the stub server through the Anthropic client."""
+
+    @pytest.fixture
+    def server(self):
+        """Serve the stub on a free local port."""
+        server = StubServer("127.0.0.1", 0, FAST_SETTINGS)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    def test_stream(self, server):
+        """Test that the streamed tool input is assembled by the client into the same input."""
+        client = anthropic.Anthropic(api_key="stub", base_url=server.base_url, max_retries=0)
+        request = extraction_request()
+        request.pop("stream")
+
+        with client.messages.stream(**request) as stream:
+            deltas = [event.delta.partial_json for event in stream if event.type == "content_block_delta"]
+            message = stream.get_final_message()
+
+        assert len(deltas) > 1
+        assert message.content[0].input["invoice_number"] == "42"
+        assert message.stop_reason == "tool_use"
+
+    def test_rate_limit_error(self, server):
+        """Test that injected errors reach the client as API errors."""
+        server.stub.settings = LLMStubSettings(error_rate_429=1.0)
+        client = anthropic.Anthropic(api_key="stub", base_url=server.base_url, max_retries=0)
+        request = extraction_request()
+        request.pop("stream")
+
+        with pytest.raises(anthropic.RateLimitError):
+            client.messages.create(**request)
@@ -0,0 +1,71 @@
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from src.llm.tracing import TRACE_DB_NAME, LLMTracer
+from src.schemas.llm import LLMResponse, LLMUsage, SystemPrompt
+
+RESPONSE = LLMResponse(
+    text="",
+    model="claude",
+    usage=LLMUsage(input_tokens=10),
+    tool_input={"invoice_number": "42"},
+    stop_reason="tool_use",
+)
+
+
+def read_invocations(path) -> list[tuple]:
+    """Read the stage, prompt hash and response of the traced invocations."""
+    with sqlite3.connect(path / TRACE_DB_NAME) as connection:
+        return connection.execute("SELECT stage, prompt_hash, response FROM invocations ORDER BY id").fetchall()
+
+
+class TestLLMTracer:
+    """Tests for the LLMTracer class."""
+
+    def test_invocations_are_written_in_the_background(self, tmp_path):
+        """Test that queued invocations are written by the writer thread, with each prompt stored once."""
+        tracer = LLMTracer(tmp_path, batch_size=2, flush_interval_s=0.01)
+        for stage in ("validation", "extraction", "extraction"):
+            tracer.record(stage, SystemPrompt(prefix="fields"), "text", RESPONSE, 0.5)
+        tracer.flush()
+
+        invocations = read_invocations(tmp_path)
+        assert [invocation[0] for invocation in invocations] == ["validation", "extraction", "extraction"]
+        assert invocations[0][2] == '{"invoice_number": "42"}'
+        with sqlite3.connect(tmp_path / TRACE_DB_NAME) as connection:
+            assert connection.execute("SELECT COUNT(*) FROM prompts").fetchone() == (1,)
+        tracer.close()
+
+    def test_disabled_without_store(self):
+        """Test that no writer is started when tracing is off."""
+        tracer = LLMTracer(None, sample_rate=1.0)
+        tracer.record("validation", SystemPrompt(prefix="catalog"), "text", RESPONSE, 0.5)
+
+        assert not tracer.enabled
+        assert tracer._writer is None
+
+    def test_sampling(self, tmp_path):
+        """Test that only sampled invocations are queued."""
+        tracer = LLMTracer(tmp_path, sample_rate=0.5)
+        with patch("src.llm.tracing.random.random", side_effect=[0.2, 0.7, 0.4, 0.9]):
+            for _ in range(4):
+                tracer.record("validation", SystemPrompt(prefix="catalog"), "text", RESPONSE, 0.5)
+        tracer.close()
+
+        assert tracer.written == 2
+
+    def test_full_queue_drops_invocations(self, tmp_path):
+        """Test that invocations are dropped instead of blocking when the writer falls behind."""
+        tracer = LLMTracer(tmp_path, max_queue=1)
+        with patch.object(LLMTracer, "_start_writer"):
+            tracer.record("validation", SystemPrompt(prefix="catalog"), "text", RESPONSE, 0.5)
+            tracer.record("validation", SystemPrompt(prefix="catalog"), "text", RESPONSE, 0.5)
+
+        assert tracer.dropped == 1
+
+    def test_invalid_sample_rate(self, tmp_path):
+        """Test that a sample rate outside [0, 1] is rejected."""
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            LLMTracer(tmp_path, sample_rate=2.0)
@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from src.services.embeddings.cache import CachedEmbeddingFunction
+
+
+class TestCachedEmbeddingFunction:
+    """Tests for the CachedEmbeddingFunction class."""
+
+    @pytest.fixture
+    def inner(self):
+        """Mock embedding function returning one vector per text based on its length."""
+        embedding_function = MagicMock()
+        embedding_function.name.return_value = "openai"
+        embedding_function.get_config.return_value = {"model_name": "text-embedding-3-small", "dimensions": None}
+        embedding_function.side_effect = lambda texts: [np.full(3, len(t), dtype=np.float32) for t in texts]
+        return embedding_function
+
+    @pytest.fixture
+    def cached(self, inner, tmp_path):
+        """Cached embedding function stored in a temporary directory."""
+        return CachedEmbeddingFunction(inner, cache_path=tmp_path / "embeddings.sqlite3")
+
+    def test_embeds_missing_texts_only(self, cached, inner):
+        """Test that only texts absent from the cache reach the wrapped function."""
+        cached(["a", "bb"])
+        result = cached(["bb", "ccc"])
+
+        assert inner.call_args_list[0].args[0] == ["a", "bb"]
+        assert inner.call_args_list[1].args[0] == ["ccc"]
+        np.testing.assert_array_equal(result[0], np.full(3, 2, dtype=np.float32))
+        np.testing.assert_array_equal(result[1], np.full(3, 3, dtype=np.float32))
+
+    def test_duplicate_texts_are_embedded_once(self, cached, inner):
+        """Test that repeated texts within a call are embedded once."""
+        result = cached(["same", "same"])
+
+        inner.assert_called_once_with(["same"])
+        assert len(result) == 2
+
+    def test_cache_key_includes_model_and_dimensions(self, inner, tmp_path):
+        """Test that different dimensions do not share cached vectors."""
+        path = tmp_path / "embeddings.sqlite3"
+        CachedEmbeddingFunction(inner, cache_path=path)(["text"])
+        inner.get_config.return_value = {"model_name": "text-embedding-3-small", "dimensions": 256}
+        CachedEmbeddingFunction(inner, cache_path=path)(["text"])
+
+        assert inner.call_count == 2
+
+    def test_stats(self, cached):
+        """Test hit-rate reporting."""
+        cached(["a"])
+        cached(["a"])
+
+        stats = cached.stats()
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.hit_rate == 0.5
+
+    def test_delegates_identity_to_wrapped_function(self, cached, inner):
+        """Test that name and config are those of the wrapped function."""
+        assert cached.name() == "openai"
+        assert cached.get_config() == inner.get_config.return_value
+        assert cached.is_legacy() is False
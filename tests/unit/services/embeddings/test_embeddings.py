@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.services.embeddings.cache import CachedEmbeddingFunction
+from src.services.embeddings.embeddings import EmbeddingFunctionFactory, get_embedder_id, validate_embedder
+from src.services.embeddings.local_impl import LocalEmbeddingFunction
+
+
+class TestEmbeddingFunctionFactory:
+    """Tests for the EmbeddingFunctionFactory class."""
+
+    def test_create_openai_cached(self):
+        """Test that the OpenAI backend is wrapped with the cache by default."""
+        with patch("src.services.embeddings.embeddings.OpenAIEmbeddingFunction") as mock_openai:
+            embedding_function = EmbeddingFunctionFactory.create("openai")
+
+        assert isinstance(embedding_function, CachedEmbeddingFunction)
+        assert embedding_function._embedding_function == mock_openai.return_value
+
+    def test_create_openai_with_dimensions(self):
+        """Test that the requested dimensions are forwarded to the OpenAI embedding function."""
+        with patch("src.services.embeddings.embeddings.OpenAIEmbeddingFunction") as mock_openai:
+            EmbeddingFunctionFactory.create("openai", cache=False, dimensions=256)
+
+        assert mock_openai.call_args.kwargs["dimensions"] == 256
+
+    def test_create_local_with_dimensions(self):
+        """Test that the local backend rejects custom dimensions."""
+        with pytest.raises(ValueError, match="does not support custom dimensions"):
+            EmbeddingFunctionFactory.create("local", dimensions=256)
+
+    def test_create_local_without_cache(self):
+        """Test creating the local backend without the cache."""
+        embedding_function = EmbeddingFunctionFactory.create("local", cache=False)
+        assert isinstance(embedding_function, LocalEmbeddingFunction)
+
+    def test_create_unsupported_backend(self):
+        """Test creating an unsupported embedding backend."""
+        with pytest.raises(ValueError, match="Unsupported embedding backend: unsupported"):
+            EmbeddingFunctionFactory.create("unsupported")  # type: ignore
+
+
+class TestGetEmbedderId:
+    """Tests for the get_embedder_id function."""
+
+    def test_openai_embedder_id(self):
+        """Test the identifier of a model with a configured dimension."""
+        embedding_function = MagicMock()
+        embedding_function.name.return_value = "openai"
+        embedding_function.get_config.return_value = {"model_name": "text-embedding-3-small", "dimensions": 512}
+
+        assert get_embedder_id(embedding_function) == "openai:text-embedding-3-small:512"
+
+    def test_local_embedder_id(self):
+        """Test that the local embedder is identified by its name."""
+        embedding_function = LocalEmbeddingFunction()
+        assert get_embedder_id(embedding_function) == "onnx_mini_lm_l6_v2:onnx_mini_lm_l6_v2:default"
+
+
+class TestValidateEmbedder:
+    """Tests for the validate_embedder function."""
+
+    def test_matching_embedder(self):
+        """Test that a matching embedder passes."""
+        validate_embedder("collection", {"embedder": "openai:model:default"}, "openai:model:default")
+
+    def test_missing_embedder_is_accepted(self):
+        """Test that collections created before embedders were recorded are still usable."""
+        validate_embedder("collection", {}, "openai:model:default")
+        validate_embedder("collection", None, "openai:model:default")
+
+    def test_mismatching_embedder(self):
+        """Test that a different embedder is rejected."""
+        with pytest.raises(ValueError, match="was built with embedder 'openai:model:default'"):
+            validate_embedder("collection", {"embedder": "openai:model:default"}, "openai:model:256")
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.services.embeddings.local_impl import LocalEmbeddingFunction
+
+
+class TestLocalEmbeddingFunction:
+    """Tests for the LocalEmbeddingFunction class."""
+
+    def test_init(self):
+        """Test batching and thread defaults."""
+        embedding_function = LocalEmbeddingFunction(batch_size=8, num_threads=2)
+
+        assert embedding_function.batch_size == 8
+        assert embedding_function.num_threads == 2
+        assert embedding_function._preferred_providers == ["CPUExecutionProvider"]
+
+    def test_model_session_uses_thread_limit(self):
+        """Test that the ONNX session is created with the configured thread count."""
+        embedding_function = LocalEmbeddingFunction(num_threads=3)
+        embedding_function.ort = MagicMock()
+
+        session = embedding_function.model
+
+        session_options = embedding_function.ort.SessionOptions.return_value
+        assert session_options.intra_op_num_threads == 3
+        assert session_options.inter_op_num_threads == 1
+        assert session == embedding_function.ort.InferenceSession.return_value
+        assert embedding_function.ort.InferenceSession.call_args.kwargs["providers"] == ["CPUExecutionProvider"]
+
+    def test_call_embeds_in_batches(self):
+        """Test that documents are embedded with the configured batch size."""
+        embedding_function = LocalEmbeddingFunction(batch_size=4)
+
+        with (
+            patch.object(embedding_function, "_download_model_if_not_exists"),
+            patch.object(embedding_function, "_forward", return_value=np.ones((2, 384))) as mock_forward,
+        ):
+            result = embedding_function(["a", "b"])
+
+        mock_forward.assert_called_once_with(["a", "b"], batch_size=4)
+        assert len(result) == 2
+        assert result[0].dtype == np.float32
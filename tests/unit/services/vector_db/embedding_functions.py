@@ -0,0 +1,30 @@
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction
+
+
+class KeywordEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic embedding function counting a few keywords, shared by the vector database tests."""
+
+    keywords = ("invoice", "memo", "resume")
+
+    def __init__(self, name: str = "keywords"):
+        self.calls = 0
+        self._name = name
+
+    def __call__(self, input: Documents):
+        """Embed texts as keyword counts."""
+        self.calls += 1
+        return [np.array([text.count(keyword) + 0.01 for keyword in self.keywords], dtype=np.float32) for text in input]
+
+    def name(self) -> str:
+        """Return the embedding function name."""
+        return self._name
+
+    def get_config(self):
+        """Return the embedding function config."""
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        """Build the embedding function from its config."""
+        return KeywordEmbeddingFunction()
@@ -13,7 +13,15 @@ class TestVectorDBBase:
     def test_has_required_abstract_methods(self):
         """Test that VectorDBBase has the required abstract methods."""
         abstract_methods = VectorDBBase.__abstractmethods__
-        expected_methods = {"get_or_create_collection", "add_docs", "find_similar_docs"}
+        expected_methods = {
+            "get_or_create_collection",
+            "add_docs",
+            "upsert_docs",
+            "get_docs",
+            "count",
+            "embed_texts",
+            "find_similar_docs",
+        }
         assert abstract_methods == expected_methods
 
     def test_concrete_implementation_works(self):
@@ -26,9 +34,49 @@ class TestVectorDBBase:
             def add_docs(self, documents, metadatas, ids=None):
                 pass
 
+            def upsert_docs(self, documents, metadatas, ids=None):
+                pass
+
+            def get_docs(self, ids=None, include_embeddings=False):
+                return ([], [], [], None)
+
+            def count(self):
+                return 0
+
+            def embed_texts(self, texts):
+                return None
+
             def find_similar_docs(self, query_text, n_results=10):
                 return ([], [], [], [], [])
 
         db = ConcreteVectorDB()
         assert db.get_or_create_collection() == "collection_test"
         assert db.get_or_create_collection("custom") == "collection_custom"
+
+    def test_find_similar_docs_batch_default(self):
+        """Test that the default batch query runs one query per text."""
+
+        class ConcreteVectorDB(VectorDBBase):
+            def get_or_create_collection(self, name="test", embedding_function=None, metadata=None):
+                pass
+
+            def add_docs(self, documents, metadatas, ids=None):
+                pass
+
+            def upsert_docs(self, documents, metadatas, ids=None):
+                pass
+
+            def get_docs(self, ids=None, include_embeddings=False):
+                return ([], [], [], None)
+
+            def count(self):
+                return 0
+
+            def embed_texts(self, texts):
+                return None
+
+            def find_similar_docs(self, query_text, n_results=10):
+                return ([query_text], [], [], [], [])
+
+        db = ConcreteVectorDB()
+        assert db.find_similar_docs_batch(["a", "b"]) == [(["a"], [], [], [], []), (["b"], [], [], [], [])]
@@ -0,0 +1,90 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.vector_db.batching import QueryBatcher, _PendingQuery
+
+
+def make_result(query_text: str) -> tuple:
+    """Build a fake similarity result tagged with the query text."""
+    return ([f"id_{query_text}"], [query_text], [{"document_type": "invoice"}], [0.1], [0.9])
+
+
+class TestQueryBatcher:
+    """Tests for the QueryBatcher class."""
+
+    @pytest.fixture
+    def vector_db(self):
+        """Mock vector DB answering batched and single queries."""
+        db = MagicMock()
+        db.find_similar_docs.side_effect = lambda text, n: make_result(text)
+        db.find_similar_docs_batch.side_effect = lambda texts, n: [make_result(t) for t in texts]
+        return db
+
+    def test_invalid_max_batch_size(self, vector_db):
+        """Test that a non-positive batch size is rejected."""
+        with pytest.raises(ValueError, match="max_batch_size must be at least 1"):
+            QueryBatcher(vector_db, max_batch_size=0)
+
+    def test_single_query_uses_find_similar_docs(self, vector_db):
+        """Test that a lone query is answered without the batch API."""
+        batcher = QueryBatcher(vector_db, window_ms=1)
+
+        result = batcher.find_similar_docs("hello", n_results=5)
+
+        assert result == make_result("hello")
+        vector_db.find_similar_docs.assert_called_once_with("hello", 5)
+        vector_db.find_similar_docs_batch.assert_not_called()
+
+    def test_concurrent_queries_are_coalesced(self, vector_db):
+        """Test that queries submitted within the window share one batched lookup."""
+        batcher = QueryBatcher(vector_db, window_ms=200, max_batch_size=3)
+        texts = ["a", "b", "c"]
+        results = {}
+
+        def query(text):
+            results[text] = batcher.find_similar_docs(text)
+
+        threads = [threading.Thread(target=query, args=(t,)) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == {t: make_result(t) for t in texts}
+        vector_db.find_similar_docs_batch.assert_called_once()
+        assert sorted(vector_db.find_similar_docs_batch.call_args[0][0]) == texts
+
+    def test_dispatch_deduplicates_and_groups_by_n_results(self, vector_db):
+        """Test that identical texts are looked up once and groups respect n_results."""
+        batcher = QueryBatcher(vector_db)
+        batch = [_PendingQuery("x", 10), _PendingQuery("x", 10), _PendingQuery("y", 3)]
+
+        batcher._dispatch(batch)
+
+        assert all(p.future.result() == make_result(p.query_text) for p in batch)
+        vector_db.find_similar_docs.assert_any_call("x", 10)
+        vector_db.find_similar_docs.assert_any_call("y", 3)
+        vector_db.find_similar_docs_batch.assert_not_called()
+
+    def test_errors_propagate_to_every_caller(self, vector_db):
+        """Test that a failed lookup fails every query in the batch."""
+        vector_db.find_similar_docs_batch.side_effect = RuntimeError("boom")
+        batcher = QueryBatcher(vector_db)
+        batch = [_PendingQuery("a", 10), _PendingQuery("b", 10)]
+
+        batcher._dispatch(batch)
+
+        for pending in batch:
+            with pytest.raises(RuntimeError, match="boom"):
+                pending.future.result()
+
+    @pytest.mark.asyncio
+    async def test_find_similar_docs_async(self, vector_db):
+        """Test awaiting a batched query from an event loop."""
+        batcher = QueryBatcher(vector_db, window_ms=1)
+
+        result = await batcher.find_similar_docs_async("async text")
+
+        assert result == make_result("async text")
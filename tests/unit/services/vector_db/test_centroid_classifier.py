@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from src.services.vector_db.centroid_classifier import CentroidClassifier
+
+
+class TestCentroidClassifier:
+    """Tests for the CentroidClassifier class."""
+
+    @pytest.fixture
+    def vector_db(self):
+        """Vector DB mock holding two documents per type."""
+        vector_db = MagicMock()
+        vector_db.get_docs.return_value = (
+            ["id1", "id2", "id3", "id4"],
+            ["doc1", "doc2", "doc3", "doc4"],
+            [
+                {"document_type": "invoice"},
+                {"document_type": "invoice"},
+                {"document_type": "memo"},
+                {"document_type": "memo"},
+            ],
+            np.array([[2.0, 0.0], [1.0, 0.2], [0.0, 3.0], [0.1, 1.0]], dtype=np.float32),
+        )
+        return vector_db
+
+    def test_refresh_builds_normalized_centroids(self, vector_db):
+        """Test that one unit-length centroid is built per document type."""
+        classifier = CentroidClassifier(vector_db)
+        classifier.refresh()
+
+        labels, centroids = classifier._index
+        assert labels == ["invoice", "memo"] == classifier.labels
+        assert centroids.shape == (2, 2)
+        assert centroids.dtype == np.float32
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1, rtol=1e-6)
+        vector_db.get_docs.assert_called_once_with(include_embeddings=True)
+
+    def test_refresh_empty_collection(self, vector_db):
+        """Test that an empty collection cannot be classified against."""
+        vector_db.get_docs.return_value = ([], [], [], np.empty((0, 0), dtype=np.float32))
+
+        with pytest.raises(ValueError, match="empty collection"):
+            CentroidClassifier(vector_db).refresh()
+
+    def test_classify(self, vector_db):
+        """Test classifying a text by its nearest centroid."""
+        vector_db.embed_texts.return_value = np.array([[0.1, 5.0]], dtype=np.float32)
+        classifier = CentroidClassifier(vector_db)
+
+        document_type, confidence = classifier.classify("some memo")
+
+        assert document_type == "memo"
+        assert 0.5 < confidence <= 1
+        vector_db.embed_texts.assert_called_once_with(["some memo"])
+
+    def test_classify_embedding_is_scale_invariant(self, vector_db):
+        """Test that only the direction of the embedding matters."""
+        classifier = CentroidClassifier(vector_db)
+
+        assert classifier.classify_embedding(np.array([1.0, 0.1])) == classifier.classify_embedding(
+            np.array([100.0, 10.0])
+        )
+
+    @staticmethod
+    def refresh_count(vector_db) -> int:
+        """Number of centroid rebuilds, i.e. of get_docs calls fetching the embeddings."""
+        return sum(call.kwargs.get("include_embeddings", False) for call in vector_db.get_docs.call_args_list)
+
+    def test_refreshes_when_collection_changes(self, vector_db):
+        """Test that the centroids are rebuilt only when documents are added."""
+        classifier = CentroidClassifier(vector_db, refresh_interval_s=0)
+
+        classifier.classify_embedding(np.array([1.0, 0.0]))
+        classifier.classify_embedding(np.array([1.0, 0.0]))
+        assert self.refresh_count(vector_db) == 1
+
+        ids, documents, metadatas, embeddings = vector_db.get_docs.return_value
+        vector_db.get_docs.return_value = (
+            [*ids, "id5"],
+            [*documents, "doc5"],
+            [*metadatas, {"document_type": "memo"}],
+            np.vstack([embeddings, [[0.0, 1.0]]]),
+        )
+        classifier.classify_embedding(np.array([1.0, 0.0]))
+        assert self.refresh_count(vector_db) == 2
+
+    def test_refreshes_when_documents_are_replaced(self, vector_db):
+        """Test that replacing a document with the same count of documents rebuilds the centroids."""
+        classifier = CentroidClassifier(vector_db, refresh_interval_s=0)
+        assert classifier.classify_embedding(np.array([1.0, 0.1]))[0] == "invoice"
+
+        ids, documents, _, embeddings = vector_db.get_docs.return_value
+        relabeled = [{"document_type": "memo"}] * 4
+        vector_db.get_docs.return_value = (ids, documents, relabeled, embeddings)
+
+        assert classifier.classify_embedding(np.array([1.0, 0.1]))[0] == "memo"
+        assert self.refresh_count(vector_db) == 2
+
+    def test_skips_change_check_within_refresh_interval(self, vector_db):
+        """Test that the collection is not checked again within the refresh interval."""
+        classifier = CentroidClassifier(vector_db, refresh_interval_s=3600)
+
+        classifier.classify_embedding(np.array([1.0, 0.0]))
+        classifier.classify_embedding(np.array([1.0, 0.0]))
+
+        assert vector_db.get_docs.call_count == 1
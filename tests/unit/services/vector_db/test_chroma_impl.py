@@ -1,21 +1,46 @@
-import uuid
+import shutil
+import socket
+import subprocess
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pytest
 
-from src.services.vector_db.chroma_impl import ChromaVectorDB
+from src.constants import (
+    CHROMA_HNSW_EF_CONSTRUCTION,
+    CHROMA_HNSW_EF_SEARCH,
+    CHROMA_HNSW_M,
+    CHROMA_HTTP_MAX_CONNECTIONS,
+    EMBEDDING_DEFAULT_BACKEND,
+    EMBEDDING_DIMENSIONS,
+)
+from src.schemas.vector_db import HNSWSettings
+from src.services.embeddings.embeddings import get_embedder_id
+from src.services.vector_db.chroma_impl import ChromaVectorDB, get_chroma_client
+from src.utils.hashing import hash_text
+from tests.unit.services.vector_db.embedding_functions import KeywordEmbeddingFunction
 
 
 class TestChromaVectorDB:
     """Tests for the ChromaVectorDB class."""
 
+    @pytest.fixture(autouse=True)
+    def clear_client_cache(self):
+        """Open a new Chroma client in every test."""
+        get_chroma_client.cache_clear()
+        yield
+        get_chroma_client.cache_clear()
+
     @pytest.fixture
     def chroma_db(self):
         """Fixture returning a patched ChromaVectorDB instance."""
         with (
             patch("src.services.vector_db.chroma_impl.chromadb"),
-            patch("src.services.vector_db.chroma_impl.OpenAIEmbeddingFunction"),
+            patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory"),
         ):
             return ChromaVectorDB()
 
@@ -23,18 +48,54 @@ class TestChromaVectorDB:
         """Test object initialization and defaults."""
         with (
             patch("src.services.vector_db.chroma_impl.chromadb") as mock_chromadb,
-            patch("src.services.vector_db.chroma_impl.OpenAIEmbeddingFunction") as mock_embedding,
+            patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory") as mock_factory,
         ):
             mock_client = MagicMock()
             mock_chromadb.PersistentClient.return_value = mock_client
             mock_embedding_instance = MagicMock()
-            mock_embedding.return_value = mock_embedding_instance
+            mock_factory.create.return_value = mock_embedding_instance
 
             db = ChromaVectorDB()
 
             assert db.client == mock_client
             assert db.collection is None
             assert db._default_embedding_function == mock_embedding_instance
+            mock_factory.create.assert_called_once_with(EMBEDDING_DEFAULT_BACKEND, dimensions=EMBEDDING_DIMENSIONS)
+
+    def test_init_with_embedding_backend(self):
+        """Test selecting the embedding backend of the collection."""
+        with (
+            patch("src.services.vector_db.chroma_impl.chromadb"),
+            patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory") as mock_factory,
+        ):
+            ChromaVectorDB(embedding_backend="local", embedding_dimensions=None)
+
+            mock_factory.create.assert_called_once_with("local", dimensions=None)
+
+    def test_init_with_server(self):
+        """Test connecting to a Chroma server over pooled HTTP connections."""
+        with (
+            patch("src.services.vector_db.chroma_impl.chromadb") as mock_chromadb,
+            patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory"),
+        ):
+            db = ChromaVectorDB(host="chroma", port=8001)
+
+            assert db.client == mock_chromadb.HttpClient.return_value
+            mock_chromadb.PersistentClient.assert_not_called()
+            kwargs = mock_chromadb.HttpClient.call_args.kwargs
+            assert (kwargs["host"], kwargs["port"]) == ("chroma", 8001)
+            assert kwargs["settings"].chroma_http_max_connections == CHROMA_HTTP_MAX_CONNECTIONS
+
+    def test_client_is_shared(self):
+        """Test that instances of the same process share one client."""
+        with (
+            patch("src.services.vector_db.chroma_impl.chromadb") as mock_chromadb,
+            patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory"),
+        ):
+            first, second = ChromaVectorDB(host="chroma"), ChromaVectorDB(host="chroma")
+
+            assert first.client is second.client
+            mock_chromadb.HttpClient.assert_called_once()
 
     def test_apply_sigmoid(self, chroma_db):
         """Test sigmoid application to distance values."""
@@ -51,6 +112,7 @@ class TestChromaVectorDB:
     def test_get_or_create_collection_default_params(self, chroma_db):
         """Test collection creation with default parameters."""
         mock_collection = MagicMock()
+        mock_collection.metadata = {"embedder": get_embedder_id(chroma_db._default_embedding_function)}
         chroma_db.client.get_or_create_collection.return_value = mock_collection
 
         result = chroma_db.get_or_create_collection()
@@ -63,10 +125,12 @@ class TestChromaVectorDB:
         assert call_args[1]["embedding_function"] == chroma_db._default_embedding_function
         assert "description" in call_args[1]["metadata"]
         assert "created" in call_args[1]["metadata"]
+        assert call_args[1]["metadata"]["embedder"] == get_embedder_id(chroma_db._default_embedding_function)
 
     def test_get_or_create_collection_custom_params(self, chroma_db):
         """Test collection creation with custom parameters."""
         mock_collection = MagicMock()
+        mock_collection.metadata = {}
         mock_embedding_func = MagicMock()
         custom_metadata = {"custom": "data"}
         chroma_db.client.get_or_create_collection.return_value = mock_collection
@@ -77,9 +141,87 @@ class TestChromaVectorDB:
 
         assert result == mock_collection
         chroma_db.client.get_or_create_collection.assert_called_once_with(
-            name="custom_collection", embedding_function=mock_embedding_func, metadata=custom_metadata
+            name="custom_collection",
+            embedding_function=mock_embedding_func,
+            metadata={
+                **custom_metadata,
+                "hnsw:space": "cosine",
+                "hnsw:M": CHROMA_HNSW_M,
+                "hnsw:construction_ef": CHROMA_HNSW_EF_CONSTRUCTION,
+                "hnsw:search_ef": CHROMA_HNSW_EF_SEARCH,
+                "embedder": get_embedder_id(mock_embedding_func),
+            },
+        )
+
+    def test_get_or_create_collection_custom_hnsw_settings(self):
+        """Test that custom HNSW settings are recorded in the collection metadata."""
+        with (
+            patch("src.services.vector_db.chroma_impl.chromadb"),
+            patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory"),
+        ):
+            chroma_db = ChromaVectorDB(hnsw=HNSWSettings(space="ip", m=32, ef_construction=200, ef_search=50))
+        mock_collection = MagicMock(metadata={})
+        mock_collection.configuration_json = {
+            "hnsw": {"space": "ip", "max_neighbors": 32, "ef_construction": 200, "ef_search": 50}
+        }
+        chroma_db.client.get_or_create_collection.return_value = mock_collection
+
+        chroma_db.get_or_create_collection()
+
+        metadata = chroma_db.client.get_or_create_collection.call_args[1]["metadata"]
+        assert metadata["hnsw:space"] == "ip"
+        assert metadata["hnsw:M"] == 32
+        assert metadata["hnsw:construction_ef"] == 200
+        assert metadata["hnsw:search_ef"] == 50
+        mock_collection.modify.assert_not_called()
+
+    def test_get_or_create_collection_updates_ef_search(self, chroma_db):
+        """Test that a changed ef_search is applied to an existing collection."""
+        mock_collection = MagicMock(metadata={})
+        mock_collection.configuration_json = {"hnsw": {"space": "cosine", "ef_search": 10}}
+        chroma_db.client.get_or_create_collection.return_value = mock_collection
+
+        chroma_db.get_or_create_collection()
+
+        mock_collection.modify.assert_called_once_with(configuration={"hnsw": {"ef_search": CHROMA_HNSW_EF_SEARCH}})
+
+    def test_collection_metadata_reads_hnsw_configuration(self, chroma_db):
+        """Test that the metadata reports the ef_search set on the configuration after the collection was created."""
+        mock_collection = MagicMock(metadata={"embedder": "keywords", "hnsw:space": "cosine", "hnsw:search_ef": 10})
+        mock_collection.configuration_json = {
+            "hnsw": {"space": "cosine", "max_neighbors": 16, "ef_construction": 100, "ef_search": 50}
+        }
+        chroma_db.collection = mock_collection
+
+        metadata = chroma_db.collection_metadata()
+
+        assert metadata["embedder"] == "keywords"
+        assert HNSWSettings.from_metadata(metadata) == HNSWSettings(
+            space="cosine", m=16, ef_construction=100, ef_search=50
         )
 
+    def test_get_or_create_collection_warns_on_l2_collection(self, chroma_db):
+        """Test that collections built with the L2 default are reported."""
+        mock_collection = MagicMock(metadata={})
+        mock_collection.configuration_json = {"hnsw": {"space": "l2", "ef_search": CHROMA_HNSW_EF_SEARCH}}
+        chroma_db.client.get_or_create_collection.return_value = mock_collection
+
+        with patch("src.services.vector_db.chroma_impl.logger") as mock_logger:
+            chroma_db.get_or_create_collection()
+
+        assert "uses the l2 distance" in mock_logger.warning.call_args[0][0]
+
+    def test_get_or_create_collection_embedder_mismatch(self, chroma_db):
+        """Test that a collection built by another embedder cannot be used."""
+        mock_collection = MagicMock()
+        mock_collection.metadata = {"embedder": "onnx_mini_lm_l6_v2:onnx_mini_lm_l6_v2:default"}
+        chroma_db.client.get_or_create_collection.return_value = mock_collection
+
+        with pytest.raises(ValueError, match="was built with embedder"):
+            chroma_db.get_or_create_collection()
+
+        assert chroma_db.collection is None
+
     def test_add_docs_with_ids(self, chroma_db):
         """Test adding documents with provided IDs."""
         chroma_db.collection = MagicMock()
@@ -92,21 +234,96 @@ class TestChromaVectorDB:
         chroma_db.collection.add.assert_called_once_with(ids=ids, documents=documents, metadatas=metadatas)
 
     def test_add_docs_without_ids(self, chroma_db):
-        """Test adding documents without provided IDs."""
+        """Test that IDs are derived from the document text when not provided."""
         chroma_db.collection = MagicMock()
         documents = ["doc1", "doc2"]
         metadatas = [{"type": "test1"}, {"type": "test2"}]
 
-        with patch("src.services.vector_db.chroma_impl.uuid.uuid4") as mock_uuid:
-            mock_uuid.side_effect = [
-                uuid.UUID("12345678-1234-5678-1234-567812345678"),
-                uuid.UUID("87654321-4321-8765-4321-876543218765"),
-            ]
+        chroma_db.add_docs(documents, metadatas)
 
-            chroma_db.add_docs(documents, metadatas)
+        expected_ids = [hash_text("doc1"), hash_text("doc2")]
+        chroma_db.collection.add.assert_called_once_with(ids=expected_ids, documents=documents, metadatas=metadatas)
+
+    def test_add_docs_without_ids_skips_duplicate_text(self, chroma_db):
+        """Test that documents with identical text are only added once."""
+        chroma_db.collection = MagicMock()
+
+        chroma_db.add_docs(["same", "same", "other"], [{"type": "a"}, {"type": "b"}, {"type": "c"}])
+
+        chroma_db.collection.add.assert_called_once_with(
+            ids=[hash_text("same"), hash_text("other")],
+            documents=["same", "other"],
+            metadatas=[{"type": "a"}, {"type": "c"}],
+        )
+
+    def test_upsert_docs(self, chroma_db):
+        """Test that upserting documents replaces documents with the same ID."""
+        chroma_db.collection = MagicMock()
+        documents = ["doc1"]
+        metadatas = [{"type": "test1"}]
+
+        chroma_db.upsert_docs(documents, metadatas, ["id1"])
+
+        chroma_db.collection.upsert.assert_called_once_with(ids=["id1"], documents=documents, metadatas=metadatas)
+        chroma_db.collection.add.assert_not_called()
+
+    def test_upsert_docs_no_collection(self, chroma_db):
+        """Test error when upserting docs without initialized collection."""
+        with pytest.raises(ValueError, match="Collection not initialized"):
+            chroma_db.upsert_docs(["doc1"], [{"type": "test"}])
+
+    def test_get_docs(self, chroma_db):
+        """Test getting stored documents with their embeddings."""
+        chroma_db.collection = MagicMock()
+        chroma_db.collection.get.return_value = {
+            "ids": ["id1", "id2"],
+            "documents": ["doc1", "doc2"],
+            "metadatas": [{"type": "test1"}, {"type": "test2"}],
+            "embeddings": [[0.1, 0.2], [0.3, 0.4]],
+        }
+
+        ids, documents, metadatas, embeddings = chroma_db.get_docs(ids=["id1", "id2"], include_embeddings=True)
+
+        assert ids == ["id1", "id2"]
+        assert documents == ["doc1", "doc2"]
+        assert metadatas == [{"type": "test1"}, {"type": "test2"}]
+        assert embeddings.dtype == np.float32
+        assert embeddings.shape == (2, 2)
+        chroma_db.collection.get.assert_called_once_with(
+            ids=["id1", "id2"], include=["documents", "metadatas", "embeddings"]
+        )
+
+    def test_get_docs_without_embeddings(self, chroma_db):
+        """Test getting stored documents without embeddings."""
+        chroma_db.collection = MagicMock()
+        chroma_db.collection.get.return_value = {"ids": [], "documents": [], "metadatas": [], "embeddings": None}
+
+        assert chroma_db.get_docs() == ([], [], [], None)
+        chroma_db.collection.get.assert_called_once_with(ids=None, include=["documents", "metadatas"])
+
+    def test_count(self, chroma_db):
+        """Test counting the stored documents."""
+        chroma_db.collection = MagicMock()
+        chroma_db.collection.count.return_value = 3
+
+        assert chroma_db.count() == 3
+
+    def test_embed_texts(self, chroma_db):
+        """Test embedding texts with the embedding function of the collection."""
+        embedding_function = MagicMock(return_value=[[0.1, 0.2], [0.3, 0.4]])
+        chroma_db.client.get_or_create_collection.return_value = MagicMock(metadata={})
+        chroma_db.get_or_create_collection(embedding_function=embedding_function)
+
+        embeddings = chroma_db.embed_texts(["a", "b"])
+
+        assert embeddings.dtype == np.float32
+        assert embeddings.shape == (2, 2)
+        embedding_function.assert_called_once_with(["a", "b"])
 
-            expected_ids = ["12345678-1234-5678-1234-567812345678", "87654321-4321-8765-4321-876543218765"]
-            chroma_db.collection.add.assert_called_once_with(ids=expected_ids, documents=documents, metadatas=metadatas)
+    def test_embed_texts_no_collection(self, chroma_db):
+        """Test error when embedding texts without initialized collection."""
+        with pytest.raises(ValueError, match="Collection not initialized"):
+            chroma_db.embed_texts(["a"])
 
     def test_add_docs_no_collection(self, chroma_db):
         """Test error when adding docs without initialized collection."""
@@ -168,3 +385,159 @@ class TestChromaVectorDB:
         """Test error when finding similar docs without collection."""
         with pytest.raises(ValueError, match="Collection not initialized"):
             chroma_db.find_similar_docs("test query")
+
+    def test_find_similar_docs_batch(self, chroma_db):
+        """Test that several queries are answered with a single collection query."""
+        chroma_db.collection = MagicMock()
+        chroma_db.collection.query.return_value = {
+            "ids": [["id1"], ["id2"]],
+            "documents": [["doc1"], ["doc2"]],
+            "metadatas": [[{"type": "test1"}], [{"type": "test2"}]],
+            "distances": [[0.2], [0.8]],
+        }
+
+        results = chroma_db.find_similar_docs_batch(["query 1", "query 2"], n_results=1)
+
+        assert len(results) == 2
+        assert results[0][:4] == (["id1"], ["doc1"], [{"type": "test1"}], [0.2])
+        assert results[1][:4] == (["id2"], ["doc2"], [{"type": "test2"}], [0.8])
+        chroma_db.collection.query.assert_called_once_with(query_texts=["query 1", "query 2"], n_results=1)
+
+    def test_add_docs_in_chunks(self, chroma_db):
+        """Test that bulk inserts are split into chunks of the configured size."""
+        chroma_db.collection = MagicMock()
+        chroma_db.insert_chunk_size = 2
+        documents = ["doc1", "doc2", "doc3"]
+        metadatas = [{"type": "a"}, {"type": "b"}, {"type": "c"}]
+        ids = ["id1", "id2", "id3"]
+
+        chroma_db.add_docs(documents, metadatas, ids)
+
+        calls = sorted(chroma_db.collection.add.call_args_list, key=lambda c: c.kwargs["ids"])
+        assert [c.kwargs["ids"] for c in calls] == [["id1", "id2"], ["id3"]]
+        assert [c.kwargs["documents"] for c in calls] == [["doc1", "doc2"], ["doc3"]]
+
+    def test_add_docs_retries_failed_chunk(self, chroma_db):
+        """Test that a failing chunk is retried before succeeding."""
+        chroma_db.collection = MagicMock()
+        chroma_db.collection.add.side_effect = [RuntimeError("rate limited"), None]
+
+        with patch("src.services.vector_db.chroma_impl.ChromaVectorDB._write_chunk.retry.sleep"):
+            chroma_db.add_docs(["doc1"], [{"type": "a"}], ["id1"])
+
+        assert chroma_db.collection.add.call_count == 2
+
+    def test_upsert_docs_reports_failed_chunks(self, chroma_db):
+        """Test that chunks keep being written when one chunk fails permanently."""
+        chroma_db.collection = MagicMock()
+        chroma_db.insert_chunk_size = 1
+        chroma_db.insert_max_workers = 1
+
+        def upsert(ids, documents, metadatas):
+            if ids == ["id1"]:
+                raise RuntimeError("boom")
+
+        chroma_db.collection.upsert.side_effect = upsert
+
+        with (
+            patch("src.services.vector_db.chroma_impl.ChromaVectorDB._write_chunk.retry.sleep"),
+            pytest.raises(RuntimeError, match="1 of 2 chunks failed"),
+        ):
+            chroma_db.upsert_docs(["doc1", "doc2"], [{"type": "a"}, {"type": "b"}], ["id1", "id2"])
+
+        upserted_ids = [c.kwargs["ids"] for c in chroma_db.collection.upsert.call_args_list]
+        assert ["id2"] in upserted_ids
+        assert upserted_ids.count(["id1"]) == 3
+
+
+def established_connections(port: int) -> int:
+    """Count the established TCP connections to a local port, from /proc/net/tcp."""
+    count = 0
+    for line in Path("/proc/net/tcp").read_text().splitlines()[1:]:
+        fields = line.split()
+        if int(fields[2].split(":")[1], 16) == port and fields[3] == "01":
+            count += 1
+    return count
+
+
+@pytest.fixture(scope="module")
+def chroma_server(tmp_path_factory):
+    """Local Chroma server on a free port, as (host, port)."""
+    executable = shutil.which("chroma")
+    if executable is None:
+        pytest.skip("the chroma CLI is not installed")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [
+            executable,
+            "run",
+            "--path",
+            str(tmp_path_factory.mktemp("chroma")),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/v2/heartbeat", timeout=1):
+                    break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    pytest.skip("the Chroma server did not start")
+                time.sleep(0.2)
+        yield "127.0.0.1", port
+    finally:
+        server.terminate()
+        server.wait()
+
+
+class TestChromaServer:
+    """Tests of the client/server mode against a local Chroma server."""
+
+    @pytest.fixture(autouse=True)
+    def clear_client_cache(self):
+        """Open a new Chroma client in every test."""
+        get_chroma_client.cache_clear()
+        yield
+        get_chroma_client.cache_clear()
+
+    def create_db(self, host: str, port: int) -> ChromaVectorDB:
+        """Create a ChromaVectorDB of the server, embedding with keyword counts."""
+        with patch("src.services.vector_db.chroma_impl.EmbeddingFunctionFactory") as mock_factory:
+            mock_factory.create.return_value = KeywordEmbeddingFunction()
+            return ChromaVectorDB(host=host, port=port)
+
+    @pytest.mark.skipif(not Path("/proc/net/tcp").exists(), reason="requires /proc")
+    def test_concurrent_queries_share_a_bounded_pool(self, chroma_server):
+        """Test that instances share one client, whose concurrent queries reuse a bounded set of connections."""
+        host, port = chroma_server
+        with patch("src.services.vector_db.chroma_impl.CHROMA_HTTP_MAX_CONNECTIONS", 4):
+            writer = self.create_db(host, port)
+            reader = self.create_db(host, port)
+        assert reader.client is writer.client
+
+        writer.get_or_create_collection("pooled_docs")
+        writer.upsert_docs(
+            ["invoice invoice", "memo memo memo", "resume"],
+            [{"document_type": "invoice"}, {"document_type": "memo"}, {"document_type": "resume"}],
+            ["id1", "id2", "id3"],
+        )
+        reader.get_or_create_collection("pooled_docs")
+        connections_before = established_connections(port)
+
+        queries = ["invoice", "memo", "resume"] * 20
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda query: reader.find_similar_docs(query, n_results=1), queries))
+
+        assert [metadatas[0]["document_type"] for _, _, metadatas, _, _ in results] == queries
+        # 16 threads share at most 4 connections, which stay open for the next queries
+        assert connections_before <= established_connections(port) <= connections_before + 4
@@ -0,0 +1,216 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.services.vector_db.numpy_impl import NumpyCollection, NumpyVectorDB
+from tests.unit.services.vector_db.embedding_functions import KeywordEmbeddingFunction
+
+
+class TestNumpyVectorDB:
+    """Tests for the NumpyVectorDB class."""
+
+    @pytest.fixture
+    def embedding_function(self):
+        """Keyword embedding function fixture."""
+        return KeywordEmbeddingFunction()
+
+    @pytest.fixture
+    def numpy_db(self, tmp_path, embedding_function):
+        """NumpyVectorDB with an open collection stored in a temporary folder."""
+        with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"):
+            db = NumpyVectorDB(path=tmp_path)
+        db.get_or_create_collection(embedding_function=embedding_function)
+        return db
+
+    @pytest.fixture
+    def populated_db(self, numpy_db):
+        """NumpyVectorDB holding three documents."""
+        numpy_db.add_docs(
+            ["invoice invoice", "memo memo memo", "resume"],
+            [{"document_type": "invoice"}, {"document_type": "memo"}, {"document_type": "resume"}],
+            ["id1", "id2", "id3"],
+        )
+        return numpy_db
+
+    def test_find_similar_docs(self, populated_db):
+        """Test exact top-k search ordered by cosine distance."""
+        ids, documents, metadatas, distances, confidence = populated_db.find_similar_docs("memo", n_results=2)
+
+        assert ids[0] == "id2"
+        assert documents[0] == "memo memo memo"
+        assert metadatas[0] == {"document_type": "memo"}
+        assert len(ids) == 2
+        assert distances[0] == pytest.approx(0, abs=1e-3)
+        assert distances[0] <= distances[1]
+        assert confidence[0] > confidence[1]
+
+    def test_find_similar_docs_batch(self, populated_db, embedding_function):
+        """Test that several queries are answered with a single embedding call."""
+        calls = embedding_function.calls
+        results = populated_db.find_similar_docs_batch(["invoice", "resume"], n_results=1)
+
+        assert [result[0] for result in results] == [["id1"], ["id3"]]
+        assert embedding_function.calls == calls + 1
+
+    def test_find_similar_docs_with_metadata_filter(self, populated_db):
+        """Test that only documents matching the filter are considered."""
+        ids, _, metadatas, _, _ = populated_db.find_similar_docs("memo", where={"document_type": "resume"})
+
+        assert ids == ["id3"]
+        assert metadatas == [{"document_type": "resume"}]
+
+    def test_find_similar_docs_empty_collection(self, numpy_db):
+        """Test querying an empty collection."""
+        assert numpy_db.find_similar_docs("memo") == ([], [], [], [], [])
+
+    def test_upsert_replaces_in_place(self, populated_db):
+        """Test that upserting an existing ID replaces its vector without growing the index."""
+        populated_db.upsert_docs(["resume resume"], [{"document_type": "memo"}], ["id2"])
+
+        assert populated_db.count() == 3
+        ids, documents, metadatas, _ = populated_db.get_docs(ids=["id2"])
+        assert (ids, documents, metadatas) == (["id2"], ["resume resume"], [{"document_type": "memo"}])
+        assert set(populated_db.find_similar_docs("resume", n_results=2)[0]) == {"id2", "id3"}
+
+    def test_add_docs_skips_existing_ids(self, populated_db):
+        """Test that adding an existing ID keeps the stored document."""
+        populated_db.add_docs(["memo"], [{"document_type": "memo"}], ["id1"])
+
+        assert populated_db.get_docs(ids=["id1"])[1] == ["invoice invoice"]
+
+    def test_upsert_with_precomputed_embeddings(self, numpy_db, embedding_function):
+        """Test that precomputed embeddings are stored without calling the embedding function."""
+        numpy_db.upsert_docs(
+            ["a", "b"], [{"t": "a"}, {"t": "b"}], ["a", "b"], embeddings=np.array([[3, 4, 0], [0, 0, 2]])
+        )
+
+        _, _, _, embeddings = numpy_db.get_docs(include_embeddings=True)
+        np.testing.assert_allclose(embeddings, [[0.6, 0.8, 0], [0, 0, 1]], rtol=1e-6)
+        assert embedding_function.calls == 0
+
+    def test_upsert_dimension_mismatch(self, populated_db):
+        """Test that vectors of another dimension are rejected."""
+        with pytest.raises(ValueError, match="Expected embeddings of dimension 3"):
+            populated_db.upsert_docs(["a"], [{"t": "a"}], ["a"], embeddings=np.ones((1, 2)))
+
+    def test_persists_and_is_shared_between_instances(self, populated_db, tmp_path, embedding_function):
+        """Test that another instance sees the stored documents, and new writes on refresh."""
+        with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"):
+            reader = NumpyVectorDB(path=tmp_path)
+        reader.get_or_create_collection(embedding_function=embedding_function)
+        assert reader.find_similar_docs("invoice", n_results=1)[0] == ["id1"]
+
+        populated_db.add_docs(["memo invoice resume"], [{"document_type": "form"}], ["id4"])
+        assert reader.count() == 4
+        assert reader.find_similar_docs("memo invoice resume", n_results=1)[0] == ["id4"]
+
+    def test_concurrent_writers_allocate_distinct_rows(self, tmp_path):
+        """Test that writers with separate locks, as in separate processes, never overwrite each other's rows."""
+        collections = [NumpyCollection(tmp_path, "docs", {}) for _ in range(4)]
+
+        def write(writer: int) -> None:
+            for batch in range(10):
+                ids = [f"{writer}-{batch}-{i}" for i in range(5)]
+                embeddings = np.full((5, 4), writer + 1, dtype=np.float32)
+                embeddings[:, 0] = batch * 5 + np.arange(5)
+                collections[writer].write(ids, ids, [{}] * 5, embeddings, replace=True)
+
+        with ThreadPoolExecutor(len(collections)) as executor:
+            list(executor.map(write, range(len(collections))))
+
+        reader = NumpyCollection(tmp_path, "docs", {})
+        records = reader.get()
+        assert len(records) == reader.count() == 200
+        assert [row for row, _, _, _ in records] == list(range(200))
+        vectors = reader.vectors()
+        for row, doc_id, _, _ in records:
+            writer, batch, i = map(int, doc_id.split("-"))
+            expected = np.array([batch * 5 + i, writer + 1, writer + 1, writer + 1], dtype=np.float32)
+            np.testing.assert_allclose(vectors[row], expected / np.linalg.norm(expected), rtol=1e-6)
+
+    def test_get_or_create_collection_embedder_mismatch(self, populated_db, tmp_path):
+        """Test that a collection cannot be opened with a different embedder."""
+
+        class OtherEmbeddingFunction(KeywordEmbeddingFunction):
+            def name(self):
+                return "other"
+
+        with pytest.raises(ValueError):
+            populated_db.get_or_create_collection(embedding_function=OtherEmbeddingFunction())
+
+    def test_no_collection(self, tmp_path):
+        """Test errors when no collection is open."""
+        with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"):
+            db = NumpyVectorDB(path=tmp_path)
+
+        with pytest.raises(ValueError, match="Collection not initialized"):
+            db.find_similar_docs("memo")
+        with pytest.raises(ValueError, match="Collection not initialized"):
+            db.add_docs(["memo"], [{"document_type": "memo"}])
+
+    @pytest.mark.parametrize("quantization", ["float16", "int8"])
+    def test_quantized_search_matches_exact_search(self, tmp_path, quantization):
+        """Test that re-ranked quantized search returns the exact neighbours with exact distances."""
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((200, 16)).astype(np.float32)
+        documents = [f"doc {i}" for i in range(200)]
+        metadatas = [{"document_type": f"type{i % 4}"} for i in range(200)]
+        queries = rng.standard_normal((5, 16)).astype(np.float32)
+
+        results = {}
+        for name in ("none", quantization):
+            with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"):
+                db = NumpyVectorDB(path=tmp_path / name, quantization=name)
+            db.get_or_create_collection(embedding_function=KeywordEmbeddingFunction())
+            db.upsert_docs(documents, metadatas, documents, embeddings=embeddings)
+            with patch.object(db, "embed_texts", return_value=queries):
+                results[name] = db.find_similar_docs_batch(["q"] * 5, n_results=5)
+
+        for exact, approximate in zip(results["none"], results[quantization], strict=True):
+            assert approximate[0] == exact[0]
+            np.testing.assert_allclose(approximate[3], exact[3], atol=1e-5)
+
+        codes_size = (tmp_path / quantization / "idu_collection" / f"codes.{quantization}").stat().st_size
+        assert codes_size == 200 * 16 * (2 if quantization == "float16" else 1)
+
+    def test_quantized_search_with_metadata_filter(self, tmp_path):
+        """Test that quantized search only considers filtered rows."""
+        with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"):
+            db = NumpyVectorDB(path=tmp_path, quantization="int8")
+        db.get_or_create_collection(embedding_function=KeywordEmbeddingFunction())
+        db.add_docs(
+            ["invoice invoice", "memo memo memo", "resume"],
+            [{"document_type": "invoice"}, {"document_type": "memo"}, {"document_type": "resume"}],
+            ["id1", "id2", "id3"],
+        )
+
+        assert db.find_similar_docs("memo")[0][0] == "id2"
+        assert db.find_similar_docs("memo", where={"document_type": "resume"})[0] == ["id3"]
+
+    def test_quantization_mismatch(self, populated_db, tmp_path):
+        """Test that a collection cannot be opened with another quantization than the stored one."""
+        with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"):
+            db = NumpyVectorDB(path=tmp_path, quantization="int8")
+
+        with pytest.raises(ValueError, match="stores none quantization, but int8 was requested"):
+            db.get_or_create_collection(embedding_function=KeywordEmbeddingFunction())
+
+    def test_collection_without_recorded_quantization(self, populated_db, tmp_path):
+        """Test that a collection written before quantization was recorded is not given codes it lacks."""
+        collection = populated_db.collection
+        with collection._connection() as conn:
+            conn.execute("DELETE FROM collection WHERE key = 'quantization'")
+
+        reopened = NumpyCollection(collection.path, collection.name, {"quantization": "int8"})
+
+        assert reopened.quantization == "none"
+
+    def test_unsupported_quantization(self, tmp_path):
+        """Test that unknown quantization types are rejected."""
+        with (
+            patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory"),
+            pytest.raises(ValueError, match="Unsupported quantization type"),
+        ):
+            NumpyVectorDB(path=tmp_path, quantization="int4")  # type: ignore[arg-type]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.services.vector_db.quantization import approximate_scores, dequantize, quantize
+
+
+class TestQuantization:
+    """Tests for the scalar quantization helpers."""
+
+    @pytest.fixture
+    def vectors(self):
+        """Random unit vectors."""
+        vectors = np.random.default_rng(0).standard_normal((50, 32)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def test_float16_round_trip(self, vectors):
+        """Test float16 codes without scales."""
+        codes, scales = quantize(vectors, "float16")
+
+        assert codes.dtype == np.float16
+        assert scales is None
+        np.testing.assert_allclose(dequantize(codes, scales), vectors, atol=1e-3)
+
+    def test_int8_round_trip(self, vectors):
+        """Test int8 codes scaled per vector."""
+        codes, scales = quantize(vectors, "int8")
+
+        assert codes.dtype == np.int8
+        assert scales.shape == (50,)
+        assert np.abs(codes).max(axis=1).tolist() == [127] * 50
+        np.testing.assert_allclose(dequantize(codes, scales), vectors, atol=scales.max())
+
+    def test_int8_zero_vector(self):
+        """Test that zero vectors are encoded without dividing by zero."""
+        codes, scales = quantize(np.zeros((1, 4)), "int8")
+
+        assert codes.tolist() == [[0, 0, 0, 0]]
+        assert scales.tolist() == [1.0]
+
+    def test_unsupported_quantization(self, vectors):
+        """Test that unknown quantization types are rejected."""
+        with pytest.raises(ValueError, match="Unsupported quantization type"):
+            quantize(vectors, "int4")  # type: ignore[arg-type]
+
+    @pytest.mark.parametrize("quantization", ["float16", "int8"])
+    def test_approximate_scores_match_exact_scores(self, vectors, quantization):
+        """Test that blocked scoring of codes approximates the exact inner products."""
+        codes, scales = quantize(vectors, quantization)
+        queries = vectors[:3]
+
+        scores = approximate_scores(queries, codes, scales, block_rows=7)
+
+        assert scores.shape == (3, 50)
+        np.testing.assert_allclose(scores, queries @ vectors.T, atol=0.02)
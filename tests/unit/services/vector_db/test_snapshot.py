@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.services.vector_db.numpy_impl import NumpyVectorDB
+from src.services.vector_db.snapshot import export_snapshot, import_snapshot, read_manifest, read_snapshot
+from tests.unit.services.vector_db.embedding_functions import KeywordEmbeddingFunction
+
+
+def create_numpy_db(path, embedding_function, quantization="none"):
+    """Create a NumpyVectorDB whose default embedder is the given embedding function."""
+    with patch("src.services.vector_db.numpy_impl.EmbeddingFunctionFactory") as mock_factory:
+        mock_factory.create.return_value = embedding_function
+        return NumpyVectorDB(path=path, quantization=quantization)
+
+
+class TestSnapshot:
+    """Tests for the vector snapshot export and import."""
+
+    @pytest.fixture
+    def embedding_function(self):
+        """Keyword embedding function fixture."""
+        return KeywordEmbeddingFunction()
+
+    @pytest.fixture
+    def snapshot_path(self, tmp_path, embedding_function):
+        """Snapshot of an int8 collection holding three documents."""
+        source_db = create_numpy_db(tmp_path / "source", embedding_function, quantization="int8")
+        source_db.get_or_create_collection(name="documents", metadata={"description": "test"})
+        source_db.add_docs(
+            ["invoice invoice", "memo memo memo", "résumé resume"],
+            [{"document_type": "invoice"}, {"document_type": "memo"}, {"document_type": "resume"}],
+            ["id1", "id2", "id3"],
+        )
+        path = tmp_path / "snapshots" / "documents.npz"
+        export_snapshot(source_db, path)
+        return path
+
+    def test_export_manifest(self, snapshot_path):
+        """Test that the manifest records the collection, its index parameters and a checksum per array."""
+        manifest = read_manifest(snapshot_path)
+
+        assert manifest["collection"] == "documents"
+        assert manifest["count"] == 3
+        assert manifest["dimensions"] == 3
+        assert manifest["metadata"]["quantization"] == "int8"
+        assert manifest["metadata"]["description"] == "test"
+        assert set(manifest["checksums"]) >= {"ids_data", "documents_data", "metadatas_data", "embeddings"}
+
+    def test_round_trip(self, snapshot_path):
+        """Test that a snapshot reads back the exported records."""
+        _, ids, documents, metadatas, embeddings = read_snapshot(snapshot_path)
+
+        assert ids == ["id1", "id2", "id3"]
+        assert documents == ["invoice invoice", "memo memo memo", "résumé resume"]
+        assert metadatas[2] == {"document_type": "resume"}
+        assert embeddings.shape == (3, 3)
+        assert embeddings.dtype == np.float32
+
+    def test_import_without_embedding(self, tmp_path, snapshot_path, embedding_function):
+        """Test that an import writes the stored vectors without calling the embedder."""
+        target_db = create_numpy_db(tmp_path / "target", embedding_function)
+
+        import_snapshot(target_db, snapshot_path, name="restored")
+
+        assert embedding_function.calls == 1  # the embedding of the source documents only
+        assert target_db.collection.name == "restored"
+        assert target_db.count() == 3
+        ids, _, metadatas, _, _ = target_db.find_similar_docs("memo", n_results=1)
+        assert ids == ["id2"]
+        assert metadatas[0] == {"document_type": "memo"}
+
+    def test_import_corrupted_snapshot(self, tmp_path, snapshot_path, embedding_function):
+        """Test that a snapshot whose arrays do not match their checksums is rejected."""
+        with np.load(snapshot_path) as snapshot:
+            arrays = dict(snapshot)
+        arrays["embeddings"] = arrays["embeddings"] * 2
+        with open(snapshot_path, "wb") as f:
+            np.savez(f, **arrays)
+
+        target_db = create_numpy_db(tmp_path / "target", embedding_function)
+        with pytest.raises(ValueError, match="checksum mismatch for 'embeddings'"):
+            import_snapshot(target_db, snapshot_path)
+
+    def test_import_with_another_embedder(self, tmp_path, snapshot_path):
+        """Test that vectors are not imported into a collection using a different embedder."""
+        target_db = create_numpy_db(tmp_path / "target", KeywordEmbeddingFunction(name="other"))
+        with pytest.raises(ValueError, match="was built with embedder 'keywords:keywords:default'"):
+            import_snapshot(target_db, snapshot_path)
+        assert target_db.collection is None
+        assert not (tmp_path / "target").exists()
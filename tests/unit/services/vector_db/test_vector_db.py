@@ -1,6 +1,7 @@
 import pytest
 
 from src.services.vector_db.chroma_impl import ChromaVectorDB
+from src.services.vector_db.numpy_impl import NumpyVectorDB
 from src.services.vector_db.vector_db import VectorDBFactory
 
 
@@ -12,6 +13,11 @@ class TestVectorDBFactory:
         db = VectorDBFactory.create("chromadb")
         assert isinstance(db, ChromaVectorDB)
 
+    def test_create_numpy(self):
+        """Test creating a NumpyVectorDB instance."""
+        db = VectorDBFactory.create("numpy")
+        assert isinstance(db, NumpyVectorDB)
+
     def test_create_unsupported_db_type(self):
         """Test creating an unsupported vector database type."""
         with pytest.raises(ValueError, match="Unsupported vector database type: unsupported"):
@@ -0,0 +1,106 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from src.services.ocr.tesseract_impl import TesseractOCREngine
+from src.utils.benchmark import (
+    accuracy,
+    directory_size,
+    extract_texts,
+    format_bytes,
+    mapped_rss,
+    process_rss,
+    read_labeled_files,
+    recall_at_k,
+    summarize_latencies,
+)
+
+
+class TestBenchmark:
+    """Tests for the benchmark helpers."""
+
+    def test_read_labeled_files(self, tmp_path):
+        """Test reading one label per subfolder, with a per-label limit."""
+        for label, count in [("invoice", 3), ("memo", 1)]:
+            (tmp_path / label).mkdir()
+            for i in range(count):
+                (tmp_path / label / f"{i}.png").write_bytes(b"")
+        (tmp_path / "README.md").write_text("not a label")
+
+        file_paths, labels = read_labeled_files(tmp_path, limit_per_label=2)
+
+        assert labels == ["invoice", "invoice", "memo"]
+        assert file_paths == [
+            (tmp_path / "invoice" / "0.png").as_posix(),
+            (tmp_path / "invoice" / "1.png").as_posix(),
+            (tmp_path / "memo" / "0.png").as_posix(),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_extract_texts_keeps_order_and_failures(self):
+        """Test that failed files map to None without aborting the batch."""
+        ocr_engine = AsyncMock()
+        ocr_engine.extract_text_from_image_async.side_effect = ["a", Exception("boom"), "c"]
+
+        texts = await extract_texts(ocr_engine, ["1.png", "2.png", "3.png"], batch_size=2)
+
+        assert texts == ["a", None, "c"]
+
+    @pytest.mark.asyncio
+    async def test_extract_texts_with_sync_only_engine(self):
+        """Test that engines without async extraction, such as Tesseract, are run in a thread."""
+        ocr_engine = TesseractOCREngine()
+
+        with patch.object(
+            ocr_engine, "extract_text_from_image", side_effect=lambda image_path: f"text of {image_path}"
+        ):
+            texts = await extract_texts(ocr_engine, ["1.png", "2.png"])
+
+        assert texts == ["text of 1.png", "text of 2.png"]
+
+    def test_accuracy(self):
+        """Test the accuracy of predictions."""
+        assert accuracy(["a", "b", "c", "c"], ["a", "b", "b", "c"]) == 0.75
+        assert accuracy([], []) == 0.0
+
+    def test_summarize_latencies(self):
+        """Test that latencies are summarized in milliseconds."""
+        summary = summarize_latencies([0.001] * 99 + [0.101])
+
+        assert summary["p50_ms"] == pytest.approx(1.0)
+        assert summary["mean_ms"] == pytest.approx(2.0)
+        assert summary["p99_ms"] > summary["p95_ms"]
+        assert summarize_latencies([]) == {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+
+    def test_recall_at_k(self):
+        """Test recall of approximate results against exact neighbours."""
+        retrieved = [["a", "b", "x"], ["c", "e", "d"]]
+        relevant = [["a", "b", "c"], ["d", "c", "f"]]
+
+        assert recall_at_k(retrieved, relevant, k=2) == pytest.approx(0.75)
+        assert recall_at_k(retrieved, relevant, k=3) == pytest.approx(2 / 3)
+        assert recall_at_k([], [], k=10) == 0.0
+
+    def test_directory_size_and_format_bytes(self, tmp_path):
+        """Test measuring and formatting on-disk footprints."""
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "a.bin").write_bytes(b"x" * 1000)
+        (tmp_path / "nested" / "b.bin").write_bytes(b"x" * 1048)
+
+        assert directory_size(tmp_path) == 2048
+        assert format_bytes(2048) == "2.0KiB"
+        assert format_bytes(512) == "512.0B"
+
+    @pytest.mark.skipif(not Path("/proc/self/smaps").exists(), reason="requires /proc")
+    def test_mapped_rss_counts_touched_pages(self, tmp_path):
+        """Test that only the touched pages of memory-mapped files under a directory are resident."""
+        (tmp_path / "vectors.f32").write_bytes(np.ones(1 << 20, dtype=np.float32).tobytes())
+        vectors = np.memmap(tmp_path / "vectors.f32", dtype=np.float32, mode="r")
+
+        assert process_rss() > 0
+        assert mapped_rss(tmp_path) < 1 << 20
+        vectors.sum()
+        assert mapped_rss(tmp_path) == 4 << 20
+        assert mapped_rss(tmp_path / "other") == 0
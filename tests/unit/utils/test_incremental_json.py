@@ -0,0 +1,57 @@
+import json
+import random
+
+import pytest
+
+from src.utils.incremental_json import IncrementalJSONObjectParser
+
+OBJECT = {
+    "invoice_number": 'INV-"42", {draft}',
+    "line_items": ["a]", {"b": "}"}],
+    "total_amount": 1200.5,
+    "signature_present": True,
+    "due_date": None,
+    "filled_fields": {"name": []},
+    "notes": "é\n",
+}
+
+
+class TestIncrementalJSONObjectParser:
+    """Tests for the IncrementalJSONObjectParser class."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_chunks(self, seed):
+        """Test that members are returned once, in order, whatever the chunk boundaries."""
+        text = json.dumps(OBJECT, indent=2)
+        rng = random.Random(seed)
+        parser = IncrementalJSONObjectParser()
+        members = []
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 8)
+            members += parser.feed(text[position : position + size])
+            position += size
+
+        assert members == list(OBJECT.items())
+        assert parser.fields == OBJECT
+        assert parser.done
+
+    def test_values_complete_at_their_end(self):
+        """Test that strings complete at their closing quote, and numbers at the following delimiter."""
+        parser = IncrementalJSONObjectParser()
+
+        assert parser.feed('{"a": "x"') == [("a", "x")]
+        assert parser.feed(', "b": 1') == []
+        assert parser.feed("2") == []
+        assert parser.feed(', "c"') == [("b", 12)]
+        assert not parser.done
+
+    def test_closing_brace(self):
+        """Test that the last scalar completes at the closing brace, and that an empty object completes."""
+        parser = IncrementalJSONObjectParser()
+        assert parser.feed('{"b": 12}') == [("b", 12)]
+        assert parser.done
+
+        parser = IncrementalJSONObjectParser()
+        assert parser.feed("{}") == []
+        assert parser.done
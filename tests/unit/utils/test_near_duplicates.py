@@ -0,0 +1,81 @@
+from src.utils.near_duplicates import MinHasher, NearDuplicateIndex, PrunedPageLog, shingles
+
+INVOICE = "Invoice number 1042 issued to Acme Corporation for consulting services rendered in March, total due 500 USD"
+
+
+class TestShingles:
+    """Tests for the shingles function."""
+
+    def test_word_shingles(self):
+        """Test that shingles ignore case and punctuation."""
+        assert shingles("Total: due, NOW please", size=3) == {"total due now", "due now please"}
+
+    def test_short_text(self):
+        """Test that a text shorter than a shingle is a single shingle."""
+        assert shingles("Memo", size=3) == {"memo"}
+
+
+class TestMinHasher:
+    """Tests for the MinHasher class."""
+
+    def test_signature_is_deterministic(self):
+        """Test that hashers with the same seed produce the same signature."""
+        assert (MinHasher(num_perm=64).signature(INVOICE) == MinHasher(num_perm=64).signature(INVOICE)).all()
+
+    def test_signature_estimates_jaccard_similarity(self):
+        """Test that signature agreement is close to the Jaccard similarity of the shingles."""
+        other = INVOICE.replace("March", "April")
+        expected = len(shingles(INVOICE) & shingles(other)) / len(shingles(INVOICE) | shingles(other))
+        hasher = MinHasher(num_perm=512)
+
+        estimate = (hasher.signature(INVOICE) == hasher.signature(other)).mean()
+
+        assert abs(estimate - expected) < 0.1
+
+
+class TestNearDuplicateIndex:
+    """Tests for the NearDuplicateIndex class."""
+
+    def test_prunes_near_duplicates(self):
+        """Test that a near-identical text of the same label is pruned."""
+        index = NearDuplicateIndex(threshold=0.8)
+
+        assert index.add(INVOICE, "invoice")
+        assert not index.add(INVOICE + " thank you", "invoice")
+        assert index.add("Meeting moved to Thursday afternoon in the main conference room", "invoice")
+        assert (index.kept, index.pruned) == (2, 1)
+
+    def test_kept_without_pruning(self):
+        """Test that a near-duplicate added without pruning is kept as an exemplar."""
+        index = NearDuplicateIndex(threshold=0.8)
+        index.seed(INVOICE, "invoice")
+
+        assert index.add(INVOICE + " thank you", "invoice", prune=False)
+        assert (index.kept, index.pruned) == (1, 0)
+
+    def test_labels_are_compared_separately(self):
+        """Test that identical texts of different labels are both kept."""
+        index = NearDuplicateIndex()
+
+        assert index.add(INVOICE, "invoice")
+        assert index.add(INVOICE, "form")
+
+    def test_seeded_texts_are_not_counted(self):
+        """Test that seeded exemplars prune new texts without being counted as kept or pruned."""
+        index = NearDuplicateIndex(threshold=0.8)
+        index.seed(INVOICE, "invoice")
+
+        assert not index.add(INVOICE + " thank you", "invoice")
+        assert (index.seeded, index.kept, index.pruned) == (1, 0, 1)
+
+
+class TestPrunedPageLog:
+    """Tests for the PrunedPageLog class."""
+
+    def test_records_are_persistent_and_scoped(self, tmp_path):
+        """Test that pruned documents are found again by a new log of the same scope only."""
+        path = tmp_path / "pruned.sqlite3"
+        PrunedPageLog("numpy/docs/0.9", path).record({"doc-1": "hash-1"})
+
+        assert PrunedPageLog("numpy/docs/0.9", path).content_hashes(["doc-1", "doc-2"]) == {"doc-1": "hash-1"}
+        assert PrunedPageLog("numpy/docs/0.95", path).content_hashes(["doc-1"]) == {}
@@ -0,0 +1,32 @@
+from unittest.mock import patch
+
+from src.utils.rate_limiter import RateLimiter
+
+
+class TestRateLimiter:
+    """Tests for the RateLimiter class."""
+
+    def test_disabled_limiter_never_sleeps(self):
+        """Test that a non-positive rate disables limiting."""
+        limiter = RateLimiter(0)
+
+        with patch("src.utils.rate_limiter.time.sleep") as mock_sleep:
+            for _ in range(5):
+                limiter.acquire()
+
+        mock_sleep.assert_not_called()
+
+    def test_calls_are_spaced(self):
+        """Test that consecutive calls wait for the next free slot."""
+        limiter = RateLimiter(10)
+
+        with (
+            patch("src.utils.rate_limiter.time.monotonic", return_value=100.0),
+            patch("src.utils.rate_limiter.time.sleep") as mock_sleep,
+        ):
+            limiter._next_slot = 100.0
+            limiter.acquire()
+            limiter.acquire()
+            limiter.acquire()
+
+        assert [round(c.args[0], 3) for c in mock_sleep.call_args_list] == [0.1, 0.2]
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.utils.sqlite_cache import CacheStats, SQLiteCache
+
+
+class TestCacheStats:
+    """Tests for the CacheStats dataclass."""
+
+    def test_hit_rate(self):
+        """Test hit rate calculation."""
+        assert CacheStats(hits=3, misses=1).hit_rate == 0.75
+
+    def test_hit_rate_without_lookups(self):
+        """Test hit rate is zero before any lookup."""
+        assert CacheStats().hit_rate == 0.0
+
+
+class TestSQLiteCache:
+    """Tests for the SQLiteCache class."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Cache stored in a temporary directory."""
+        return SQLiteCache(tmp_path / "cache.sqlite3", max_entries=3)
+
+    def test_invalid_table_name(self, tmp_path):
+        """Test that unsafe table names are rejected."""
+        with pytest.raises(ValueError, match="Invalid cache table name"):
+            SQLiteCache(tmp_path / "cache.sqlite3", table="drop table;")
+
+    def test_database_is_opened_lazily(self, tmp_path):
+        """Test that no file is created until the cache is used."""
+        path = tmp_path / "nested" / "cache.sqlite3"
+        cache = SQLiteCache(path)
+        assert not path.exists()
+
+        cache.set("key", b"value")
+        assert path.exists()
+
+    def test_set_and_get(self, cache):
+        """Test storing and retrieving values."""
+        cache.set_many({"a": b"1", "b": b"2"})
+
+        assert cache.get("a") == b"1"
+        assert cache.get_many(["a", "b", "c"]) == {"a": b"1", "b": b"2"}
+        assert cache.get("missing") is None
+
+    def test_stats(self, cache):
+        """Test hit and miss counters."""
+        cache.set("a", b"1")
+        cache.get_many(["a", "a", "b"])
+
+        stats = cache.stats()
+        assert stats.hits == 2
+        assert stats.misses == 1
+        assert stats.entries == 1
+
+    def test_evicts_least_recently_used(self, cache):
+        """Test that the oldest accessed entries are evicted above max_entries."""
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        cache.set("c", b"3")
+        cache.get("a")
+        cache.set("d", b"4")
+
+        assert cache.get("b") is None
+        assert cache.get_many(["a", "c", "d"]) == {"a": b"1", "c": b"3", "d": b"4"}
+
+    def test_expired_entries(self, tmp_path):
+        """Test that entries older than the TTL are ignored and deleted on the next write."""
+        cache = SQLiteCache(tmp_path / "cache.sqlite3", ttl_s=60)
+        cache.set("a", b"1")
+
+        with patch("src.utils.sqlite_cache.time.time", return_value=10**10):
+            assert cache.get("a") is None
+            cache.set("b", b"2")
+
+        assert cache.stats().entries == 1
+
+    def test_shared_stats(self, tmp_path):
+        """Test that hits and misses are summed over every instance using the same table."""
+        SQLiteCache(tmp_path / "cache.sqlite3").set("a", b"1")
+        SQLiteCache(tmp_path / "cache.sqlite3").get("a")
+        cache = SQLiteCache(tmp_path / "cache.sqlite3")
+        cache.get("b")
+
+        assert cache.shared_stats() == CacheStats(hits=1, misses=1, entries=1)
+        assert SQLiteCache(tmp_path / "cache.sqlite3", table="other").shared_stats() == CacheStats()
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        SQLiteCache(tmp_path / "cache.sqlite3").set("a", b"1")
+
+        assert SQLiteCache(tmp_path / "cache.sqlite3").get("a") == b"1"
+
+    def test_clear(self, cache):
+        """Test clearing entries and counters."""
+        cache.set("a", b"1")
+        cache.get("a")
+        cache.clear()
+
+        assert cache.stats() == CacheStats(hits=0, misses=0, entries=0)
+        assert cache.shared_stats() == CacheStats(hits=0, misses=0, entries=0)
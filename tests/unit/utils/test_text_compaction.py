@@ -0,0 +1,61 @@
+from src.utils.text_compaction import compact_text, estimate_tokens, truncate_to_budget
+
+
+class TestCompactText:
+    """Tests for the compact_text function."""
+
+    def test_whitespace(self):
+        """Test that spaces are collapsed and paragraphs kept."""
+        assert compact_text("  Invoice \t No.  42  \r\n\n\n\nTotal:   99 ") == "Invoice No. 42\n\nTotal: 99"
+
+    def test_hyphenated_words(self):
+        """Test that words hyphenated across lines are joined, but not compounds or ranges."""
+        assert compact_text("The docu-\nment and the well-\nKnown pages 10-\n12") == (
+            "The document and the well-\nKnown pages 10-\n12"
+        )
+
+    def test_soft_hyphen(self):
+        """Test that soft hyphens at line ends are joined too."""
+        assert compact_text("recom\u00ad\nmendation") == "recommendation"
+
+    def test_non_text_runs(self):
+        """Test that table rules, dot leaders and symbol-only lines are dropped."""
+        text = "Item ........ 10\n+-------+-------+\n| | |\nTotal ==== 20"
+
+        assert compact_text(text) == "Item 10\nTotal 20"
+
+    def test_keeps_short_punctuation(self):
+        """Test that ordinary punctuation and amounts are kept."""
+        assert compact_text("Total: $1,200.00 -- due 2024-01-15!") == "Total: $1,200.00 -- due 2024-01-15!"
+
+
+class TestTruncateToBudget:
+    """Tests for the truncate_to_budget function."""
+
+    def test_fits_budget(self):
+        """Test that a text within the budget is returned as is."""
+        assert truncate_to_budget("short text", max_tokens=10) == "short text"
+
+    def test_keeps_beginning_and_end(self):
+        """Test that the middle of a long text is cut at word boundaries."""
+        text = "TITLE " + "word " * 1000 + "TOTAL 99"
+
+        result = truncate_to_budget(text, max_tokens=100)
+
+        head, marker, tail = result.split("\n")
+        assert head.startswith("TITLE word")
+        assert set(head.split()) == {"TITLE", "word"}
+        assert marker.endswith("characters omitted ...]")
+        assert tail.endswith("word TOTAL 99")
+        assert set(tail.split()) == {"word", "TOTAL", "99"}
+        assert estimate_tokens(result) <= 100
+
+
+class TestEstimateTokens:
+    """Tests for the estimate_tokens function."""
+
+    def test_estimate(self):
+        """Test the character-based estimate."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("x" * 7) == 2
+        assert estimate_tokens("x" * 8, chars_per_token=4) == 2